@@ -0,0 +1,83 @@
+from typing import Any
+from clients import get_openai_client
+from agents.llm_cache import ResponseCache, cached_json_completion, default_cache
+from agents.metadata_agent import MetadataAgent, SYSTEM_PROMPT as METADATA_SYSTEM_PROMPT
+from agents.metadata_agent import build_user_prompt as build_metadata_prompt
+from agents.prompt_agent import PromptAgent, SYSTEM_PROMPT as PROMPTS_SYSTEM_PROMPT, is_requested_prompts
+from agents.prompt_agent import build_user_prompt as build_prompts_prompt
+from agents.progress import report
+from bot_types import Concept, Metadata, Prompts, is_valid_metadata
+
+SYSTEM_PROMPT = f"""
+You generate both the YouTube metadata and the AI generation prompts
+for one long ambience video, in a single response.
+
+Output MUST be valid JSON with exactly two keys:
+- metadata: an object following the METADATA section
+- prompts: an object following the PROMPTS section
+
+=== METADATA ===
+{METADATA_SYSTEM_PROMPT}
+=== PROMPTS ===
+{PROMPTS_SYSTEM_PROMPT}
+"""
+
+# Between the metadata (0.4) and prompt (0.6) agents' temperatures
+TEMPERATURE: float = 0.5
+
+
+def is_valid_combined(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and is_valid_metadata(value.get("metadata"))
+        and is_requested_prompts(value.get("prompts"))
+    )
+
+
+class CombinedAgent:
+    """Generates Metadata and Prompts with one chat completion instead of two.
+
+    Falls back to the separate MetadataAgent and PromptAgent calls when the
+    combined response does not match the bot_types schemas.
+    """
+    cache: ResponseCache
+
+    def __init__(self, cache: ResponseCache | None = None) -> None:
+        self.cache = cache or default_cache()
+
+    def generate(self, concept: Concept, image_resolution: str = "1536x1024") -> tuple[Metadata, Prompts]:
+        user_prompt = f"""
+Produce the metadata and the prompts for this video.
+
+=== METADATA ===
+{build_metadata_prompt(concept)}
+=== PROMPTS ===
+{build_prompts_prompt(concept, image_resolution)}
+"""
+
+        try:
+            result = cached_json_completion(
+                get_openai_client(),
+                self.cache,
+                model="gpt-4o-mini",
+                temperature=TEMPERATURE,
+                system_prompt=SYSTEM_PROMPT,
+                user_prompt=user_prompt,
+                agent="combined",
+                validate=is_valid_combined,
+            )
+        except ValueError as e:
+            # json.JSONDecodeError is a ValueError
+            report("combined", f"Combined response was not JSON ({e}), using separate calls")
+            return self._fallback(concept, image_resolution)
+
+        if not is_valid_combined(result):
+            report("combined", "Combined response failed validation, using separate calls")
+            return self._fallback(concept, image_resolution)
+
+        return result["metadata"], result["prompts"]
+
+    def _fallback(self, concept: Concept, image_resolution: str) -> tuple[Metadata, Prompts]:
+        metadata: Metadata = MetadataAgent(cache=self.cache).generate(concept)
+        prompts: Prompts = PromptAgent(cache=self.cache).generate(concept, image_resolution=image_resolution)
+        return metadata, prompts
@@ -1,16 +1,10 @@
 import base64
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from clients import get_openai_client
 from agents.progress import report
 from agents.prompt_utils import flatten_prompt
 
 
-load_dotenv()
-
-client: OpenAI = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
-
 class ImageAgent:
     output_dir: str
 
@@ -24,7 +18,7 @@ class ImageAgent:
         report("image", "Sending request to OpenAI image API")
         normalized_prompt = flatten_prompt(image_prompt)
 
-        result = client.images.generate(
+        result = get_openai_client().images.generate(
             model="gpt-image-1",
             prompt=normalized_prompt,
             size=size
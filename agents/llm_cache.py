@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Callable, Iterator
+
+from agents.progress import report
+from config import DRY_RUN
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+CACHE_PATH: str = "data/cache/llm_responses.sqlite3"
+DEFAULT_TTL_SECONDS: float = 24 * 3600
+DEFAULT_MAX_ENTRIES: int = 500
+
+
+class ResponseCache:
+    """On-disk cache of chat completion responses, backed by SQLite.
+
+    Entries expire after ``ttl_seconds`` and the least recently used
+    entries are evicted once more than ``max_entries`` are stored.
+
+    Args:
+        path: SQLite database file.
+        ttl_seconds: Age after which an entry is ignored and replaced.
+        max_entries: Maximum number of stored responses.
+        refresh: Skip lookups but store fresh responses (forces new output).
+        bypass: Neither read nor write the cache.
+        namespace: Scope of the entries, e.g. a run id; responses are only
+            shared between caches with the same namespace.
+    """
+    path: str
+    ttl_seconds: float
+    max_entries: int
+    refresh: bool
+    bypass: bool
+    namespace: str
+
+    def __init__(
+        self,
+        path: str = CACHE_PATH,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        refresh: bool = False,
+        bypass: bool = False,
+        namespace: str = "",
+    ) -> None:
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.refresh = refresh
+        self.bypass = bypass
+        self.namespace = namespace
+
+    def _scoped(self, key: str) -> str:
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call keeps the cache safe to use
+        # from the pipeline's worker threads
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, content TEXT NOT NULL, "
+                    "created REAL NOT NULL, accessed REAL NOT NULL)"
+                )
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        temperature: float,
+        system_prompt: str,
+        user_prompt: str,
+        response_format: dict[str, Any],
+    ) -> str:
+        """Hash every request parameter that can change the response."""
+        payload: str = json.dumps(
+            [model, temperature, system_prompt, user_prompt, response_format],
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        """Return a cached response, or None on miss, expiry, refresh or bypass."""
+        if self.bypass or self.refresh:
+            return None
+
+        key = self._scoped(key)
+        now: float = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT content, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            content, created = row
+            if now - created > self.ttl_seconds:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return content
+
+    def put(self, key: str, content: str) -> None:
+        """Store a response and evict least recently used entries over the limit."""
+        if self.bypass:
+            return
+
+        key = self._scoped(key)
+        now: float = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, content, now, now),
+            )
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            conn.execute(
+                "DELETE FROM responses WHERE key NOT IN "
+                "(SELECT key FROM responses ORDER BY accessed DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+
+
+def default_cache() -> ResponseCache:
+    """Cache for an agent built without one.
+
+    Dry runs share responses so reruns are free; real runs bypass the
+    cache so a repeated concept never reuses an earlier upload's output.
+    """
+    return ResponseCache(bypass=not DRY_RUN)
+
+def cached_json_completion(
+    client: "OpenAI",
+    cache: ResponseCache,
+    model: str,
+    temperature: float,
+    system_prompt: str,
+    user_prompt: str,
+    agent: str,
+    validate: Callable[[Any], bool] | None = None,
+) -> Any:
+    """Run a JSON-mode chat completion, reusing a cached response when possible.
+
+    Args:
+        client: OpenAI client used on a cache miss.
+        cache: Response cache to consult and update.
+        model: Chat model name.
+        temperature: Sampling temperature.
+        system_prompt: System message content.
+        user_prompt: User message content.
+        agent: Name used in progress messages.
+        validate: Schema check for the parsed response. Responses that fail
+            it are still returned but never cached, and cached entries that
+            fail it are ignored.
+
+    Returns:
+        The parsed JSON response.
+    """
+    response_format: dict[str, Any] = {"type": "json_object"}
+    key: str = cache.make_key(model, temperature, system_prompt, user_prompt, response_format)
+
+    content: str | None = cache.get(key)
+    if content is not None:
+        cached = json.loads(content)
+        if validate is None or validate(cached):
+            report(agent, "Using cached LLM response")
+            return cached
+
+    response = client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        response_format=response_format
+    )
+
+    content = response.choices[0].message.content or ""
+    result = json.loads(content)
+    if validate is None or validate(result):
+        cache.put(key, content)
+    return result
@@ -1,12 +1,7 @@
-import json
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
-from bot_types import Concept, Metadata
-
-load_dotenv()
-
-client: OpenAI = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from clients import get_openai_client
+from agents.llm_cache import ResponseCache, cached_json_completion, default_cache
+from bot_types import Concept, Metadata, is_valid_metadata
 
 SYSTEM_PROMPT = """
 You generate YouTube metadata for long ambience videos.
@@ -16,9 +11,9 @@ Output MUST be valid JSON with keys:
 - tags (array of strings)
 """
 
-class MetadataAgent:
-    def generate(self, concept: Concept) -> Metadata:
-        user_prompt = f"""
+
+def build_user_prompt(concept: Concept) -> str:
+    return f"""
 Create metadata for a {concept['duration']} YouTube ambience video.
 
 Ambience: {concept['ambience']}
@@ -31,18 +26,27 @@ Rules:
 - Description should include hashtags
 """
 
-        response = client.chat.completions.create(
+
+class MetadataAgent:
+    cache: ResponseCache
+
+    def __init__(self, cache: ResponseCache | None = None) -> None:
+        self.cache = cache or default_cache()
+
+    def generate(self, concept: Concept) -> Metadata:
+        user_prompt = build_user_prompt(concept)
+
+        return cached_json_completion(
+            get_openai_client(),
+            self.cache,
             model="gpt-4o-mini",
             temperature=0.4,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"}
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            agent="metadata",
+            validate=is_valid_metadata,
         )
 
-        return json.loads(response.choices[0].message.content)
-
     def save(self, metadata: Metadata) -> None:
         os.makedirs("data/metadata", exist_ok=True)
 
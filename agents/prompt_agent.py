@@ -1,23 +1,36 @@
-import json
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
-from bot_types import Concept, Prompts
+from typing import Any
+from clients import get_openai_client
+from agents.llm_cache import ResponseCache, cached_json_completion, default_cache
+from bot_types import Concept, Prompts, is_valid_prompts
+from config import AUDIO_STEMS
+
+PROMPT_KEYS = """
+- image_prompt: a single string (the full prompt text)
+- video_prompt: a single string (the full prompt text)
+- audio_prompt: a single string (the full prompt text)"""
+
+STEMS_KEY = """
+- audio_stems: an array of 2 to 4 strings, one prompt per sound layer"""
 
-load_dotenv()
 
-client: OpenAI = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+def build_system_prompt(stems: bool = AUDIO_STEMS) -> str:
+    """System prompt asking for the three prompt keys, plus audio_stems when ``stems`` is set."""
+    if stems:
+        keys = f"""Output MUST be valid JSON with exactly these four keys:{PROMPT_KEYS}{STEMS_KEY}
 
-SYSTEM_PROMPT = """
+Do NOT nest objects. All values must be plain strings, except audio_stems,
+which is an array of plain strings."""
+    else:
+        keys = f"""Output MUST be valid JSON with exactly these three keys:{PROMPT_KEYS}
+
+Do NOT nest objects. All values must be plain strings."""
+
+    return f"""
 You generate high-quality prompts for AI image, video, and audio generation
 for long YouTube ambience videos.
 
-Output MUST be valid JSON with exactly these three keys:
-- image_prompt: a single string (the full prompt text)
-- video_prompt: a single string (the full prompt text)
-- audio_prompt: a single string (the full prompt text)
-
-Do NOT nest objects. All values must be plain strings.
+{keys}
 
 GLOBAL RULES:
 - English only
@@ -36,9 +49,19 @@ not from camera motion.
 """
 
 
-class PromptAgent:
-    def generate(self, concept: Concept, image_resolution: str = "1536x1024") -> Prompts:
-        user_prompt = f"""
+SYSTEM_PROMPT = build_system_prompt()
+
+STEMS_REQUIREMENTS = """
+AUDIO STEMS REQUIREMENTS:
+- 2 to 4 prompts, each describing ONE isolated layer of the same soundscape
+- Layers must not overlap (e.g. rain bed, fire crackle, distant wind)
+- Same style rules as the audio prompt, each ending with "no music"
+- Example: ["Steady gentle rain on a window, no music", "Soft wood fire crackling, no music"]
+"""
+
+
+def build_user_prompt(concept: Concept, image_resolution: str = "1536x1024", stems: bool = AUDIO_STEMS) -> str:
+    return f"""
 Create prompts for a long ambience video.
 
 Ambience: {concept['ambience']}
@@ -75,21 +98,48 @@ AUDIO PROMPT REQUIREMENTS:
 - Add mood/atmosphere descriptors: "cozy", "gentle", "soft", "warm", "quiet"
 - End with "no music" to prevent musical elements
 - Example: "Cozy indoor fireplace crackling, warm fire burning wood, soft gentle flames, quiet winter night ambience, no music"
-"""
+{STEMS_REQUIREMENTS if stems else ""}"""
+
+
+# Layers asked of a single audio prompt when no stem prompts were generated
+FALLBACK_STEM_LAYERS: tuple[str, ...] = (
+    "only the steady low background bed",
+    "only the close, detailed foreground sounds",
+    "only the faint distant atmosphere",
+)
+
+
+def derive_stem_prompts(audio_prompt: str) -> list[str]:
+    """One prompt per layer of the soundscape, derived from a single audio prompt."""
+    base: str = audio_prompt.strip().removesuffix("no music").strip().rstrip(",")
+    return [f"{base}, {layer}, no music" for layer in FALLBACK_STEM_LAYERS]
+
 
+def is_requested_prompts(value: Any) -> bool:
+    """Validate a response against the keys the system prompt asked for."""
+    return is_valid_prompts(value, stems=AUDIO_STEMS)
 
-        response = client.chat.completions.create(
+
+class PromptAgent:
+    cache: ResponseCache
+
+    def __init__(self, cache: ResponseCache | None = None) -> None:
+        self.cache = cache or default_cache()
+
+    def generate(self, concept: Concept, image_resolution: str = "1536x1024") -> Prompts:
+        user_prompt = build_user_prompt(concept, image_resolution)
+
+        return cached_json_completion(
+            get_openai_client(),
+            self.cache,
             model="gpt-4o-mini",
             temperature=0.6,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"}
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            agent="prompts",
+            validate=is_requested_prompts,
         )
 
-        return json.loads(response.choices[0].message.content)
-
     def save(self, prompts: Prompts) -> None:
         os.makedirs("data/prompts", exist_ok=True)
 
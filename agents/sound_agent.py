@@ -1,12 +1,17 @@
 import os
 import shutil
-import requests
+from agents.progress import report
 from audio_backends.base import AudioBackend
 from audio_backends.replicate import ReplicateAudioBackend
 from config import DRY_RUN
+from utils.download import download_file
+from utils.predictions import PredictionHandle, gather_predictions
 
 REQUEST_TIMEOUT: int = 120  # 2 minutes for audio downloads
 
+# Stem lengths share no common factor, so their loops drift apart in the mix
+STEM_DURATIONS: tuple[float, ...] = (127.0, 97.0, 151.0, 113.0)
+
 
 class SoundAgent:
     backend: AudioBackend
@@ -31,14 +36,43 @@ class SoundAgent:
             duration_seconds=duration_seconds,
         )
 
+        return self._save(audio_url, filename)
+
+    def run_stems(self, stem_prompts: list[str], filename_prefix: str) -> list[str]:
+        """
+        Generate several ambience layers concurrently and save them locally.
+
+        All predictions are submitted before any is awaited, so the layers
+        take about as long as a single generation.
+
+        Args:
+            stem_prompts: One prompt per layer.
+            filename_prefix: Files are saved as <prefix>_stem<N>.mp3 in assets/audio/.
+
+        Returns:
+            Paths to the saved stems, in prompt order.
+        """
+        handles: list[PredictionHandle] = [
+            self.backend.submit(
+                audio_prompt=prompt,
+                duration_seconds=STEM_DURATIONS[index % len(STEM_DURATIONS)],
+            )
+            for index, prompt in enumerate(stem_prompts)
+        ]
+        report("audio", f"Submitted {len(handles)} stems, waiting for all")
+        urls: list[str] = gather_predictions(handles)
+
+        return [
+            self._save(url, f"{filename_prefix}_stem{index}.mp3")
+            for index, url in enumerate(urls)
+        ]
+
+    def _save(self, audio_url: str, filename: str) -> str:
         output_path: str = os.path.join("assets", "audio", filename)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
         if not DRY_RUN:
-            response: requests.Response = requests.get(audio_url, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            with open(output_path, "wb") as f:
-                f.write(response.content)
+            download_file(audio_url, output_path, timeout=REQUEST_TIMEOUT)
         else:
             shutil.copy(audio_url, output_path)
 
@@ -1,11 +1,12 @@
 import os
 import shutil
-import requests
 from video_backends.base import VideoBackend
 from video_backends.replicate import ReplicateVideoBackend
 from config import DRY_RUN
+from utils.download import download_file
 
 REQUEST_TIMEOUT: int = 300  # 5 minutes for large video downloads
+DOWNLOAD_CONNECTIONS: int = 4  # Parallel ranged requests for large outputs
 
 
 class VideoAgent:
@@ -25,10 +26,7 @@ class VideoAgent:
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
         if not DRY_RUN:
-            response: requests.Response = requests.get(video_url, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            with open(output_path, "wb") as f:
-                f.write(response.content)
+            download_file(video_url, output_path, timeout=REQUEST_TIMEOUT, connections=DOWNLOAD_CONNECTIONS)
         else:
             shutil.copy(video_url, output_path)
 
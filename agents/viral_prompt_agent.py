@@ -1,13 +1,7 @@
-import json
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from clients import get_openai_client
+from agents.llm_cache import ResponseCache, cached_json_completion, default_cache
 from bot_types import Concept, Prompts
 
-load_dotenv()
-
-client: OpenAI = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 SYSTEM_PROMPT = """
 You generate high-quality prompts for AI image and video generation
 for viral YouTube Shorts content.
@@ -30,6 +24,11 @@ The goal is MAXIMUM engagement and shareability.
 
 
 class ViralPromptAgent:
+    cache: ResponseCache
+
+    def __init__(self, cache: ResponseCache | None = None) -> None:
+        self.cache = cache or default_cache()
+
     def generate(self, concept: Concept, image_resolution: str = "1024x1792") -> Prompts:
         user_prompt = f"""
 Create prompts for a viral YouTube Short (under 60 seconds).
@@ -55,14 +54,12 @@ VIDEO PROMPT REQUIREMENTS:
 - No camera movement (subject moves, camera stays still)
 """
 
-        response = client.chat.completions.create(
+        return cached_json_completion(
+            get_openai_client(),
+            self.cache,
             model="gpt-4o-mini",
             temperature=0.7,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"}
+            system_prompt=SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            agent="viral-prompts",
         )
-
-        return json.loads(response.choices[0].message.content)
@@ -1,5 +1,8 @@
+import asyncio
 from abc import ABC, abstractmethod
 
+from utils.predictions import CompletedPrediction, PredictionHandle
+
 
 class AudioBackend(ABC):
     @abstractmethod
@@ -15,3 +18,19 @@ class AudioBackend(ABC):
             URL or path to generated audio file.
         """
         pass
+
+    def submit(self, audio_prompt: str, duration_seconds: float) -> PredictionHandle:
+        """
+        Start generation and return a handle without waiting for the result.
+
+        Backends that cannot submit asynchronously run generate() here and
+        return an already completed handle.
+        """
+        return CompletedPrediction(self.generate(audio_prompt=audio_prompt, duration_seconds=duration_seconds))
+
+    async def generate_async(self, audio_prompt: str, duration_seconds: float) -> str:
+        """
+        Awaitable generate(): submits, then polls without blocking the loop.
+        """
+        handle: PredictionHandle = await asyncio.to_thread(self.submit, audio_prompt, duration_seconds)
+        return await handle.wait_async()
@@ -1,16 +1,13 @@
-from typing import cast
-
-import replicate
-from replicate.helpers import FileOutput
-
 from agents.progress import report
 from audio_backends.base import AudioBackend
+from utils.predictions import PredictionHandle, submit_replicate
 
+MODEL: str = "stability-ai/stable-audio-2.5"
 MAX_DURATION_SECONDS: float = 190.0
 
 
 class ReplicateAudioBackend(AudioBackend):
-    def generate(self, audio_prompt: str, duration_seconds: float) -> str:
+    def submit(self, audio_prompt: str, duration_seconds: float) -> PredictionHandle:
         if duration_seconds > MAX_DURATION_SECONDS:
             duration_seconds = MAX_DURATION_SECONDS
             report(
@@ -20,15 +17,19 @@ class ReplicateAudioBackend(AudioBackend):
 
         report("audio-backend", "Replicate: audio generation started")
 
-        output = cast(FileOutput, replicate.run(
-            "stability-ai/stable-audio-2.5",
+        handle = submit_replicate(
+            MODEL,
             input={
                 "prompt": audio_prompt,
                 "seconds_total": duration_seconds,
             }
-        ))
+        )
 
-        audio_url: str = output.url
+        report("audio-backend", f"Replicate: prediction {handle.id} submitted")
+        return handle
+
+    def generate(self, audio_prompt: str, duration_seconds: float) -> str:
+        audio_url: str = self.submit(audio_prompt, duration_seconds).wait()
         report("audio-backend", f"Audio generated: {audio_url}")
 
         return audio_url
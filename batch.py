@@ -0,0 +1,126 @@
+"""Produce several videos in one process, overlapping generation, rendering and upload.
+
+Usage:
+    python batch.py                      # every concept in concepts.CONCEPTS
+    python batch.py --count 3            # 3 random concepts
+    python batch.py --file concepts.json # JSON list of concept objects
+"""
+
+import argparse
+import json
+import random
+import sys
+from typing import TYPE_CHECKING, Any
+
+from bot_types import Concept
+from concepts import CONCEPTS
+from pipeline import GENERATE_STAGES, RENDER_STAGES, UPLOAD_STAGES, build_context
+from utils.batch import BatchResult, run_pipelined
+from utils.dag import run_stages
+
+if TYPE_CHECKING:
+    from googleapiclient.discovery import Resource
+
+
+def load_concepts(path: str) -> list[Concept]:
+    """Load concepts from a JSON file containing a list of concept objects.
+
+    Args:
+        path: Path to the JSON file.
+
+    Returns:
+        The parsed concepts.
+
+    Raises:
+        ValueError: If the file is not a list of objects with the concept keys.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    if not isinstance(data, list):
+        raise ValueError(f"{path} must contain a JSON list of concepts")
+
+    for entry in data:
+        if not isinstance(entry, dict) or not {"ambience", "mood", "duration"} <= entry.keys():
+            raise ValueError(f"Invalid concept in {path}: {entry}")
+
+    return data
+
+
+class BatchRunner:
+    """Pipelines jobs: generate (APIs) -> render (ffmpeg) -> upload (network).
+
+    The YouTube client is built once, on first upload, and reused for
+    every later job so OAuth and discovery run only once per batch.
+    """
+    max_workers: int
+    _youtube: "Resource | None"
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self._youtube = None
+
+    def generate(self, concept: Concept) -> dict[str, Any]:
+        context: dict[str, Any] = build_context(concept)
+        run_stages(GENERATE_STAGES, context, max_workers=self.max_workers)
+        return context
+
+    def render(self, context: dict[str, Any]) -> dict[str, Any]:
+        run_stages(RENDER_STAGES, context, max_workers=self.max_workers)
+        return context
+
+    def upload(self, context: dict[str, Any]) -> dict[str, Any]:
+        if self._youtube is None:
+            from utils.upload import get_youtube_client
+            self._youtube = get_youtube_client()
+        context["youtube"] = self._youtube
+        run_stages(UPLOAD_STAGES, context, max_workers=1)
+        return context
+
+    def run(self, concepts: list[Concept], queue_size: int = 1) -> list[BatchResult]:
+        """Run every concept through the three pipelined steps.
+
+        Args:
+            concepts: Concepts to produce, one video each.
+            queue_size: Maximum finished jobs waiting for the next step.
+                Bounds how many rendered multi-GB files can pile up.
+
+        Returns:
+            One result per concept, in input order.
+        """
+        return run_pipelined(
+            concepts,
+            [("generate", self.generate), ("render", self.render), ("upload", self.upload)],
+            queue_size=queue_size,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Produce several ambience videos in one run.")
+    parser.add_argument("--file", help="JSON file with a list of concepts (default: concepts.CONCEPTS)")
+    parser.add_argument("--count", type=int, help="Pick this many random concepts")
+    parser.add_argument("--queue-size", type=int, default=1, help="Jobs allowed to wait between steps")
+    args = parser.parse_args()
+
+    concepts: list[Concept] = load_concepts(args.file) if args.file else list(CONCEPTS)
+    if args.count is not None:
+        concepts = random.sample(concepts, min(args.count, len(concepts)))
+
+    print(f"Batch of {len(concepts)} concepts")
+    results: list[BatchResult] = BatchRunner().run(concepts, queue_size=args.queue_size)
+
+    failures: int = 0
+    for result in results:
+        ambience: str = concepts[result["index"]]["ambience"]
+        if result["error"] is not None:
+            failures += 1
+            print(f"FAILED {ambience} during {result['failed_step']}: {result['error']}")
+        else:
+            print(f"UPLOADED {ambience}: https://youtube.com/watch?v={result['value']['video_id']}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
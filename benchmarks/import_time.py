@@ -0,0 +1,44 @@
+"""Measure cold-start import time of the bot's entry modules.
+
+Each module is imported in a fresh interpreter, so nothing is shared
+between runs except the OS file cache.
+
+Usage:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 20 pipeline openai
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_MODULES: list[str] = ["pipeline", "batch", "openai", "replicate", "googleapiclient.discovery"]
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def time_import(module: str) -> float:
+    """Return wall-clock seconds for a fresh interpreter to import module."""
+    start: float = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=REPO_ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Median cold import time per module.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=10, help="Imports per module (default 10)")
+    args = parser.parse_args()
+
+    baseline: float = statistics.median(time_import("sys") for _ in range(args.runs))
+    print(f"interpreter startup: {baseline * 1000:.0f}ms (subtracted below)")
+
+    for module in args.modules:
+        median: float = statistics.median(time_import(module) for _ in range(args.runs))
+        print(f"{module:<28} {(median - baseline) * 1000:7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
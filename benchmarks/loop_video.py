@@ -0,0 +1,66 @@
+"""Compare video looping strategies across target durations.
+
+A synthetic base clip is encoded once, then looped to each target with
+every strategy. Outputs are deleted after each run, so only one long
+file exists at a time.
+
+Usage:
+    python benchmarks/loop_video.py
+    python benchmarks/loop_video.py --hours 1 2 --strategies stream_loop doubling --b-frames
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.loop import STRATEGIES, loop_video  # noqa: E402
+
+DEFAULT_HOURS: list[int] = [1, 2, 10, 12]
+
+
+def make_clip(path: str, seconds: float, b_frames: bool) -> None:
+    """Encode a synthetic 24fps H.264 test clip."""
+    subprocess.run([
+        "ffmpeg", "-y", "-v", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size=832x480:rate=24:duration={seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-g", "48",
+        "-bf", "3" if b_frames else "0",
+        "-pix_fmt", "yuv420p",
+        path
+    ], check=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Throughput of each loop strategy per target duration.")
+    parser.add_argument("--hours", nargs="*", type=int, default=DEFAULT_HOURS)
+    parser.add_argument("--strategies", nargs="*", default=list(STRATEGIES), choices=STRATEGIES)
+    parser.add_argument("--clip-seconds", type=float, default=5.0, help="Base clip length (default 5)")
+    parser.add_argument("--b-frames", action="store_true", help="Encode the base clip with B-frames")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        clip: str = os.path.join(workdir, "base.mp4")
+        make_clip(clip, args.clip_seconds, args.b_frames)
+        output: str = os.path.join(workdir, "looped.mp4")
+
+        print(f"{'target':>7} {'strategy':<12} {'seconds':>8} {'x realtime':>11} {'MB/s':>8}")
+        for hours in args.hours:
+            for strategy in args.strategies:
+                started: float = time.perf_counter()
+                loop_video(clip, output, hours, strategy=strategy)
+                elapsed: float = time.perf_counter() - started
+                size: int = os.path.getsize(output)
+                os.remove(output)
+                print(
+                    f"{hours:>6}h {strategy:<12} {elapsed:8.1f} "
+                    f"{hours * 3600 / elapsed:10.0f}x {size / 1e6 / elapsed:8.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
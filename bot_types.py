@@ -1,4 +1,4 @@
-from typing import TypedDict
+from typing import Any, NotRequired, TypedDict, get_args, get_origin, get_type_hints
 
 
 class Concept(TypedDict):
@@ -17,3 +17,48 @@ class Prompts(TypedDict):
     image_prompt: str
     video_prompt: str
     audio_prompt: str
+    # Separate layers of the soundscape, for the stem mixer
+    audio_stems: NotRequired[list[str]]
+
+
+def matches_typeddict(value: Any, schema: type) -> bool:
+    """Check that a parsed JSON value has every field of a TypedDict.
+
+    Supports the field types used in this module: str and list[str].
+    NotRequired fields may be missing but are type-checked when present.
+
+    Args:
+        value: Parsed JSON value to check.
+        schema: TypedDict class describing the expected shape.
+
+    Returns:
+        True if every required key is present with the declared type.
+    """
+    if not isinstance(value, dict):
+        return False
+
+    for key, expected in get_type_hints(schema).items():
+        if key not in value:
+            if key in schema.__required_keys__:
+                return False
+            continue
+        field = value[key]
+        if get_origin(expected) is list:
+            (item_type,) = get_args(expected)
+            if not isinstance(field, list) or not all(isinstance(item, item_type) for item in field):
+                return False
+        elif not isinstance(field, expected) or (expected is str and not field.strip()):
+            return False
+
+    return True
+
+
+def is_valid_metadata(value: Any) -> bool:
+    return matches_typeddict(value, Metadata)
+
+
+def is_valid_prompts(value: Any, stems: bool = False) -> bool:
+    """Check a prompts response; audio_stems is required only when ``stems`` is set."""
+    if stems and not (isinstance(value, dict) and value.get("audio_stems")):
+        return False
+    return matches_typeddict(value, Prompts)
@@ -0,0 +1,78 @@
+"""Lazily built, shared API clients.
+
+Nothing heavy is imported until a stage first asks for a client, so dry
+runs and stages that never touch an API skip the openai/replicate import
+cost. All clients share one keep-alive connection pool.
+"""
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import httpx
+    import replicate
+    from openai import OpenAI
+
+MAX_CONNECTIONS: int = 20
+MAX_KEEPALIVE_CONNECTIONS: int = 10
+KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+
+_lock = threading.RLock()
+_env_loaded: bool = False
+_transport: "httpx.HTTPTransport | None" = None
+_openai_client: "OpenAI | None" = None
+_replicate_client: "replicate.Client | None" = None
+
+
+def _load_env() -> None:
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+
+def get_transport() -> "httpx.HTTPTransport":
+    """Return the process-wide keep-alive connection pool."""
+    global _transport
+    with _lock:
+        if _transport is None:
+            import httpx
+            _transport = httpx.HTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                retries=1,
+            )
+        return _transport
+
+
+def get_openai_client() -> "OpenAI":
+    """Return the shared OpenAI client, building it on first use."""
+    global _openai_client
+    with _lock:
+        if _openai_client is None:
+            _load_env()
+            from openai import DefaultHttpxClient, OpenAI
+            _openai_client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=DefaultHttpxClient(transport=get_transport()),
+            )
+        return _openai_client
+
+
+def get_replicate_client() -> "replicate.Client":
+    """Return the shared Replicate client, building it on first use."""
+    global _replicate_client
+    with _lock:
+        if _replicate_client is None:
+            _load_env()
+            import replicate
+            _replicate_client = replicate.Client(
+                api_token=os.getenv("REPLICATE_API_TOKEN"),
+                transport=get_transport(),
+            )
+        return _replicate_client
@@ -1 +1,58 @@
-DRY_RUN: bool = False
\ No newline at end of file
+DRY_RUN: bool = False
+
+# One chat completion for metadata + prompts instead of two (falls back if invalid)
+COMBINED_LLM: bool = True
+
+# Loop audio with the NumPy PCM engine (utils/pcm.py) instead of an ffmpeg filter graph
+PCM_AUDIO: bool = True
+
+# Search each clip for the best loop-in/loop-out points and crossfade (utils/loop_points.py)
+LOOP_POINTS: bool = True
+
+# Fix the base clip's loop seam locally (utils/seam.py): "off", "trim" to the best
+# window, "crossfade" its seam, or "pingpong" (forwards then backwards); a window is
+# only cut for a clear gain on most of the clip (seam.MIN_SEAM_GAIN, MIN_KEEP_FRACTION)
+VIDEO_SEAM_MODE: str = "trim"
+
+# Re-encode the short base clip once into a closed-GOP, B-frame-free, constant-rate
+# form so every later loop and render can stream-copy it (utils/normalize.py)
+NORMALIZE_CLIP: bool = True
+
+# Upscale the loop clip to 4K before looping (utils/upscale.py)
+UPSCALE_4K: bool = False
+
+# Best upscaler tier to use: "best" (RealESRGAN, needs a Vulkan GPU), "balanced"
+# (ffmpeg zscale/lanczos on every core) or "fast" (NumPy); falls back to cheaper tiers
+UPSCALE_QUALITY: str = "best"
+
+# Pipe raw frames through the upscaler a window at a time instead of extracting them
+# to JPG directories; the window bounds memory (~25MB per 4K frame)
+STREAM_UPSCALE: bool = True
+UPSCALE_WINDOW_FRAMES: int = 16
+
+# Reassemble extracted frames in parallel GOP-aligned segments with this encoder profile
+# (utils/encode.py: "fast", "balanced" or "quality"); opt-in, and only used on the
+# frame-directory path (RealESRGAN with STREAM_UPSCALE off), None for one encode
+UPSCALE_ENCODER_PROFILE: str | None = None
+
+# Upscale one frame per run of near-identical frames and reuse it for the rest
+# (upscale_backends/dedup.py); static 6fps clips repeat many frames
+UPSCALE_DEDUP: bool = True
+
+# Upscale the static background once and only the tiles that move in each frame
+# (upscale_backends/static_mask.py); the camera never moves in these clips
+UPSCALE_STATIC_MASK: bool = True
+
+# Check video timestamps across the first loop seams after looping (utils/loop.py)
+VALIDATE_LOOP_SEAMS: bool = False
+
+# Layer several generated stems (rain, fire, wind...) instead of looping one clip
+AUDIO_STEMS: bool = False
+
+# Render the final MP4 in one ffmpeg pass from the base clip and audio (utils/render.py)
+# instead of writing a looped video and looped audio and muxing them afterwards
+SINGLE_PASS_RENDER: bool = True
+
+# Build one muxed audio/video loop unit, frame- and sample-aligned, and assemble the
+# final MP4 by stream-copying it (utils/av_unit.py); single-audio mode only
+AV_LOOP_UNIT: bool = False
@@ -0,0 +1,425 @@
+"""Stage graph for producing one long ambience video."""
+
+import re
+from typing import TYPE_CHECKING, Any
+
+from agents.combined_agent import CombinedAgent
+from agents.llm_cache import ResponseCache, default_cache
+from agents.metadata_agent import MetadataAgent
+from agents.prompt_agent import PromptAgent, derive_stem_prompts
+from agents.image_agent import ImageAgent
+from agents.video_agent import VideoAgent
+from agents.sound_agent import SoundAgent
+from bot_types import Concept, Metadata, Prompts
+from config import (
+    AUDIO_STEMS,
+    AV_LOOP_UNIT,
+    COMBINED_LLM,
+    DRY_RUN,
+    LOOP_POINTS,
+    NORMALIZE_CLIP,
+    PCM_AUDIO,
+    SINGLE_PASS_RENDER,
+    STREAM_UPSCALE,
+    UPSCALE_4K,
+    UPSCALE_DEDUP,
+    UPSCALE_ENCODER_PROFILE,
+    UPSCALE_QUALITY,
+    UPSCALE_STATIC_MASK,
+    UPSCALE_WINDOW_FRAMES,
+    VALIDATE_LOOP_SEAMS,
+    VIDEO_SEAM_MODE,
+)
+from video_backends.mock import MockVideoBackend
+from video_backends.base import VideoBackend
+from audio_backends.mock import MockAudioBackend
+from audio_backends.base import AudioBackend
+from utils.checkpoint import CheckpointStore
+from utils.dag import Stage, StageTiming, run_stages, format_timeline
+from utils.loop import loop_video
+from utils.audio import loop_audio, merge_audio_video
+from utils.av_unit import build_av_loop_unit, concat_units
+from utils.loop_points import LoopPoints, analyze_loop_points
+from utils.mixer import Stem, mix_stems
+from utils.normalize import normalize_clip
+from utils.pcm import loop_audio_pcm
+from utils.seam import analyze_seam, build_video_loop_unit, whole_clip, worth_trimming
+from utils.render import render_final_video, render_layered_final_video
+from utils.upscale import upscale_clip
+
+if TYPE_CHECKING:
+    from googleapiclient.discovery import Resource
+
+
+def parse_duration_hours(duration_str: str) -> int:
+    """Parse duration string like '10 hours' into integer hours."""
+    match = re.search(r"(\d+)\s*hour", duration_str.lower())
+    if match:
+        return int(match.group(1))
+    raise ValueError(f"Could not parse duration: {duration_str}")
+
+
+def slugify(text: str) -> str:
+    """Convert text to filename-safe slug."""
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_")
+
+
+def generate_metadata(concept: Concept, llm_cache: ResponseCache) -> Metadata:
+    return MetadataAgent(cache=llm_cache).generate(concept)
+
+
+def generate_prompts(concept: Concept, llm_cache: ResponseCache) -> Prompts:
+    return PromptAgent(cache=llm_cache).generate(concept)
+
+
+def generate_metadata_and_prompts(concept: Concept, llm_cache: ResponseCache) -> tuple[Metadata, Prompts]:
+    return CombinedAgent(cache=llm_cache).generate(concept)
+
+
+def generate_image(prompts: Prompts, slug: str) -> str:
+    if DRY_RUN:
+        return "assets/mock/mock_image.jpg"
+    return ImageAgent().run(
+        image_prompt=prompts["image_prompt"],
+        filename=f"{slug}_master.png"
+    )
+
+
+def generate_base_video(
+    image_path: str,
+    prompts: Prompts,
+    slug: str,
+    video_backend: VideoBackend | None,
+) -> str:
+    return VideoAgent(backend=video_backend).run(
+        image_path=image_path,
+        video_prompt=prompts["video_prompt"],
+        filename=f"{slug}_base.mp4"
+    )
+
+
+def generate_base_audio(prompts: Prompts, slug: str, audio_backend: AudioBackend | None) -> str:
+    return SoundAgent(backend=audio_backend).run(
+        audio_prompt=prompts["audio_prompt"],
+        filename=f"{slug}_audio.mp3",
+        duration_seconds=120.0
+    )
+
+
+def generate_audio_stems(prompts: Prompts, slug: str, audio_backend: AudioBackend | None) -> list[str]:
+    # Older cached prompts have no stems; split the single prompt into distinct layers
+    stem_prompts: list[str] = prompts.get("audio_stems") or derive_stem_prompts(prompts["audio_prompt"])
+    return SoundAgent(backend=audio_backend).run_stems(stem_prompts, filename_prefix=slug)
+
+
+def fix_base_video_seam(base_video: str, slug: str) -> str:
+    if VIDEO_SEAM_MODE == "off":
+        return base_video
+    try:
+        trim = analyze_seam(base_video)
+    except ValueError as e:
+        print(f"[SEAM] {e}")
+        return base_video
+    if not worth_trimming(trim):
+        print(
+            f"[SEAM] Keeping the whole clip: trimming would move the seam from {trim['raw_score']:.2f} "
+            f"to {trim['score']:.2f} steps and keep {trim['end_frame'] - trim['start_frame']}/{trim['frame_count']} frames"
+        )
+        trim = whole_clip(trim)
+    else:
+        print(f"[SEAM] Trimming: seam {trim['raw_score']:.2f} -> {trim['score']:.2f} steps")
+    if VIDEO_SEAM_MODE == "trim" and trim["start_frame"] == 0 and trim["end_frame"] == trim["frame_count"]:
+        return base_video  # The whole clip already loops best
+    return build_video_loop_unit(
+        input_path=base_video,
+        output_path=f"assets/videos/{slug}_seamless.mp4",
+        trim=trim,
+        mode=VIDEO_SEAM_MODE
+    )
+
+
+def normalize_base_video(seamless_clip: str) -> str:
+    # Later stages stream-copy this clip, so fix its GOP and timestamps once
+    return normalize_clip(seamless_clip) if NORMALIZE_CLIP else seamless_clip
+
+
+def upscale_base_video(normalized_clip: str) -> str:
+    # Only the few-second clip is upscaled, so 4K costs the same at any duration
+    if not UPSCALE_4K:
+        return normalized_clip
+    return upscale_clip(
+        normalized_clip,
+        tier=UPSCALE_QUALITY,
+        streaming=STREAM_UPSCALE,
+        window=UPSCALE_WINDOW_FRAMES,
+        dedup=UPSCALE_DEDUP,
+        static_mask=UPSCALE_STATIC_MASK,
+        encoder_profile=UPSCALE_ENCODER_PROFILE,
+    )
+
+
+def make_looped_video(loop_clip: str, slug: str, duration_hours: int) -> str:
+    return loop_video(
+        input_path=loop_clip,
+        output_path=f"assets/videos/{slug}_video_looped.mp4",
+        duration_hours=duration_hours,
+        validate_seams=VALIDATE_LOOP_SEAMS
+    )
+
+
+def find_audio_loop_points(base_audio: str) -> LoopPoints | None:
+    if not LOOP_POINTS:
+        return None
+    try:
+        return analyze_loop_points(base_audio)
+    except ValueError as e:
+        # Too short to search; the looper falls back to the whole clip
+        print(f"[LOOP POINTS] {e}")
+        return None
+
+
+def make_looped_audio(base_audio: str, loop_points: LoopPoints | None, slug: str, target_seconds: int) -> str:
+    # Full 120s audio is looped, not the 5s video length
+    looper = loop_audio_pcm if PCM_AUDIO else loop_audio
+    return looper(
+        input_path=base_audio,
+        output_path=f"assets/audio/{slug}_audio_looped.mp3",
+        target_duration_seconds=target_seconds,
+        loop_points=loop_points
+    )
+
+
+def make_layered_audio(audio_stems: list[str], slug: str, target_seconds: int) -> str:
+    return mix_stems(
+        [Stem(path) for path in audio_stems],
+        output_path=f"assets/audio/{slug}_audio_looped.mp3",
+        target_duration_seconds=target_seconds
+    )
+
+
+def make_final_video(looped_video: str, looped_audio: str, slug: str, duration_hours: int) -> str:
+    return merge_audio_video(
+        video_path=looped_video,
+        audio_path=looped_audio,
+        output_path=f"assets/videos/{slug}_{duration_hours}h.mp4"
+    )
+
+
+def render_single_pass(
+    loop_clip: str,
+    base_audio: str,
+    loop_points: LoopPoints | None,
+    slug: str,
+    duration_hours: int,
+) -> str:
+    return render_final_video(
+        base_video=loop_clip,
+        base_audio=base_audio,
+        output_path=f"assets/videos/{slug}_{duration_hours}h.mp4",
+        duration_hours=duration_hours,
+        loop_points=loop_points,
+        pcm=PCM_AUDIO
+    )
+
+
+def render_layered_single_pass(loop_clip: str, audio_stems: list[str], slug: str, duration_hours: int) -> str:
+    return render_layered_final_video(
+        base_video=loop_clip,
+        stems=[Stem(path) for path in audio_stems],
+        output_path=f"assets/videos/{slug}_{duration_hours}h.mp4",
+        duration_hours=duration_hours
+    )
+
+
+def make_av_unit(loop_clip: str, base_audio: str, loop_points: LoopPoints | None, slug: str) -> str:
+    return build_av_loop_unit(
+        base_video=loop_clip,
+        base_audio=base_audio,
+        output_path=f"assets/videos/{slug}_av_unit.mp4",
+        loop_points=loop_points
+    )
+
+
+def assemble_from_unit(av_unit: str, slug: str, duration_hours: int) -> str:
+    return concat_units(
+        unit_path=av_unit,
+        output_path=f"assets/videos/{slug}_{duration_hours}h.mp4",
+        target_seconds=duration_hours * 3600
+    )
+
+
+def upload_final_video(final_video: str, metadata: Metadata, youtube: "Resource | None") -> str:
+    # Deferred: the Google API client is slow to import and only this stage needs it
+    from utils.upload import upload_video
+
+    return upload_video(
+        video_path=final_video,
+        title=metadata["title"],
+        description=metadata["description"],
+        tags=metadata["tags"],
+        privacy_status="public",
+        youtube=youtube
+    )
+
+
+# Metadata, prompts and audio do not depend on the image -> video chain,
+# so the executor overlaps them with it. Critical path:
+# prompts -> image -> base video -> looped video -> final video -> upload
+#
+# The stages are grouped by the resource they mostly wait on (remote APIs,
+# local ffmpeg, upload bandwidth) so batch mode can pipeline jobs across
+# the groups.
+LLM_STAGES: list[Stage] = [
+    Stage("metadata", generate_metadata, ("concept", "llm_cache"), ("metadata",)),
+    Stage("prompts", generate_prompts, ("concept", "llm_cache"), ("prompts",)),
+]
+
+COMBINED_LLM_STAGES: list[Stage] = [
+    Stage("llm", generate_metadata_and_prompts, ("concept", "llm_cache"), ("metadata", "prompts")),
+]
+
+LOOP_POINTS_STAGE: Stage = Stage("loop_points", find_audio_loop_points, ("base_audio",), ("loop_points",))
+
+# Each audio mode is one generate stage, the stages that loop its audio to
+# a file for make_final_video, and the stages of its single-pass render
+SINGLE_AUDIO_STAGES: tuple[Stage, list[Stage], list[Stage]] = (
+    Stage("base_audio", generate_base_audio, ("prompts", "slug", "audio_backend"), ("base_audio",)),
+    [
+        LOOP_POINTS_STAGE,
+        Stage(
+            "looped_audio", make_looped_audio,
+            ("base_audio", "loop_points", "slug", "target_seconds"), ("looped_audio",)
+        ),
+    ],
+    [
+        LOOP_POINTS_STAGE,
+        Stage(
+            "final_video", render_single_pass,
+            ("loop_clip", "base_audio", "loop_points", "slug", "duration_hours"), ("final_video",)
+        ),
+    ],
+)
+
+STEM_AUDIO_STAGES: tuple[Stage, list[Stage], list[Stage]] = (
+    Stage("audio_stems", generate_audio_stems, ("prompts", "slug", "audio_backend"), ("audio_stems",)),
+    [Stage("looped_audio", make_layered_audio, ("audio_stems", "slug", "target_seconds"), ("looped_audio",))],
+    [
+        Stage(
+            "final_video", render_layered_single_pass,
+            ("loop_clip", "audio_stems", "slug", "duration_hours"), ("final_video",)
+        ),
+    ],
+)
+
+AUDIO_GENERATE_STAGE, AUDIO_RENDER_STAGES, SINGLE_PASS_STAGES = (
+    STEM_AUDIO_STAGES if AUDIO_STEMS else SINGLE_AUDIO_STAGES
+)
+
+GENERATE_STAGES: list[Stage] = (COMBINED_LLM_STAGES if COMBINED_LLM else LLM_STAGES) + [
+    Stage("image", generate_image, ("prompts", "slug"), ("image_path",)),
+    Stage(
+        "base_video", generate_base_video,
+        ("image_path", "prompts", "slug", "video_backend"), ("base_video",)
+    ),
+    AUDIO_GENERATE_STAGE,
+]
+
+# Audio is encoded once for a short muxed unit; the output is stream copies of it
+AV_UNIT_STAGES: list[Stage] = [
+    LOOP_POINTS_STAGE,
+    Stage("av_unit", make_av_unit, ("loop_clip", "base_audio", "loop_points", "slug"), ("av_unit",)),
+    Stage("final_video", assemble_from_unit, ("av_unit", "slug", "duration_hours"), ("final_video",)),
+]
+
+# The clip every render stage loops: best seam first, then the canonical encoding,
+# then the upscale
+CLIP_STAGES: list[Stage] = [
+    Stage("seamless_clip", fix_base_video_seam, ("base_video", "slug"), ("seamless_clip",)),
+    Stage("normalized_clip", normalize_base_video, ("seamless_clip",), ("normalized_clip",)),
+    Stage("loop_clip", upscale_base_video, ("normalized_clip",), ("loop_clip",)),
+]
+
+RENDER_STAGES: list[Stage]
+if AV_LOOP_UNIT and not AUDIO_STEMS:
+    # A layered mix never repeats, so it cannot be cut into one unit
+    RENDER_STAGES = [*CLIP_STAGES, *AV_UNIT_STAGES]
+elif SINGLE_PASS_RENDER:
+    # The single pass never writes the multi-GB looped video and looped audio
+    RENDER_STAGES = [*CLIP_STAGES, *SINGLE_PASS_STAGES]
+else:
+    RENDER_STAGES = [
+        *CLIP_STAGES,
+        Stage("looped_video", make_looped_video, ("loop_clip", "slug", "duration_hours"), ("looped_video",)),
+        *AUDIO_RENDER_STAGES,
+        Stage(
+            "final_video", make_final_video,
+            ("looped_video", "looped_audio", "slug", "duration_hours"), ("final_video",)
+        ),
+    ]
+
+UPLOAD_STAGES: list[Stage] = [
+    Stage("upload", upload_final_video, ("final_video", "metadata", "youtube"), ("video_id",)),
+]
+
+STAGES: list[Stage] = GENERATE_STAGES + RENDER_STAGES + UPLOAD_STAGES
+
+
+def build_context(
+    concept: Concept,
+    youtube: "Resource | None" = None,
+    llm_cache: ResponseCache | None = None,
+) -> dict[str, Any]:
+    """Build the initial stage context for a concept.
+
+    Args:
+        concept: The ambience concept to produce.
+        youtube: Authenticated YouTube client to reuse, or None to create
+            one at upload time.
+        llm_cache: Response cache for the LLM agents (default: the on-disk
+            cache for dry runs; none for real runs, so every upload gets
+            fresh metadata).
+
+    Returns:
+        Context dict holding every value stages need that no stage produces.
+    """
+    duration_hours: int = parse_duration_hours(concept["duration"])
+    return {
+        "concept": concept,
+        "slug": slugify(concept["ambience"]),
+        "duration_hours": duration_hours,
+        "target_seconds": duration_hours * 3600,
+        "video_backend": MockVideoBackend() if DRY_RUN else None,
+        "audio_backend": MockAudioBackend() if DRY_RUN else None,
+        "youtube": youtube,
+        "llm_cache": llm_cache or default_cache(),
+    }
+
+
+def run_pipeline(
+    concept: Concept,
+    max_workers: int = 4,
+    checkpoints: CheckpointStore | None = None,
+    llm_cache: ResponseCache | None = None,
+) -> dict[str, Any]:
+    """Produce and upload one video, running independent stages concurrently.
+
+    Args:
+        concept: The ambience concept to produce.
+        max_workers: Maximum number of stages running at once.
+        checkpoints: Run store used to skip stages already completed by an
+            earlier attempt with the same inputs.
+        llm_cache: Response cache for the LLM agents (default: see
+            ``build_context``).
+
+    Returns:
+        The final stage context, including "final_video" and "video_id".
+    """
+    context: dict[str, Any] = build_context(concept, llm_cache=llm_cache)
+    timings: list[StageTiming] = run_stages(
+        STAGES, context, max_workers=max_workers, checkpoints=checkpoints
+    )
+
+    print("Stage timeline:")
+    print(format_timeline(timings))
+
+    return context
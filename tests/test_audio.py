@@ -0,0 +1,128 @@
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from utils.audio import build_loop_unit, get_audio_duration, loop_audio
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None,
+    reason="ffmpeg not installed"
+)
+
+
+class TestLoopAudio:
+    """Tests for loop_audio function."""
+
+    def test_trims_when_target_is_shorter(self, tmp_path: Path) -> None:
+        """Test that a short target is a single stream-copy trim."""
+        output = tmp_path / "out" / "audio.mp3"
+
+        with patch("utils.audio.get_audio_duration", return_value=120.0), \
+             patch("subprocess.run") as mock_run:
+            loop_audio("/test/audio.mp3", str(output), 60.0)
+
+        mock_run.assert_called_once()
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-t") + 1] == "60.0"
+        assert args[args.index("-c") + 1] == "copy"
+
+    def test_builds_unit_then_stream_loops(self, tmp_path: Path) -> None:
+        """Test that the unit is rendered once and then repeated with -stream_loop."""
+        output = tmp_path / "out" / "audio.mp3"
+
+        with patch("utils.audio.get_audio_duration", return_value=120.0), \
+             patch("subprocess.run") as mock_run:
+            loop_audio("/test/audio.mp3", str(output), 3600.0)
+
+        assert mock_run.call_count == 2
+        unit_args = mock_run.call_args_list[0][0][0]
+        loop_args = mock_run.call_args_list[1][0][0]
+
+        unit_path = unit_args[-1]
+        assert unit_path.endswith(".wav")
+        assert loop_args[loop_args.index("-stream_loop") + 1] == "-1"
+        assert loop_args[loop_args.index("-i") + 1] == unit_path
+        assert loop_args[loop_args.index("-t") + 1] == "3600.0"
+        assert loop_args[-1] == str(output)
+
+    def test_graph_size_independent_of_duration(self, tmp_path: Path) -> None:
+        """Test that 1 hour and 12 hour targets run the same commands apart from -t."""
+        commands: dict[float, list[list[str]]] = {}
+        for target in (3600.0, 12 * 3600.0):
+            with patch("utils.audio.get_audio_duration", return_value=120.0), \
+                 patch("subprocess.run") as mock_run:
+                loop_audio("/test/audio.mp3", str(tmp_path / "audio.mp3"), target)
+            commands[target] = [c[0][0] for c in mock_run.call_args_list]
+
+        short, long = commands[3600.0], commands[12 * 3600.0]
+        assert short[0][:-1] == long[0][:-1]
+        assert short[1].count("-i") == long[1].count("-i") == 1
+
+    def test_clamps_crossfade_to_half_the_clip(self, tmp_path: Path) -> None:
+        """Test that the crossfade never exceeds half of a short clip."""
+        with patch("utils.audio.get_audio_duration", return_value=4.0), \
+             patch("subprocess.run") as mock_run:
+            loop_audio("/test/audio.mp3", str(tmp_path / "audio.mp3"), 60.0, crossfade_seconds=3.0)
+
+        unit_args = mock_run.call_args_list[0][0][0]
+        assert "acrossfade=d=2.0" in unit_args[unit_args.index("-filter_complex") + 1]
+
+    def test_uses_loop_points(self, tmp_path: Path) -> None:
+        """Test that loop points set the looped region and crossfade length."""
+        points = {"loop_start": 4.5, "loop_end": 101.25, "crossfade": 2.0, "score": 0.1}
+
+        with patch("utils.audio.get_audio_duration", return_value=120.0), \
+             patch("subprocess.run") as mock_run:
+            loop_audio("/test/audio.mp3", str(tmp_path / "audio.mp3"), 3600.0,
+                       loop_points=points)  # type: ignore[arg-type]
+
+        unit_args = mock_run.call_args_list[0][0][0]
+        graph = unit_args[unit_args.index("-filter_complex") + 1]
+        assert graph.startswith("[0:a]atrim=start=4.5:end=101.25,")
+        assert "acrossfade=d=2.0" in graph
+
+    def test_removes_unit_on_error(self, tmp_path: Path) -> None:
+        """Test that the temporary loop unit is deleted when ffmpeg fails."""
+        with patch("utils.audio.get_audio_duration", return_value=120.0), \
+             patch("subprocess.run", side_effect=subprocess.CalledProcessError(1, "ffmpeg")), \
+             patch("os.remove") as mock_remove:
+            with pytest.raises(subprocess.CalledProcessError):
+                loop_audio("/test/audio.mp3", str(tmp_path / "audio.mp3"), 3600.0)
+
+        mock_remove.assert_called_once()
+        assert mock_remove.call_args[0][0].endswith(".wav")
+
+
+@requires_ffmpeg
+class TestLoopAudioIntegration:
+    """Integration tests for loop_audio with real audio files."""
+
+    def test_loop_unit_length(self, tmp_path: Path) -> None:
+        """Test that the loop unit is the clip minus one crossfade."""
+        source = tmp_path / "tone.wav"
+        subprocess.run([
+            "ffmpeg", "-y", "-f", "lavfi",
+            "-i", "sine=frequency=440:duration=4",
+            str(source)
+        ], check=True, capture_output=True)
+
+        unit = build_loop_unit(str(source), str(tmp_path / "unit.wav"), 1.0)
+
+        assert abs(get_audio_duration(unit) - 3.0) < 0.05
+
+    def test_reaches_target_duration(self, tmp_path: Path) -> None:
+        """Test that the looped output has the requested duration."""
+        source = tmp_path / "tone.wav"
+        subprocess.run([
+            "ffmpeg", "-y", "-f", "lavfi",
+            "-i", "sine=frequency=440:duration=4",
+            str(source)
+        ], check=True, capture_output=True)
+        output = tmp_path / "out" / "looped.mp3"
+
+        loop_audio(str(source), str(output), 30.0, crossfade_seconds=1.0)
+
+        assert abs(get_audio_duration(str(output)) - 30.0) < 0.2
@@ -0,0 +1,222 @@
+from fractions import Fraction
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from utils.av_unit import (
+    alignment,
+    build_av_loop_unit,
+    concat_units,
+    encode_gapless_aac,
+    loop_lengths,
+    split_adts,
+)
+from utils.probe import MediaInfo
+
+
+def adts_frame(index: int, payload: int = 5) -> bytes:
+    """Minimal ADTS frame whose payload bytes all equal index."""
+    length = 7 + payload
+    header = bytes([
+        0xFF, 0xF1, 0x4C, 0x80 | (length >> 11),
+        (length >> 3) & 0xFF, ((length & 0x07) << 5) | 0x1F, 0xFC
+    ])
+    return header + bytes([index]) * payload
+
+
+class FakeAacEncoder:
+    """Writes one numbered ADTS frame per 1024 samples, plus priming, on close."""
+    written: list[np.ndarray] = []
+
+    def __init__(self, output_path: str, sample_rate: int, **kwargs: Any) -> None:
+        self.output_path = output_path
+        FakeAacEncoder.written = []
+
+    def __enter__(self) -> "FakeAacEncoder":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        frames = 1 + -(-sum(len(block) for block in FakeAacEncoder.written) // 1024)
+        with open(self.output_path, "wb") as f:
+            f.write(b"".join(adts_frame(index) for index in range(frames)))
+
+    def write(self, block: np.ndarray) -> None:
+        FakeAacEncoder.written.append(block.copy())
+
+
+class TestAlignment:
+    """Tests for alignment."""
+
+    def test_integer_frame_rate(self) -> None:
+        """Test that a 5s 24fps clip aligns with AAC frames every 8 repeats."""
+        repeats, samples = alignment(120, Fraction(24), 48000)
+
+        assert (repeats, samples) == (8, 1_920_000)
+        assert samples % 1024 == 0
+
+    def test_ntsc_frame_rate(self) -> None:
+        """Test that aligned lengths of a 29.97fps clip are whole frames and AAC frames."""
+        fps = Fraction(30000, 1001)
+
+        repeats, samples = alignment(150, fps, 48000)
+
+        assert samples % 1024 == 0
+        assert Fraction(samples) * fps / 48000 == 150 * repeats
+
+
+class TestLoopLengths:
+    """Tests for loop_lengths."""
+
+    def test_whole_steps_in_one_loop(self) -> None:
+        """Test that audio longer than a step holds as many whole steps as fit."""
+        assert loop_lengths(1_920_000, 5_616_000) == [3_840_000]
+
+    def test_long_step_split_evenly(self) -> None:
+        """Test that a step longer than the audio is split into near-equal loops."""
+        lengths = loop_lengths(10_001, 4_000)
+
+        assert lengths == [3_334, 3_334, 3_333]
+        assert sum(lengths) == 10_001
+
+
+class TestSplitAdts:
+    """Tests for split_adts."""
+
+    def test_splits_frames(self) -> None:
+        """Test that frames are split on their header lengths."""
+        data = adts_frame(0) + adts_frame(1, payload=300) + adts_frame(2)
+
+        frames = split_adts(data)
+
+        assert [len(frame) for frame in frames] == [12, 307, 12]
+        assert frames[1][7] == 1
+
+    def test_rejects_garbage(self) -> None:
+        """Test that data without a sync word is rejected."""
+        with pytest.raises(ValueError, match="sync word"):
+            split_adts(adts_frame(0) + b"\x00" * 12)
+
+
+class TestEncodeGaplessAac:
+    """Tests for encode_gapless_aac."""
+
+    def test_drops_priming_and_preroll(self, tmp_path: Path) -> None:
+        """Test that exactly the unit's frames are kept, starting after pre-roll."""
+        unit = np.arange(8 * 1024, dtype=np.float32)[:, None].repeat(2, axis=1)
+        output = tmp_path / "unit.aac"
+
+        with patch("utils.av_unit.PcmEncoder", FakeAacEncoder):
+            encode_gapless_aac(unit, str(output))
+
+        frames = split_adts(output.read_bytes())
+        # One priming frame plus two pre-roll frames are dropped
+        assert [frame[7] for frame in frames] == list(range(3, 11))
+        # The pre-roll is the unit's own tail
+        np.testing.assert_array_equal(FakeAacEncoder.written[0], unit[-2048:])
+
+    def test_rejects_partial_frames(self, tmp_path: Path) -> None:
+        """Test that a unit that is not whole AAC frames is rejected."""
+        with pytest.raises(ValueError, match="whole number"):
+            encode_gapless_aac(np.zeros((1000, 2), dtype=np.float32), str(tmp_path / "unit.aac"))
+
+
+class TestBuildAvLoopUnit:
+    """Tests for build_av_loop_unit."""
+
+    def test_unit_is_longest_aligned_length(self, tmp_path: Path) -> None:
+        """Test that the unit fills the audio with whole aligned steps and repeats the clip to match."""
+        info = MediaInfo("base.mp4", duration=5.0, fps=24.0, frame_count=120)
+        audio = np.zeros((120 * 48000, 2), dtype=np.float32)
+
+        with patch("utils.av_unit.probe", return_value=info), \
+             patch("utils.av_unit.decode_pcm", return_value=audio), \
+             patch("utils.av_unit.encode_gapless_aac") as mock_encode, \
+             patch("subprocess.run") as mock_run:
+            build_av_loop_unit("base.mp4", "audio.mp3", str(tmp_path / "unit.mp4"))
+
+        # 40s steps; 120s minus a 3s crossfade holds two of them
+        assert len(mock_encode.call_args[0][0]) == 2 * 1_920_000
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-stream_loop") + 1] == "15"
+        assert args[args.index("-c") + 1] == "copy"
+
+    def test_odd_frame_count_splits_step_into_loops(self, tmp_path: Path) -> None:
+        """Test that a step longer than the audio is built from several shorter loops."""
+        # 81 frames at 6fps: 16 clips make the first 216s aligned step, longer than 120s of audio
+        info = MediaInfo("base.mp4", duration=13.5, fps=6.0, frame_count=81)
+        audio = np.arange(120 * 48000, dtype=np.float32).reshape(-1, 1)
+
+        with patch("utils.av_unit.probe", return_value=info), \
+             patch("utils.av_unit.decode_pcm", return_value=audio), \
+             patch("utils.av_unit.encode_gapless_aac") as mock_encode, \
+             patch("subprocess.run") as mock_run:
+            build_av_loop_unit("base.mp4", "audio.mp3", str(tmp_path / "unit.mp4"))
+
+        unit = mock_encode.call_args[0][0]
+        assert len(unit) == 216 * 48000
+        # Both 108s loops start on the same sample, right after the crossfade
+        assert unit[0, 0] == unit[108 * 48000, 0] == 3 * 48000
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-stream_loop") + 1] == "15"
+
+    def test_counts_video_frames_not_container_duration(self, tmp_path: Path) -> None:
+        """Test that audio running past the video does not lengthen the clip."""
+        # 5s of 24fps video in a container stretched to 5.5s by its audio track
+        info = MediaInfo("base.mp4", duration=5.5, fps=24.0, frame_count=120)
+        audio = np.zeros((120 * 48000, 2), dtype=np.float32)
+
+        with patch("utils.av_unit.probe", return_value=info), \
+             patch("utils.av_unit.decode_pcm", return_value=audio), \
+             patch("utils.av_unit.encode_gapless_aac") as mock_encode, \
+             patch("subprocess.run"):
+            build_av_loop_unit("base.mp4", "audio.mp3", str(tmp_path / "unit.mp4"))
+
+        assert len(mock_encode.call_args[0][0]) == 2 * 1_920_000
+
+    def test_short_audio_raises(self, tmp_path: Path) -> None:
+        """Test that audio too short for its crossfade is rejected."""
+        info = MediaInfo("base.mp4", duration=5.0, fps=24.0, frame_count=120)
+
+        with patch("utils.av_unit.probe", return_value=info), \
+             patch("utils.av_unit.decode_pcm", return_value=np.zeros((5 * 48000, 2), dtype=np.float32)):
+            with pytest.raises(ValueError, match="too short"):
+                build_av_loop_unit("base.mp4", "audio.mp3", str(tmp_path / "unit.mp4"))
+
+
+class TestConcatUnits:
+    """Tests for concat_units."""
+
+    def test_stream_copies_enough_units(self, tmp_path: Path) -> None:
+        """Test that the unit is listed enough times and copied without re-encoding."""
+        listed: list[str] = []
+
+        def capture(cmd: list[str], **kwargs: Any) -> None:
+            with open(cmd[cmd.index("-i") + 1]) as f:
+                listed.extend(f.read().splitlines())
+
+        with patch("utils.av_unit.probe", return_value=MediaInfo("unit.mp4", duration=40.0)), \
+             patch("subprocess.run", side_effect=capture) as mock_run:
+            concat_units("unit.mp4", str(tmp_path / "final.mp4"), 3600)
+
+        assert len(listed) == 90
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-c") + 1] == "copy"
+        assert args[args.index("-t") + 1] == "3600"
+
+    def test_long_target_uses_one_demuxer(self, tmp_path: Path) -> None:
+        """Test that many copies are looped by one demuxer instead of a concat line each."""
+        unit = MediaInfo("unit.mp4", duration=40.0, has_b_frames=False)
+
+        with patch("utils.av_unit.probe", return_value=unit), \
+             patch("utils.loop.probe", return_value=unit), \
+             patch("subprocess.run") as mock_run:
+            concat_units("unit.mp4", str(tmp_path / "final.mp4"), 12 * 3600)
+
+        mock_run.assert_called_once()
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-stream_loop") + 1] == "1079"
+        assert "concat" not in args
+
@@ -0,0 +1,89 @@
+import threading
+import time
+
+from utils.batch import run_pipelined
+
+
+class TestRunPipelined:
+    """Tests for run_pipelined function."""
+
+    def test_applies_steps_in_order(self) -> None:
+        """Test that each job passes through every step in sequence."""
+        results = run_pipelined(
+            [1, 2, 3],
+            [("add", lambda x: x + 1), ("double", lambda x: x * 2)],
+        )
+
+        assert [r["value"] for r in results] == [4, 6, 8]
+        assert all(r["error"] is None for r in results)
+
+    def test_results_keep_input_order(self) -> None:
+        """Test that results are returned in input order."""
+        results = run_pipelined(["a", "b", "c", "d"], [("upper", str.upper)])
+
+        assert [r["index"] for r in results] == [0, 1, 2, 3]
+        assert [r["value"] for r in results] == ["A", "B", "C", "D"]
+
+    def test_failed_job_is_skipped_by_later_steps(self) -> None:
+        """Test that a failure is reported and does not stop other jobs."""
+        seen: list[int] = []
+
+        def fail_on_two(x: int) -> int:
+            if x == 2:
+                raise RuntimeError("bad job")
+            return x
+
+        def record(x: int) -> int:
+            seen.append(x)
+            return x
+
+        results = run_pipelined([1, 2, 3], [("check", fail_on_two), ("record", record)])
+
+        assert seen == [1, 3]
+        assert results[1]["failed_step"] == "check"
+        assert isinstance(results[1]["error"], RuntimeError)
+        assert results[0]["value"] == 1
+        assert results[2]["value"] == 3
+
+    def test_steps_overlap_across_jobs(self) -> None:
+        """Test that job N+1 runs step 1 while job N runs step 2."""
+        first_step_of_second_job = threading.Event()
+
+        def produce(x: int) -> int:
+            if x == 1:
+                first_step_of_second_job.set()
+            return x
+
+        def consume(x: int) -> int:
+            if x == 0:
+                # Only succeeds if the first step keeps running meanwhile
+                assert first_step_of_second_job.wait(timeout=5)
+            return x
+
+        results = run_pipelined([0, 1], [("produce", produce), ("consume", consume)])
+
+        assert all(r["error"] is None for r in results)
+
+    def test_bounded_queue_limits_work_in_flight(self) -> None:
+        """Test that a slow consumer throttles the upstream step."""
+        produced: list[int] = []
+        max_ahead: list[int] = [0]
+        consumed: list[int] = []
+        lock = threading.Lock()
+
+        def produce(x: int) -> int:
+            with lock:
+                produced.append(x)
+                max_ahead[0] = max(max_ahead[0], len(produced) - len(consumed))
+            return x
+
+        def consume(x: int) -> int:
+            time.sleep(0.02)
+            with lock:
+                consumed.append(x)
+            return x
+
+        run_pipelined(list(range(8)), [("produce", produce), ("consume", consume)], queue_size=1)
+
+        # At most: one being consumed, one queued, one finished waiting to be queued
+        assert max_ahead[0] <= 3
@@ -0,0 +1,78 @@
+from agents.prompt_agent import build_system_prompt, build_user_prompt, derive_stem_prompts
+from bot_types import Metadata, is_valid_metadata, is_valid_prompts, matches_typeddict
+
+
+class TestMatchesTypeddict:
+    """Tests for TypedDict validation of parsed LLM responses."""
+
+    def test_valid_metadata(self) -> None:
+        """Test that complete metadata passes."""
+        assert is_valid_metadata({"title": "Rain", "description": "Calm #rain", "tags": ["rain"]})
+
+    def test_extra_keys_are_allowed(self) -> None:
+        """Test that unexpected extra keys do not fail validation."""
+        assert is_valid_metadata({"title": "Rain", "description": "d", "tags": [], "extra": 1})
+
+    def test_missing_key_fails(self) -> None:
+        """Test that a missing required key fails."""
+        assert not is_valid_metadata({"title": "Rain", "description": "d"})
+
+    def test_wrong_list_item_type_fails(self) -> None:
+        """Test that list[str] fields reject non-string items."""
+        assert not is_valid_metadata({"title": "Rain", "description": "d", "tags": ["ok", 3]})
+
+    def test_tags_as_string_fails(self) -> None:
+        """Test that a comma-separated string is not accepted for list[str]."""
+        assert not is_valid_metadata({"title": "Rain", "description": "d", "tags": "a,b"})
+
+    def test_nested_prompt_object_fails(self) -> None:
+        """Test that prompts must be plain strings, not nested objects."""
+        assert not is_valid_prompts({
+            "image_prompt": {"scene": "fireplace"},
+            "video_prompt": "flames flicker",
+            "audio_prompt": "crackling, no music",
+        })
+
+    def test_blank_string_fails(self) -> None:
+        """Test that empty prompt strings are rejected."""
+        assert not is_valid_prompts({"image_prompt": " ", "video_prompt": "v", "audio_prompt": "a"})
+
+    def test_non_dict_fails(self) -> None:
+        """Test that non-object values fail."""
+        assert not matches_typeddict(["title"], Metadata)
+        assert not matches_typeddict(None, Metadata)
+
+    def test_optional_audio_stems(self) -> None:
+        """Test that audio_stems may be missing but must be a list of strings when present."""
+        prompts = {"image_prompt": "i", "video_prompt": "v", "audio_prompt": "a"}
+
+        assert is_valid_prompts(prompts)
+        assert is_valid_prompts({**prompts, "audio_stems": ["rain, no music"]})
+        assert not is_valid_prompts({**prompts, "audio_stems": "rain, no music"})
+
+    def test_audio_stems_required_when_stems_on(self) -> None:
+        """Test that stems mode rejects responses without audio_stems."""
+        prompts = {"image_prompt": "i", "video_prompt": "v", "audio_prompt": "a"}
+
+        assert not is_valid_prompts(prompts, stems=True)
+        assert not is_valid_prompts({**prompts, "audio_stems": []}, stems=True)
+        assert is_valid_prompts({**prompts, "audio_stems": ["rain, no music"]}, stems=True)
+
+    def test_prompt_keys_follow_stems_setting(self) -> None:
+        """Test that audio_stems is only requested when stems are on."""
+        concept = {"ambience": "rain", "mood": "calm", "duration": "3h"}
+
+        assert "exactly these three keys" in build_system_prompt(stems=False)
+        assert "audio_stems" not in build_system_prompt(stems=False)
+        assert "AUDIO STEMS" not in build_user_prompt(concept, stems=False)
+        assert "exactly these four keys" in build_system_prompt(stems=True)
+        assert "AUDIO STEMS" in build_user_prompt(concept, stems=True)
+
+    def test_fallback_stems_are_distinct_layers(self) -> None:
+        """Test that stems derived from one audio prompt each ask for a different layer."""
+        stems = derive_stem_prompts("Cozy fireplace crackling, soft rain outside, no music")
+
+        assert len(set(stems)) == len(stems) == 3
+        assert all(stem.startswith("Cozy fireplace crackling, soft rain outside, only") for stem in stems)
+        assert all(stem.endswith(", no music") and stem.count("no music") == 1 for stem in stems)
+
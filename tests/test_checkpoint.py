@@ -0,0 +1,198 @@
+import os
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from utils.checkpoint import CheckpointStore
+from utils.dag import Stage, run_stages
+from utils.hashing import file_digest, value_digest
+
+
+class TestValueDigest:
+    """Tests for value_digest function."""
+
+    def test_same_value_same_digest(self) -> None:
+        """Test that equal JSON values hash identically regardless of key order."""
+        assert value_digest({"a": 1, "b": [1, 2]}) == value_digest({"b": [1, 2], "a": 1})
+
+    def test_files_hash_by_content(self, tmp_path: Path) -> None:
+        """Test that two paths with the same bytes share a digest."""
+        first = tmp_path / "first.bin"
+        second = tmp_path / "second.bin"
+        first.write_bytes(b"same bytes")
+        second.write_bytes(b"same bytes")
+
+        assert value_digest(str(first)) == value_digest(str(second))
+
+    def test_file_digest_changes_with_content(self, tmp_path: Path) -> None:
+        """Test that modifying a file changes its digest."""
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"one")
+        before = file_digest(str(path))
+
+        path.write_bytes(b"two!")
+
+        assert file_digest(str(path)) != before
+
+    def test_lists_of_files_hash_by_content(self, tmp_path: Path) -> None:
+        """Test that file paths inside a list hash by content."""
+        path = tmp_path / "stem.mp3"
+        path.write_bytes(b"one")
+        before = value_digest([str(path)])
+
+        path.write_bytes(b"two!")
+
+        assert value_digest([str(path)]) != before
+
+    def test_objects_hash_by_type(self) -> None:
+        """Test that non-JSON objects hash by their type, not identity."""
+        class Backend:
+            pass
+
+        assert value_digest(Backend()) == value_digest(Backend())
+        assert value_digest(Backend()) != value_digest(None)
+
+
+class TestCheckpointStore:
+    """Tests for CheckpointStore class."""
+
+    def test_lookup_returns_recorded_outputs(self, tmp_path: Path) -> None:
+        """Test that a recorded stage is returned for the same key."""
+        store = CheckpointStore("run1", runs_dir=str(tmp_path))
+        key = store.stage_key("metadata", {"concept": {"ambience": "rain"}})
+
+        store.record("metadata", key, {"metadata": {"title": "Rain"}})
+
+        assert store.lookup("metadata", key) == {"metadata": {"title": "Rain"}}
+
+    def test_lookup_misses_on_changed_inputs(self, tmp_path: Path) -> None:
+        """Test that different inputs do not reuse a checkpoint."""
+        store = CheckpointStore("run1", runs_dir=str(tmp_path))
+        old_key = store.stage_key("metadata", {"concept": {"ambience": "rain"}})
+        store.record("metadata", old_key, {"metadata": {"title": "Rain"}})
+
+        new_key = store.stage_key("metadata", {"concept": {"ambience": "fire"}})
+
+        assert store.lookup("metadata", new_key) is None
+
+    def test_lookup_misses_when_output_file_deleted(self, tmp_path: Path) -> None:
+        """Test that a checkpoint is invalid once its output file is gone."""
+        output = tmp_path / "looped.mp4"
+        output.write_bytes(b"video")
+        store = CheckpointStore("run1", runs_dir=str(tmp_path / "runs"))
+        key = store.stage_key("looped_video", {"base_video": "x"})
+        store.record("looped_video", key, {"looped_video": str(output)})
+
+        output.unlink()
+
+        assert store.lookup("looped_video", key) is None
+
+    def test_lookup_misses_when_listed_output_file_deleted(self, tmp_path: Path) -> None:
+        """Test that files inside a list output are fingerprinted too."""
+        stems = [tmp_path / "stem0.mp3", tmp_path / "stem1.mp3"]
+        for stem in stems:
+            stem.write_bytes(b"audio")
+        store = CheckpointStore("run1", runs_dir=str(tmp_path / "runs"))
+        key = store.stage_key("audio_stems", {"prompts": "x"})
+        store.record("audio_stems", key, {"audio_stems": [str(stem) for stem in stems]})
+
+        stems[1].unlink()
+
+        assert store.lookup("audio_stems", key) is None
+
+    def test_lookup_misses_when_output_file_modified(self, tmp_path: Path) -> None:
+        """Test that a checkpoint is invalid once its output file changes."""
+        output = tmp_path / "looped.mp4"
+        output.write_bytes(b"video")
+        store = CheckpointStore("run1", runs_dir=str(tmp_path / "runs"))
+        key = store.stage_key("looped_video", {"base_video": "x"})
+        store.record("looped_video", key, {"looped_video": str(output)})
+
+        output.write_bytes(b"truncated")
+
+        assert store.lookup("looped_video", key) is None
+
+    def test_checkpoints_persist_across_instances(self, tmp_path: Path) -> None:
+        """Test that a new process sees checkpoints written by an earlier one."""
+        store = CheckpointStore("run1", runs_dir=str(tmp_path))
+        key = store.stage_key("prompts", {"concept": "c"})
+        store.record("prompts", key, {"prompts": {"image_prompt": "p"}})
+
+        reopened = CheckpointStore("run1", runs_dir=str(tmp_path))
+
+        assert reopened.lookup("prompts", key) == {"prompts": {"image_prompt": "p"}}
+        assert reopened.completed_stages() == ["prompts"]
+
+    def test_manifest_round_trip(self, tmp_path: Path) -> None:
+        """Test that the run manifest can be saved and loaded."""
+        store = CheckpointStore("run1", runs_dir=str(tmp_path))
+        store.save_manifest({"concept": {"ambience": "rain"}})
+
+        assert CheckpointStore("run1", runs_dir=str(tmp_path)).load_manifest() == {
+            "concept": {"ambience": "rain"}
+        }
+
+    def test_unknown_run_has_no_manifest(self, tmp_path: Path) -> None:
+        """Test that loading a missing run raises and creates nothing."""
+        store = CheckpointStore("missing", runs_dir=str(tmp_path))
+
+        with pytest.raises(FileNotFoundError):
+            store.load_manifest()
+        assert not os.path.exists(store.run_dir)
+
+
+class TestRunStagesWithCheckpoints:
+    """Tests for resuming run_stages from checkpoints."""
+
+    def test_resume_skips_completed_stages(self, tmp_path: Path) -> None:
+        """Test that a rerun only executes stages after the failure point."""
+        calls: list[str] = []
+        fail = [True]
+
+        def first(x: int) -> int:
+            calls.append("first")
+            return x + 1
+
+        def second(first: int) -> int:
+            calls.append("second")
+            if fail[0]:
+                raise RuntimeError("crashed")
+            return first * 10
+
+        stages = [
+            Stage("first", first, ("x",), ("first",)),
+            Stage("second", second, ("first",), ("second",)),
+        ]
+
+        with pytest.raises(RuntimeError):
+            run_stages(stages, {"x": 1}, checkpoints=CheckpointStore("run", runs_dir=str(tmp_path)))
+
+        fail[0] = False
+        context: dict[str, Any] = {"x": 1}
+        timings = run_stages(stages, context, checkpoints=CheckpointStore("run", runs_dir=str(tmp_path)))
+
+        assert calls == ["first", "second", "second"]
+        assert context["second"] == 20
+        assert {t["stage"]: t["cached"] for t in timings} == {"first": True, "second": False}
+
+    def test_regenerated_input_file_invalidates_downstream(self, tmp_path: Path) -> None:
+        """Test that changing a file input reruns the stage that consumes it."""
+        source = tmp_path / "base.mp4"
+        source.write_bytes(b"v1")
+        calls: list[str] = []
+
+        def measure(path: str) -> int:
+            calls.append(path)
+            return os.path.getsize(path)
+
+        stages = [Stage("measure", measure, ("path",), ("size",))]
+        runs_dir = str(tmp_path / "runs")
+
+        run_stages(stages, {"path": str(source)}, checkpoints=CheckpointStore("run", runs_dir=runs_dir))
+        source.write_bytes(b"version 2")
+        context: dict[str, Any] = {"path": str(source)}
+        run_stages(stages, context, checkpoints=CheckpointStore("run", runs_dir=runs_dir))
+
+        assert len(calls) == 2
+        assert context["size"] == len(b"version 2")
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import clients
+
+
+class TestClients:
+    """Tests for the lazy client registry."""
+
+    def test_pipeline_import_skips_api_libraries(self) -> None:
+        """Test that importing the pipeline does not import API client libraries."""
+        code = (
+            "import sys, pipeline, batch; "
+            "print(sorted(m for m in ('openai', 'replicate', 'googleapiclient') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            cwd=Path(__file__).resolve().parent.parent,
+            env={"PATH": ""},
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+
+    def test_openai_client_is_shared(self) -> None:
+        """Test that the OpenAI client is built once and reused."""
+        with patch.object(clients, "_openai_client", None), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            first = clients.get_openai_client()
+            second = clients.get_openai_client()
+
+        assert first is second
+
+    def test_clients_share_transport(self) -> None:
+        """Test that OpenAI and Replicate clients reuse one connection pool."""
+        with patch.object(clients, "_openai_client", None), \
+             patch.object(clients, "_replicate_client", None), \
+             patch.object(clients, "_transport", None), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key", "REPLICATE_API_TOKEN": "test-token"}):
+            transport = clients.get_transport()
+            openai_client = clients.get_openai_client()
+            replicate_client = clients.get_replicate_client()
+
+            assert openai_client._client._transport is transport
+            assert replicate_client._client._transport._wrapped_transport is transport
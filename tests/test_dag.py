@@ -0,0 +1,153 @@
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from utils.dag import Stage, format_timeline, run_stages, validate_stages
+
+
+class TestValidateStages:
+    """Tests for validate_stages function."""
+
+    def test_accepts_valid_graph(self) -> None:
+        """Test that a complete acyclic graph passes validation."""
+        stages = [
+            Stage("a", lambda x: x, ("x",), ("a",)),
+            Stage("b", lambda a: a, ("a",), ("b",)),
+        ]
+        validate_stages(stages, {"x"})
+
+    def test_rejects_missing_input(self) -> None:
+        """Test that an input nobody produces is rejected."""
+        stages = [Stage("a", lambda y: y, ("y",), ("a",))]
+
+        with pytest.raises(ValueError, match="never produced"):
+            validate_stages(stages, {"x"})
+
+    def test_rejects_duplicate_output(self) -> None:
+        """Test that two stages producing the same name are rejected."""
+        stages = [
+            Stage("a", lambda x: x, ("x",), ("out",)),
+            Stage("b", lambda x: x, ("x",), ("out",)),
+        ]
+
+        with pytest.raises(ValueError, match="already provided"):
+            validate_stages(stages, {"x"})
+
+    def test_rejects_cycle(self) -> None:
+        """Test that a dependency cycle is rejected."""
+        stages = [
+            Stage("a", lambda b: b, ("b",), ("a",)),
+            Stage("b", lambda a: a, ("a",), ("b",)),
+        ]
+
+        with pytest.raises(ValueError, match="cycle"):
+            validate_stages(stages, set())
+
+
+class TestRunStages:
+    """Tests for run_stages function."""
+
+    def test_passes_outputs_to_dependents(self) -> None:
+        """Test that stage outputs are fed to downstream stages."""
+        stages = [
+            Stage("double", lambda x: x * 2, ("x",), ("doubled",)),
+            Stage("add", lambda doubled, x: doubled + x, ("doubled", "x"), ("total",)),
+        ]
+        context: dict[str, Any] = {"x": 5}
+
+        run_stages(stages, context)
+
+        assert context["doubled"] == 10
+        assert context["total"] == 15
+
+    def test_multiple_outputs_are_unpacked(self) -> None:
+        """Test that a tuple result is split across declared outputs."""
+        stages = [Stage("split", lambda x: (x, -x), ("x",), ("pos", "neg"))]
+        context: dict[str, Any] = {"x": 3}
+
+        run_stages(stages, context)
+
+        assert context["pos"] == 3
+        assert context["neg"] == -3
+
+    def test_independent_stages_overlap(self) -> None:
+        """Test that independent branches run at the same time."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def wait_for_sibling(x: int) -> int:
+            # Only returns if both stages are running concurrently
+            barrier.wait()
+            return x
+
+        stages = [
+            Stage("left", wait_for_sibling, ("x",), ("left",)),
+            Stage("right", wait_for_sibling, ("x",), ("right",)),
+        ]
+        context: dict[str, Any] = {"x": 1}
+
+        timings = run_stages(stages, context, max_workers=2)
+
+        by_name = {t["stage"]: t for t in timings}
+        assert by_name["left"]["start"] < by_name["right"]["end"]
+        assert by_name["right"]["start"] < by_name["left"]["end"]
+
+    def test_dependent_stage_starts_after_dependency(self) -> None:
+        """Test that a stage never starts before its inputs are ready."""
+        def slow(x: int) -> int:
+            time.sleep(0.05)
+            return x
+
+        stages = [
+            Stage("first", slow, ("x",), ("first",)),
+            Stage("second", lambda first: first, ("first",), ("second",)),
+        ]
+
+        timings = run_stages(stages, {"x": 1})
+
+        by_name = {t["stage"]: t for t in timings}
+        assert by_name["second"]["start"] >= by_name["first"]["end"]
+
+    def test_reraises_stage_error(self) -> None:
+        """Test that a failing stage aborts the run with its exception."""
+        def boom(x: int) -> int:
+            raise RuntimeError("stage exploded")
+
+        ran: list[str] = []
+        stages = [
+            Stage("boom", boom, ("x",), ("a",)),
+            Stage("after", lambda a: ran.append("after"), ("a",), ("b",)),
+        ]
+
+        with pytest.raises(RuntimeError, match="stage exploded"):
+            run_stages(stages, {"x": 1})
+
+        assert ran == []
+
+    def test_rejects_wrong_output_arity(self) -> None:
+        """Test that a multi-output stage must return a matching tuple."""
+        stages = [Stage("bad", lambda x: x, ("x",), ("a", "b"))]
+
+        with pytest.raises(ValueError, match="2-tuple"):
+            run_stages(stages, {"x": 1})
+
+
+class TestFormatTimeline:
+    """Tests for format_timeline function."""
+
+    def test_one_row_per_stage_ordered_by_start(self) -> None:
+        """Test that rows are sorted by start time."""
+        timeline = format_timeline([
+            {"stage": "late", "start": 5.0, "end": 10.0, "cached": False},
+            {"stage": "early", "start": 0.0, "end": 5.0, "cached": False},
+        ])
+
+        lines = timeline.splitlines()
+        assert len(lines) == 2
+        assert lines[0].startswith("early")
+        assert lines[1].startswith("late")
+
+    def test_empty_timings(self) -> None:
+        """Test that no timings produce an empty string."""
+        assert format_timeline([]) == ""
@@ -0,0 +1,216 @@
+import json
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from utils.download import download_file
+
+PAYLOAD: bytes = bytes(range(256)) * 40  # 10240 bytes
+
+
+class FakeResponse:
+    """Minimal stand-in for a streamed requests.Response."""
+
+    def __init__(
+        self,
+        status_code: int,
+        body: bytes = b"",
+        headers: dict[str, str] | None = None,
+        fail_after: int | None = None,
+    ) -> None:
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers if headers is not None else {"Content-Length": str(len(body))}
+        self.fail_after = fail_after
+
+    def __enter__(self) -> "FakeResponse":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        pass
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        sent = 0
+        for i in range(0, len(self.body), chunk_size):
+            if self.fail_after is not None and sent >= self.fail_after:
+                raise requests.exceptions.ChunkedEncodingError("connection dropped")
+            chunk = self.body[i:i + chunk_size]
+            sent += len(chunk)
+            yield chunk
+
+
+def serve_ranges(url: str, headers: dict[str, str] | None = None, **kwargs: object) -> FakeResponse:
+    """Serve PAYLOAD, honouring Range headers."""
+    range_header = (headers or {}).get("Range")
+    if not range_header:
+        return FakeResponse(200, PAYLOAD)
+    start_str, end_str = range_header.removeprefix("bytes=").split("-")
+    start = int(start_str)
+    end = int(end_str) if end_str else len(PAYLOAD) - 1
+    if start >= len(PAYLOAD):
+        return FakeResponse(416)
+    return FakeResponse(206, PAYLOAD[start:end + 1])
+
+
+class TestDownloadFile:
+    """Tests for download_file function."""
+
+    def test_streams_body_to_output(self, tmp_path: Path) -> None:
+        """Test that the body is written in chunks to the output path."""
+        output = tmp_path / "video.mp4"
+
+        with patch("utils.download.requests.get", side_effect=serve_ranges) as mock_get:
+            result = download_file("https://example.com/v.mp4", str(output), timeout=5, chunk_size=1000)
+
+        assert result == str(output)
+        assert output.read_bytes() == PAYLOAD
+        assert mock_get.call_args.kwargs["stream"] is True
+        assert not (tmp_path / "video.mp4.part").exists()
+
+    def test_resumes_with_range_after_dropped_connection(self, tmp_path: Path) -> None:
+        """Test that a failure mid-body resumes from the bytes on disk."""
+        output = tmp_path / "audio.mp3"
+        responses = [FakeResponse(200, PAYLOAD, fail_after=4000)]
+
+        def flaky(url: str, headers: dict[str, str] | None = None, **kwargs: object) -> FakeResponse:
+            return responses.pop(0) if responses else serve_ranges(url, headers=headers)
+
+        with patch("utils.download.requests.get", side_effect=flaky) as mock_get, \
+             patch("utils.download.time.sleep"):
+            download_file("https://example.com/a.mp3", str(output), timeout=5, chunk_size=1000)
+
+        assert output.read_bytes() == PAYLOAD
+        resume_headers = mock_get.call_args_list[1].kwargs["headers"]
+        assert resume_headers == {"Range": "bytes=4000-"}
+
+    def test_resumes_existing_part_file(self, tmp_path: Path) -> None:
+        """Test that a .part file left by a crashed process is continued."""
+        output = tmp_path / "video.mp4"
+        (tmp_path / "video.mp4.part").write_bytes(PAYLOAD[:3000])
+        (tmp_path / "video.mp4.part.meta").write_text(json.dumps({"url": "https://example.com/v.mp4", "etag": None}))
+
+        with patch("utils.download.requests.get", side_effect=serve_ranges) as mock_get:
+            download_file("https://example.com/v.mp4", str(output), timeout=5)
+
+        assert output.read_bytes() == PAYLOAD
+        assert mock_get.call_args.kwargs["headers"] == {"Range": "bytes=3000-"}
+        assert not (tmp_path / "video.mp4.part.meta").exists()
+
+    def test_resume_sends_if_range_etag(self, tmp_path: Path) -> None:
+        """Test that the ETag the partial was started with guards the resume."""
+        output = tmp_path / "video.mp4"
+        (tmp_path / "video.mp4.part").write_bytes(PAYLOAD[:3000])
+        (tmp_path / "video.mp4.part.meta").write_text(json.dumps({"url": "https://example.com/v.mp4", "etag": '"v1"'}))
+
+        with patch("utils.download.requests.get", side_effect=serve_ranges) as mock_get:
+            download_file("https://example.com/v.mp4", str(output), timeout=5)
+
+        assert mock_get.call_args.kwargs["headers"] == {"Range": "bytes=3000-", "If-Range": '"v1"'}
+
+    def test_discards_part_file_from_another_url(self, tmp_path: Path) -> None:
+        """Test that a partial left by a different download is never spliced in."""
+        output = tmp_path / "video.mp4"
+        (tmp_path / "video.mp4.part").write_bytes(b"x" * 3000)
+        (tmp_path / "video.mp4.part.meta").write_text(json.dumps({"url": "https://example.com/old.mp4", "etag": None}))
+
+        with patch("utils.download.requests.get", side_effect=serve_ranges) as mock_get:
+            download_file("https://example.com/v.mp4", str(output), timeout=5)
+
+        assert output.read_bytes() == PAYLOAD
+        assert mock_get.call_args.kwargs["headers"] == {}
+
+    def test_unsatisfiable_range_checks_total_size(self, tmp_path: Path) -> None:
+        """Test that a 416 only counts as finished when the partial is the full file."""
+        output = tmp_path / "video.mp4"
+        (tmp_path / "video.mp4.part").write_bytes(b"x" * 20000)
+        (tmp_path / "video.mp4.part.meta").write_text(json.dumps({"url": "https://example.com/v.mp4", "etag": None}))
+        responses = [FakeResponse(416, headers={"Content-Range": f"bytes */{len(PAYLOAD)}"})]
+
+        def stale(url: str, headers: dict[str, str] | None = None, **kwargs: object) -> FakeResponse:
+            return responses.pop(0) if responses else serve_ranges(url, headers=headers)
+
+        with patch("utils.download.requests.get", side_effect=stale):
+            download_file("https://example.com/v.mp4", str(output), timeout=5)
+
+        assert output.read_bytes() == PAYLOAD
+
+    def test_server_errors_are_retried(self, tmp_path: Path) -> None:
+        """Test that a 503 is retried rather than failing the download."""
+        output = tmp_path / "video.mp4"
+        responses = [FakeResponse(503)]
+
+        def overloaded(url: str, headers: dict[str, str] | None = None, **kwargs: object) -> FakeResponse:
+            return responses.pop(0) if responses else serve_ranges(url, headers=headers)
+
+        with patch("utils.download.requests.get", side_effect=overloaded) as mock_get, \
+             patch("utils.download.time.sleep"):
+            download_file("https://example.com/v.mp4", str(output), timeout=5)
+
+        assert output.read_bytes() == PAYLOAD
+        assert mock_get.call_count == 2
+
+    def test_restarts_when_server_ignores_range(self, tmp_path: Path) -> None:
+        """Test that a 200 reply to a ranged request overwrites the part file."""
+        output = tmp_path / "video.mp4"
+        (tmp_path / "video.mp4.part").write_bytes(b"stale")
+
+        with patch("utils.download.requests.get", return_value=FakeResponse(200, PAYLOAD)):
+            download_file("https://example.com/v.mp4", str(output), timeout=5)
+
+        assert output.read_bytes() == PAYLOAD
+
+    def test_gives_up_after_max_retries(self, tmp_path: Path) -> None:
+        """Test that persistent failures are re-raised."""
+        output = tmp_path / "video.mp4"
+
+        with patch("utils.download.requests.get", side_effect=requests.ConnectionError("down")), \
+             patch("utils.download.time.sleep"):
+            with pytest.raises(requests.ConnectionError):
+                download_file("https://example.com/v.mp4", str(output), timeout=5, max_retries=2)
+
+        assert not output.exists()
+
+    def test_http_error_is_not_retried(self, tmp_path: Path) -> None:
+        """Test that a 404 fails immediately."""
+        output = tmp_path / "video.mp4"
+
+        with patch("utils.download.requests.get", return_value=FakeResponse(404)) as mock_get:
+            with pytest.raises(requests.HTTPError):
+                download_file("https://example.com/v.mp4", str(output), timeout=5)
+
+        mock_get.assert_called_once()
+
+    def test_parallel_ranges_for_large_files(self, tmp_path: Path) -> None:
+        """Test that large files are split across concurrent ranged requests."""
+        output = tmp_path / "video.mp4"
+        head = MagicMock(status_code=200, headers={"Accept-Ranges": "bytes", "Content-Length": str(len(PAYLOAD))})
+
+        with patch("utils.download.requests.head", return_value=head), \
+             patch("utils.download.requests.get", side_effect=serve_ranges) as mock_get:
+            download_file(
+                "https://example.com/v.mp4", str(output), timeout=5,
+                connections=4, parallel_threshold=1024, chunk_size=500,
+            )
+
+        assert output.read_bytes() == PAYLOAD
+        ranges = sorted(c.kwargs["headers"]["Range"] for c in mock_get.call_args_list)
+        assert ranges == ["bytes=0-2559", "bytes=2560-5119", "bytes=5120-7679", "bytes=7680-10239"]
+
+    def test_small_files_skip_parallel_split(self, tmp_path: Path) -> None:
+        """Test that files under the threshold use one request."""
+        output = tmp_path / "video.mp4"
+        head = MagicMock(status_code=200, headers={"Accept-Ranges": "bytes", "Content-Length": str(len(PAYLOAD))})
+
+        with patch("utils.download.requests.head", return_value=head), \
+             patch("utils.download.requests.get", side_effect=serve_ranges) as mock_get:
+            download_file("https://example.com/v.mp4", str(output), timeout=5, connections=4)
+
+        mock_get.assert_called_once()
+        assert output.read_bytes() == PAYLOAD
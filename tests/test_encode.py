@@ -0,0 +1,146 @@
+import json
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from utils.encode import encode_segmented, profile_args, record_fps, segment_ranges
+from utils.probe import probe
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None,
+    reason="ffmpeg not installed"
+)
+
+
+def make_frames(frames_dir: Path, count: int, first: int = 1) -> None:
+    """Empty placeholder frame files numbered like frame_video's output."""
+    frames_dir.mkdir(exist_ok=True)
+    for number in range(first, first + count):
+        (frames_dir / f"frame_{number:06d}.jpg").write_bytes(b"")
+
+
+class TestSegmentRanges:
+    """Tests for segment_ranges."""
+
+    def test_segments_hold_whole_gops(self) -> None:
+        """Test that every segment but the last is a whole number of GOPs."""
+        ranges = segment_ranges(100, gop=12, workers=3)
+
+        assert ranges == [(0, 36), (36, 36), (72, 28)]
+
+    def test_never_splits_a_single_gop(self) -> None:
+        """Test that a clip shorter than one GOP per worker uses fewer segments."""
+        assert segment_ranges(20, gop=12, workers=8) == [(0, 12), (12, 8)]
+
+
+class TestProfileArgs:
+    """Tests for profile_args."""
+
+    def test_fixed_closed_gops(self) -> None:
+        """Test the profile settings and the GOP structure segments need to join."""
+        args = profile_args({"preset": "veryfast", "crf": 20, "threads": 2}, gop=48)
+
+        assert args[args.index("-preset") + 1] == "veryfast"
+        assert args[args.index("-crf") + 1] == "20"
+        assert args[args.index("-threads") + 1] == "2"
+        assert args[args.index("-g") + 1] == "48"
+        assert args[args.index("-keyint_min") + 1] == "48"
+        assert args[args.index("-bf") + 1] == "0"
+
+
+class TestRecordFps:
+    """Tests for record_fps."""
+
+    def test_accumulates_runs_per_profile(self, tmp_path: Path) -> None:
+        """Test that throughput adds up across runs and profiles stay separate."""
+        path = str(tmp_path / "stats.json")
+
+        record_fps("fast", 100, 2.0, 4, path)
+        stats = record_fps("fast", 300, 2.0, 8, path)
+        record_fps("quality", 10, 1.0, 2, path)
+
+        assert stats["runs"] == 2
+        assert stats["fps"] == 100.0
+        assert stats["last_fps"] == 150.0
+        assert stats["last_workers"] == 8
+        assert set(json.loads(Path(path).read_text())) == {"fast", "quality"}
+
+    def test_concurrent_runs_lose_no_updates(self, tmp_path: Path) -> None:
+        """Test that encodes recording at once all land in the file."""
+        path = str(tmp_path / "stats.json")
+        threads = [threading.Thread(target=record_fps, args=("fast", 10, 1.0, 2, path)) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert json.loads(Path(path).read_text())["fast"]["runs"] == 16
+        assert [p.name for p in tmp_path.iterdir()] == ["stats.json"]
+
+
+class TestEncodeSegmented:
+    """Tests for encode_segmented."""
+
+    def test_encodes_segments_then_joins_them(self, tmp_path: Path) -> None:
+        """Test one encode per segment at the right frame offset, then a stream-copy join."""
+        frames_dir = tmp_path / "frames"
+        make_frames(frames_dir, 30)
+        commands: list[list[str]] = []
+
+        def fake_ffmpeg(cmd: list[str], **kwargs: Any) -> None:
+            commands.append(cmd)
+            if "concat" in cmd:
+                listed = Path(cmd[cmd.index("-i") + 1]).read_text().splitlines()
+                assert len(listed) == 3
+
+        with patch("subprocess.run", side_effect=fake_ffmpeg):
+            encode_segmented(
+                frames_dir, tmp_path / "out.mp4", fps=6.0, profile="fast", workers=3,
+                stats_path=str(tmp_path / "stats.json")
+            )
+
+        segments = sorted(
+            (int(cmd[cmd.index("-start_number") + 1]), int(cmd[cmd.index("-frames:v") + 1]))
+            for cmd in commands if "-start_number" in cmd
+        )
+        assert segments == [(1, 12), (13, 12), (25, 6)]
+        assert commands[-1][commands[-1].index("-c") + 1] == "copy"
+        assert json.loads((tmp_path / "stats.json").read_text())["fast"]["frames"] == 30
+
+    def test_unknown_profile_raises(self, tmp_path: Path) -> None:
+        """Test that an unknown profile is rejected before encoding."""
+        make_frames(tmp_path, 5)
+
+        with pytest.raises(ValueError, match="Unknown encoder profile"):
+            encode_segmented(tmp_path, tmp_path / "out.mp4", fps=6.0, profile="turbo")
+
+    def test_empty_directory_raises(self, tmp_path: Path) -> None:
+        """Test that a directory without frames is rejected."""
+        with pytest.raises(ValueError, match="No frame_"):
+            encode_segmented(tmp_path, tmp_path / "out.mp4", fps=6.0)
+
+
+@requires_ffmpeg
+class TestEncodeSegmentedIntegration:
+    """Integration tests for segmented encoding with real ffmpeg."""
+
+    def test_joined_video_has_every_frame(self, tmp_path: Path) -> None:
+        """Test that the joined segments play back as one video of every frame."""
+        frames_dir = tmp_path / "frames"
+        frames_dir.mkdir()
+        subprocess.run([
+            "ffmpeg", "-y", "-f", "lavfi",
+            "-i", "testsrc2=size=64x64:rate=10:duration=5",
+            str(frames_dir / "frame_%06d.jpg")
+        ], check=True, capture_output=True)
+        output = tmp_path / "out.mp4"
+
+        encode_segmented(frames_dir, output, fps=10.0, profile="fast", workers=3,
+                         stats_path=str(tmp_path / "stats.json"))
+
+        assert abs((probe(str(output)).duration or 0) - 5.0) < 0.15
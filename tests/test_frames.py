@@ -0,0 +1,99 @@
+import io
+from fractions import Fraction
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from utils.frames import FrameEncoder, iter_frame_batches
+
+
+def decoder(frames: int, width: int = 4, height: int = 2) -> MagicMock:
+    """Decoder process whose stdout holds frames whose bytes are their index."""
+    proc = MagicMock()
+    proc.stdout = io.BytesIO(b"".join(bytes([i]) * (width * height * 3) for i in range(frames)))
+    proc.stderr = io.BytesIO()
+    proc.wait.return_value = 0
+    return proc
+
+
+class TestIterFrameBatches:
+    """Tests for iter_frame_batches."""
+
+    def test_batches_hold_one_window(self) -> None:
+        """Test that frames arrive in full windows except for the last batch."""
+        with patch("subprocess.Popen", return_value=decoder(7)) as mock_popen:
+            batches = list(iter_frame_batches("/test/clip.mp4", (4, 2), window=3))
+
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        assert batches[0].shape == (3, 2, 4, 3)
+        assert batches[2][0, 0, 0, 0] == 6
+        args = mock_popen.call_args[0][0]
+        assert args[args.index("-pix_fmt") + 1] == "rgb24"
+
+    def test_raises_when_decoder_fails(self) -> None:
+        """Test that a failing decoder raises RuntimeError."""
+        proc = decoder(0)
+        proc.wait.return_value = 1
+        # More than a pipe buffer of warnings before the failure
+        proc.stderr = io.BytesIO(b"warning\n" * 20000 + b"bad input")
+
+        with patch("subprocess.Popen", return_value=proc):
+            with pytest.raises(RuntimeError, match="bad input"):
+                list(iter_frame_batches("/test/clip.mp4", (4, 2)))
+
+
+class TestFrameEncoder:
+    """Tests for FrameEncoder."""
+
+    def encoder_proc(self, returncode: int = 0, stderr: bytes = b"") -> MagicMock:
+        """Encoder process that exits with the given status."""
+        proc = MagicMock()
+        proc.wait.return_value = returncode
+        proc.stderr = io.BytesIO(stderr)
+        return proc
+
+    def test_streams_raw_rgb_into_ffmpeg(self, tmp_path: Path) -> None:
+        """Test that batches are piped to ffmpeg as raw RGB at the given size and rate."""
+        proc = self.encoder_proc()
+
+        with patch("subprocess.Popen", return_value=proc) as mock_popen:
+            with FrameEncoder(str(tmp_path / "out.mp4"), (4, 2), Fraction(24), ["-c:v", "libx264"]) as encoder:
+                encoder.write(np.zeros((5, 2, 4, 3), dtype=np.uint8))
+
+        args = mock_popen.call_args[0][0]
+        assert args[args.index("-s") + 1] == "4x2"
+        assert args[args.index("-framerate") + 1] == "24"
+        assert len(proc.stdin.write.call_args[0][0]) == 5 * 2 * 4 * 3
+        assert encoder.frames_written == 5
+
+    def test_rejects_wrong_frame_size(self, tmp_path: Path) -> None:
+        """Test that frames of another size are refused and the encoder is killed."""
+        proc = self.encoder_proc()
+
+        with patch("subprocess.Popen", return_value=proc):
+            with pytest.raises(ValueError, match="do not match 4x2"):
+                with FrameEncoder(str(tmp_path / "out.mp4"), (4, 2), Fraction(24), []) as encoder:
+                    encoder.write(np.zeros((1, 4, 8, 3), dtype=np.uint8))
+
+        proc.kill.assert_called_once()
+
+    def test_raises_when_encoder_fails(self, tmp_path: Path) -> None:
+        """Test that a failing encoder raises RuntimeError."""
+        proc = self.encoder_proc(returncode=1, stderr=b"bad codec")
+
+        with patch("subprocess.Popen", return_value=proc):
+            with pytest.raises(RuntimeError, match="bad codec"):
+                with FrameEncoder(str(tmp_path / "out.mp4"), (4, 2), Fraction(24), []):
+                    pass
+
+    def test_broken_pipe_reports_encoder_error(self, tmp_path: Path) -> None:
+        """Test that an encoder exiting mid-stream raises with its stderr instead of BrokenPipeError."""
+        proc = self.encoder_proc(returncode=1, stderr=b"No space left on device")
+        proc.stdin.write.side_effect = BrokenPipeError
+
+        with patch("subprocess.Popen", return_value=proc):
+            with pytest.raises(RuntimeError, match="No space left"):
+                with FrameEncoder(str(tmp_path / "out.mp4"), (4, 2), Fraction(24), []) as encoder:
+                    encoder.write(np.zeros((1, 2, 4, 3), dtype=np.uint8))
@@ -0,0 +1,183 @@
+import json
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agents.llm_cache import ResponseCache, cached_json_completion, default_cache
+from agents.metadata_agent import MetadataAgent
+
+
+def make_client(content: str) -> MagicMock:
+    """Build a fake OpenAI client returning a fixed message content."""
+    client = MagicMock()
+    client.chat.completions.create.return_value.choices = [
+        MagicMock(message=MagicMock(content=content))
+    ]
+    return client
+
+
+class TestResponseCache:
+    """Tests for ResponseCache class."""
+
+    def test_put_then_get(self, tmp_path: Path) -> None:
+        """Test that a stored response is returned."""
+        cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+        cache.put("k", '{"a": 1}')
+
+        assert cache.get("k") == '{"a": 1}'
+
+    def test_miss_returns_none(self, tmp_path: Path) -> None:
+        """Test that an unknown key is a miss."""
+        cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+
+        assert cache.get("missing") is None
+
+    def test_expired_entry_is_ignored(self, tmp_path: Path) -> None:
+        """Test that entries older than the TTL are not returned."""
+        cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), ttl_seconds=60)
+
+        with patch("agents.llm_cache.time.time", return_value=1000.0):
+            cache.put("k", "old")
+        with patch("agents.llm_cache.time.time", return_value=1061.0):
+            assert cache.get("k") is None
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        """Test that the least recently accessed entry is evicted first."""
+        cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"), max_entries=2)
+
+        with patch("agents.llm_cache.time.time", return_value=1.0):
+            cache.put("a", "A")
+        with patch("agents.llm_cache.time.time", return_value=2.0):
+            cache.put("b", "B")
+        with patch("agents.llm_cache.time.time", return_value=3.0):
+            cache.get("a")  # "b" is now least recently used
+        with patch("agents.llm_cache.time.time", return_value=4.0):
+            cache.put("c", "C")
+        with patch("agents.llm_cache.time.time", return_value=5.0):
+            assert cache.get("a") == "A"
+            assert cache.get("b") is None
+            assert cache.get("c") == "C"
+
+    def test_refresh_skips_lookup_but_stores(self, tmp_path: Path) -> None:
+        """Test that refresh mode ignores old entries and writes new ones."""
+        path = str(tmp_path / "cache.sqlite3")
+        ResponseCache(path=path).put("k", "old")
+        refreshing = ResponseCache(path=path, refresh=True)
+
+        assert refreshing.get("k") is None
+        refreshing.put("k", "new")
+        assert ResponseCache(path=path).get("k") == "new"
+
+    def test_bypass_neither_reads_nor_writes(self, tmp_path: Path) -> None:
+        """Test that bypass mode leaves the cache untouched."""
+        path = str(tmp_path / "cache.sqlite3")
+        ResponseCache(path=path).put("k", "old")
+        bypassing = ResponseCache(path=path, bypass=True)
+
+        assert bypassing.get("k") is None
+        bypassing.put("k", "new")
+        assert ResponseCache(path=path).get("k") == "old"
+
+    def test_namespaces_do_not_share_entries(self, tmp_path: Path) -> None:
+        """Test that a run only sees responses cached under its own namespace."""
+        path = str(tmp_path / "cache.sqlite3")
+        ResponseCache(path=path, namespace="run-1").put("k", "first run")
+
+        assert ResponseCache(path=path, namespace="run-2").get("k") is None
+        assert ResponseCache(path=path).get("k") is None
+        assert ResponseCache(path=path, namespace="run-1").get("k") == "first run"
+
+    def test_key_depends_on_every_parameter(self) -> None:
+        """Test that changing any request parameter changes the key."""
+        base = ("gpt-4o-mini", 0.4, "system", "user", {"type": "json_object"})
+        key = ResponseCache.make_key(*base)
+
+        assert ResponseCache.make_key("gpt-4o", *base[1:]) != key
+        assert ResponseCache.make_key(base[0], 0.6, *base[2:]) != key
+        assert ResponseCache.make_key(*base[:2], "other", *base[3:]) != key
+        assert ResponseCache.make_key(*base[:3], "other", base[4]) != key
+        assert ResponseCache.make_key(*base[:4], {"type": "text"}) != key
+
+
+class TestCachedJsonCompletion:
+    """Tests for cached_json_completion function."""
+
+    def test_second_call_uses_cache(self, tmp_path: Path) -> None:
+        """Test that an identical request does not call the API twice."""
+        cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+        client = make_client(json.dumps({"title": "Rain"}))
+
+        for _ in range(2):
+            result = cached_json_completion(
+                client, cache, model="gpt-4o-mini", temperature=0.4,
+                system_prompt="sys", user_prompt="user", agent="metadata",
+            )
+
+        assert result == {"title": "Rain"}
+        client.chat.completions.create.assert_called_once()
+
+    def test_different_prompt_calls_api(self, tmp_path: Path) -> None:
+        """Test that a different user prompt is a cache miss."""
+        cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+        client = make_client("{}")
+
+        for user_prompt in ("one", "two"):
+            cached_json_completion(
+                client, cache, model="gpt-4o-mini", temperature=0.4,
+                system_prompt="sys", user_prompt=user_prompt, agent="metadata",
+            )
+
+        assert client.chat.completions.create.call_count == 2
+
+    def test_invalid_json_is_not_cached(self, tmp_path: Path) -> None:
+        """Test that an unparseable response is never stored."""
+        cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+        client = make_client("not json")
+
+        with pytest.raises(json.JSONDecodeError):
+            cached_json_completion(
+                client, cache, model="gpt-4o-mini", temperature=0.4,
+                system_prompt="sys", user_prompt="user", agent="metadata",
+            )
+
+        key = cache.make_key("gpt-4o-mini", 0.4, "sys", "user", {"type": "json_object"})
+        assert cache.get(key) is None
+
+    def test_response_failing_validation_is_not_cached(self, tmp_path: Path) -> None:
+        """Test that a schema-invalid response is returned but not stored."""
+        cache = ResponseCache(path=str(tmp_path / "cache.sqlite3"))
+        client = make_client(json.dumps({"title": "Rain"}))
+
+        for _ in range(2):
+            result = cached_json_completion(
+                client, cache, model="gpt-4o-mini", temperature=0.4,
+                system_prompt="sys", user_prompt="user", agent="metadata",
+                validate=lambda value: "tags" in value,
+            )
+
+        assert result == {"title": "Rain"}
+        assert client.chat.completions.create.call_count == 2
+
+
+class TestDefaultCache:
+    """Tests for the cache agents use when none is passed."""
+
+    def test_bare_agent_never_reuses_responses_on_real_runs(self) -> None:
+        """Test that two real runs of a bare MetadataAgent both call the API."""
+        client = make_client(json.dumps({"title": "Rain", "description": "d", "tags": ["rain"]}))
+        concept = {"ambience": "rain", "mood": "calm", "duration": "3h"}
+
+        with patch("agents.llm_cache.DRY_RUN", False), \
+             patch("agents.metadata_agent.get_openai_client", return_value=client):
+            for _ in range(2):
+                MetadataAgent().generate(concept)
+
+        assert client.chat.completions.create.call_count == 2
+
+    def test_dry_runs_share_the_cache(self) -> None:
+        """Test that the default cache is only enabled for dry runs."""
+        with patch("agents.llm_cache.DRY_RUN", True):
+            assert not default_cache().bypass
+        with patch("agents.llm_cache.DRY_RUN", False):
+            assert default_cache().bypass
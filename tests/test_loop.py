@@ -1,3 +1,4 @@
+import json
 import os
 import subprocess
 from pathlib import Path
@@ -5,7 +6,8 @@ from unittest.mock import MagicMock, patch, mock_open
 
 import pytest
 
-from utils.loop import get_video_duration, loop_video
+from utils.loop import choose_strategy, get_video_duration, loop_video, validate_loop_seams
+from utils.probe import MediaInfo
 
 
 class TestGetVideoDuration:
@@ -16,7 +18,7 @@ class TestGetVideoDuration:
         with patch("subprocess.run") as mock_run:
             mock_run.return_value = MagicMock(
                 returncode=0,
-                stdout="123.456\n",
+                stdout='{"format": {"duration": "123.456"}}\n',
                 stderr=""
             )
             duration = get_video_duration("/test/video.mp4")
@@ -28,11 +30,11 @@ class TestGetVideoDuration:
         assert "/test/video.mp4" in args
 
     def test_strips_whitespace_from_output(self) -> None:
-        """Test that whitespace is stripped from ffprobe output."""
+        """Test that whitespace around the ffprobe JSON is ignored."""
         with patch("subprocess.run") as mock_run:
             mock_run.return_value = MagicMock(
                 returncode=0,
-                stdout="  60.0  \n\n",
+                stdout='  {"format": {"duration": "60.0"}}  \n\n',
                 stderr=""
             )
             duration = get_video_duration("/test/video.mp4")
@@ -68,7 +70,7 @@ class TestGetVideoDuration:
         with patch("subprocess.run") as mock_run:
             mock_run.return_value = MagicMock(
                 returncode=0,
-                stdout="not_a_number",
+                stdout='{"format": {"duration": "not_a_number"}}',
                 stderr=""
             )
 
@@ -204,3 +206,91 @@ class TestLoopVideo:
         assert "-c" in args
         c_index = args.index("-c")
         assert args[c_index + 1] == "copy"
+
+
+class TestLoopStrategies:
+    """Tests for strategy selection and the long-target strategies."""
+
+    def test_short_lists_use_concat(self) -> None:
+        """Test that up to CONCAT_MAX_LOOPS repeats are concatenated without probing."""
+        with patch("utils.loop.probe") as mock_probe:
+            assert choose_strategy("/test/video.mp4", 120) == "concat"
+
+        mock_probe.assert_not_called()
+
+    def test_long_targets_use_stream_loop(self) -> None:
+        """Test that clips without B-frames are repeated with -stream_loop."""
+        with patch("utils.loop.probe", return_value=MediaInfo("/test/video.mp4", has_b_frames=False)):
+            assert choose_strategy("/test/video.mp4", 7200) == "stream_loop"
+
+    def test_b_frames_use_doubling(self) -> None:
+        """Test that clips with B-frames are doubled instead."""
+        with patch("utils.loop.probe", return_value=MediaInfo("/test/video.mp4", has_b_frames=True)):
+            assert choose_strategy("/test/video.mp4", 7200) == "doubling"
+
+    def test_stream_loop_is_one_demuxer(self, tmp_path: Path) -> None:
+        """Test that -stream_loop repeats the clip in a single ffmpeg call."""
+        with patch("utils.loop.get_video_duration", return_value=5.0), \
+             patch("subprocess.run") as mock_run:
+            loop_video("/test/video.mp4", str(tmp_path / "out.mp4"), 10, strategy="stream_loop")
+
+        mock_run.assert_called_once()
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-stream_loop") + 1] == "7199"
+        assert args[args.index("-t") + 1] == "36000"
+        assert mock_run.call_args[1]["capture_output"] is True
+
+    def test_doubling_keeps_concat_lists_short(self, tmp_path: Path) -> None:
+        """Test that doubling builds intermediates and cleans them up."""
+        list_lengths: list[int] = []
+
+        def capture(cmd: list[str], **kwargs: object) -> None:
+            with open(cmd[cmd.index("-i") + 1]) as f:
+                list_lengths.append(len(f.read().splitlines()))
+
+        with patch("utils.loop.get_video_duration", return_value=5.0), \
+             patch("subprocess.run", side_effect=capture):
+            loop_video("/test/video.mp4", str(tmp_path / "out.mp4"), 12, strategy="doubling")
+
+        # 8640 loops: doubled 7 times to 128 copies, then 68 of those
+        assert list_lengths == [2] * 7 + [68]
+        assert list(tmp_path.iterdir()) == []
+
+    def test_unknown_strategy_raises(self, tmp_path: Path) -> None:
+        """Test that an unknown strategy is rejected."""
+        with patch("utils.loop.get_video_duration", return_value=5.0):
+            with pytest.raises(ValueError, match="Unknown loop strategy"):
+                loop_video("/test/video.mp4", str(tmp_path / "out.mp4"), 1, strategy="magic")
+
+
+def packets(times: list[float]) -> MagicMock:
+    """ffprobe result listing video packets with the given decode times."""
+    stdout = json.dumps({"packets": [{"dts_time": f"{t:.6f}"} for t in times]})
+    return MagicMock(returncode=0, stdout=stdout, stderr="")
+
+
+class TestValidateLoopSeams:
+    """Tests for validate_loop_seams."""
+
+    def test_accepts_continuous_timestamps(self) -> None:
+        """Test that evenly spaced timestamps across the seam pass."""
+        with patch("subprocess.run", return_value=packets([4.0 + i / 24 for i in range(48)])) as mock_run:
+            validate_loop_seams("/test/looped.mp4", 5.0)
+
+        assert mock_run.call_count == 3
+
+    def test_rejects_gap(self) -> None:
+        """Test that a jump in timestamps at the seam is reported."""
+        times = [4.0 + i / 24 for i in range(24)] + [5.5 + i / 24 for i in range(24)]
+
+        with patch("subprocess.run", return_value=packets(times)):
+            with pytest.raises(RuntimeError, match="discontinuity at the 5.00s seam"):
+                validate_loop_seams("/test/looped.mp4", 5.0)
+
+    def test_rejects_overlap(self) -> None:
+        """Test that timestamps that go backwards at the seam are reported."""
+        times = [4.0 + i / 24 for i in range(24)] + [4.9 + i / 24 for i in range(24)]
+
+        with patch("subprocess.run", return_value=packets(times)):
+            with pytest.raises(RuntimeError, match="discontinuity"):
+                validate_loop_seams("/test/looped.mp4", 5.0)
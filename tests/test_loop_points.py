@@ -0,0 +1,77 @@
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from utils.loop_points import analyze_loop_points, find_loop_points
+
+SAMPLE_RATE = 48000
+PERIOD = 37.0
+
+
+def repeating_clip(seconds: float = 190.0, fade_seconds: float = 10.0) -> np.ndarray:
+    """Stereo noise with a slow swell that repeats every PERIOD seconds, then fades out."""
+    rng = np.random.default_rng(0)
+    frames = int(PERIOD * SAMPLE_RATE)
+    swell = (1.0 + 0.5 * np.sin(np.linspace(0.0, 6 * np.pi, frames)))[:, None]
+    segment = (rng.standard_normal((frames, 2)) * 0.1 * swell).astype(np.float32)
+
+    clip = np.tile(segment, (int(np.ceil(seconds / PERIOD)), 1))[:int(seconds * SAMPLE_RATE)]
+    fade = int(fade_seconds * SAMPLE_RATE)
+    clip[-fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)[:, None]
+    return clip
+
+
+class TestFindLoopPoints:
+    """Tests for find_loop_points."""
+
+    def test_finds_whole_periods_of_repeating_audio(self) -> None:
+        """Test that a clip that repeats is looped on an exact multiple of its period."""
+        points = find_loop_points(repeating_clip(), SAMPLE_RATE)
+
+        # The crossfaded stretch before loop_end replaces the one after loop_start
+        length = points["loop_end"] - points["crossfade"] - points["loop_start"]
+        periods = length / PERIOD
+        assert round(periods) >= 1
+        assert abs(periods - round(periods)) * PERIOD < 0.001
+
+    def test_avoids_fade_out(self) -> None:
+        """Test that the seam is taken from before the clip fades out."""
+        points = find_loop_points(repeating_clip(), SAMPLE_RATE)
+
+        assert points["loop_end"] <= 180.0
+        assert points["loop_start"] >= 0.0
+
+    def test_respects_minimum_loop_length(self) -> None:
+        """Test that the loop is never shorter than requested."""
+        points = find_loop_points(repeating_clip(), SAMPLE_RATE, min_loop_seconds=60.0)
+
+        assert points["loop_end"] - points["loop_start"] >= 60.0
+
+    def test_short_clip_raises(self) -> None:
+        """Test that a clip shorter than the minimum loop is rejected."""
+        with pytest.raises(ValueError, match="too short"):
+            find_loop_points(np.zeros((10 * SAMPLE_RATE, 2), dtype=np.float32), SAMPLE_RATE)
+
+    def test_analyzes_190s_clip_quickly(self) -> None:
+        """Test that a 190s stereo clip is analyzed in well under a second."""
+        clip = repeating_clip()
+
+        started = time.perf_counter()
+        find_loop_points(clip, SAMPLE_RATE)
+
+        assert time.perf_counter() - started < 1.0
+
+
+class TestAnalyzeLoopPoints:
+    """Tests for analyze_loop_points."""
+
+    def test_decodes_and_reports(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that the file is decoded at the analysis rate and the result printed."""
+        with patch("utils.loop_points.decode_pcm", return_value=repeating_clip()) as mock_decode:
+            points = analyze_loop_points("/test/audio.mp3")
+
+        mock_decode.assert_called_once_with("/test/audio.mp3", SAMPLE_RATE)
+        assert points["loop_end"] > points["loop_start"]
+        assert "[LOOP POINTS]" in capsys.readouterr().out
@@ -0,0 +1,116 @@
+import math
+import random
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from utils.mixer import Stem, detuned_lengths, mix_stems
+
+SAMPLE_RATE = 1000
+
+
+class FakeEncoder:
+    """Collects the mix instead of running ffmpeg."""
+    instances: list["FakeEncoder"] = []
+
+    def __init__(self, output_path: str, sample_rate: int, **kwargs: Any) -> None:
+        self.blocks: list[np.ndarray] = []
+        FakeEncoder.instances.append(self)
+
+    def __enter__(self) -> "FakeEncoder":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+    def write(self, block: np.ndarray) -> None:
+        self.blocks.append(block.copy())
+
+
+def noise(seconds: float, seed: int) -> np.ndarray:
+    """Uncorrelated stereo noise at SAMPLE_RATE."""
+    rng = np.random.default_rng(seed)
+    return (rng.random((int(seconds * SAMPLE_RATE), 2), dtype=np.float32) - 0.5) * 0.2
+
+
+def render(stems: dict[str, np.ndarray], seconds: float, seed: int = 1) -> np.ndarray:
+    """Run mix_stems on in-memory stems and return the mixed samples."""
+    FakeEncoder.instances = []
+    with patch("utils.mixer.decode_pcm", side_effect=lambda path, rate: stems[path]), \
+         patch("utils.mixer.PcmEncoder", FakeEncoder):
+        mix_stems([Stem(path) for path in stems], "out.mp3", seconds,
+                  crossfade_seconds=1.0, seed=seed, sample_rate=SAMPLE_RATE)
+    return np.concatenate(FakeEncoder.instances[0].blocks)
+
+
+class TestDetunedLengths:
+    """Tests for detuned_lengths."""
+
+    def test_lengths_are_pairwise_coprime(self) -> None:
+        """Test that no two loop lengths share a factor, even for equal inputs."""
+        lengths = detuned_lengths([120_000] * 4, random.Random(0))
+
+        for i, a in enumerate(lengths):
+            for b in lengths[i + 1:]:
+                assert math.gcd(a, b) == 1
+
+    def test_first_length_is_kept(self) -> None:
+        """Test that the first layer keeps its full length."""
+        assert detuned_lengths([120_000, 90_000], random.Random(0))[0] == 120_000
+
+    def test_trim_is_bounded(self) -> None:
+        """Test that no layer loses more than the maximum trim fraction."""
+        lengths = detuned_lengths([100_000] * 4, random.Random(0), max_trim_fraction=0.2)
+
+        assert all(length >= 79_000 for length in lengths)
+
+
+class TestMixStems:
+    """Tests for mix_stems."""
+
+    def test_output_has_target_length(self) -> None:
+        """Test that exactly the requested duration is written."""
+        mixed = render({"rain": noise(10, 1), "fire": noise(10, 2)}, seconds=95.5)
+
+        assert len(mixed) == 95_500
+
+    def test_mix_does_not_repeat_with_single_stem_period(self) -> None:
+        """Test that the mix differs one stem period later."""
+        rain = noise(10, 1)
+        mixed = render({"rain": rain, "fire": noise(10, 2)}, seconds=60)
+
+        period = len(rain) - SAMPLE_RATE  # rain keeps its length minus one crossfade
+        window = slice(5_000, 6_000)
+        later = slice(5_000 + period, 6_000 + period)
+        assert not np.allclose(mixed[window], mixed[later], atol=1e-3)
+
+    def test_single_stem_loops_exactly(self) -> None:
+        """Test that one stem repeats exactly with its own period, up to automation gain."""
+        rain = noise(10, 1)
+        mixed = render({"rain": rain}, seconds=30)
+
+        period = len(rain) - SAMPLE_RATE
+        a = mixed[1_000:1_100, 0]
+        b = mixed[1_000 + period:1_100 + period, 0]
+        ratio = b / a
+        np.testing.assert_allclose(ratio, ratio.mean(), rtol=0.05)
+
+    def test_seed_makes_mix_reproducible(self) -> None:
+        """Test that the same seed gives the same mix."""
+        stems = {"rain": noise(10, 1), "wind": noise(8, 3)}
+
+        np.testing.assert_array_equal(render(stems, 20, seed=7), render(stems, 20, seed=7))
+
+    def test_requires_stems(self, tmp_path: Path) -> None:
+        """Test that an empty stem list is rejected."""
+        with pytest.raises(ValueError, match="at least one stem"):
+            mix_stems([], str(tmp_path / "out.mp3"), 60.0)
+
+    def test_empty_stem_raises(self) -> None:
+        """Test that a stem that decodes to nothing is rejected by name."""
+        with pytest.raises(ValueError, match="silent.mp3 decoded to no audio"):
+            render({"rain": noise(10, 1), "silent.mp3": np.zeros((0, 2), dtype=np.float32)}, 20)
+
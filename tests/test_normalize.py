@@ -0,0 +1,79 @@
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from utils.normalize import normalize_args, normalize_clip, normalized_path
+from utils.probe import MediaInfo
+
+
+def fake_ffmpeg(cmd: list[str], **kwargs: Any) -> None:
+    """Write the output file ffmpeg would produce."""
+    Path(cmd[-1]).write_bytes(b"normalized")
+
+
+class TestNormalizeArgs:
+    """Tests for normalize_args."""
+
+    def test_loop_friendly_encoding(self) -> None:
+        """Test closed GOPs, no B-frames, a fixed timescale and no edit list."""
+        args = normalize_args(Fraction(6))
+
+        assert args[args.index("-bf") + 1] == "0"
+        assert args[args.index("-g") + 1] == "12"
+        assert args[args.index("-flags") + 1] == "+cgop"
+        assert args[args.index("-video_track_timescale") + 1] == "90000"
+        assert args[args.index("-use_editlist") + 1] == "0"
+        assert "fps=6,format=yuv420p" in args
+
+    def test_ntsc_rate_is_exact(self) -> None:
+        """Test that a fractional rate is passed as an exact fraction."""
+        assert "fps=30000/1001,format=yuv420p" in normalize_args(Fraction(30000, 1001))
+
+
+class TestNormalizeClip:
+    """Tests for normalize_clip."""
+
+    def test_encodes_once_per_content(self, tmp_path: Path) -> None:
+        """Test that a second call with the same clip reuses the cached result."""
+        clip = tmp_path / "base.mp4"
+        clip.write_bytes(b"clip")
+        cache = str(tmp_path / "cache")
+
+        with patch("utils.normalize.probe", return_value=MediaInfo(str(clip), fps=6.0)), \
+             patch("subprocess.run", side_effect=fake_ffmpeg) as mock_run:
+            first = normalize_clip(str(clip), cache_dir=cache)
+            second = normalize_clip(str(clip), cache_dir=cache)
+
+        mock_run.assert_called_once()
+        assert first == second
+        assert Path(first).read_bytes() == b"normalized"
+
+    def test_cache_key_follows_content_and_rate(self, tmp_path: Path) -> None:
+        """Test that changed content or frame rate gives a new cache entry."""
+        clip = tmp_path / "base.mp4"
+        clip.write_bytes(b"clip")
+        original = normalized_path(str(clip), Fraction(6), str(tmp_path))
+
+        assert normalized_path(str(clip), Fraction(24), str(tmp_path)) != original
+        clip.write_bytes(b"other clip")
+        assert normalized_path(str(clip), Fraction(6), str(tmp_path)) != original
+
+    def test_failed_encode_leaves_nothing_behind(self, tmp_path: Path) -> None:
+        """Test that a failed encode is neither cached nor left as a partial file."""
+        clip = tmp_path / "base.mp4"
+        clip.write_bytes(b"clip")
+        cache = tmp_path / "cache"
+
+        def failing_ffmpeg(cmd: list[str], **kwargs: Any) -> None:
+            fake_ffmpeg(cmd)
+            raise subprocess.CalledProcessError(1, "ffmpeg")
+
+        with patch("subprocess.run", side_effect=failing_ffmpeg):
+            with pytest.raises(subprocess.CalledProcessError):
+                normalize_clip(str(clip), fps=6.0, cache_dir=str(cache))
+
+        assert list(cache.iterdir()) == []
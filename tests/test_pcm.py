@@ -0,0 +1,241 @@
+import io
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from utils.pcm import (
+    PcmEncoder,
+    apply_gain,
+    crossfade,
+    db_to_gain,
+    decode_pcm,
+    equal_power_curves,
+    iter_pcm_blocks,
+    loop_audio_pcm,
+    make_loop_unit,
+    mix,
+    write_looped,
+)
+from utils.probe import probe
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None,
+    reason="ffmpeg not installed"
+)
+
+
+def ramp(frames: int, channels: int = 2) -> np.ndarray:
+    """Stereo test signal whose value is its frame index."""
+    return np.repeat(np.arange(frames, dtype=np.float32)[:, None], channels, axis=1)
+
+
+class FakeEncoder:
+    """Collects written blocks instead of running ffmpeg."""
+
+    def __init__(self) -> None:
+        self.blocks: list[np.ndarray] = []
+
+    def write(self, block: np.ndarray) -> None:
+        self.blocks.append(block.copy())
+
+
+class TestMixing:
+    """Tests for gain, mixing and crossfade helpers."""
+
+    def test_equal_power_curves_keep_power_constant(self) -> None:
+        """Test that fade curves' squares sum to one everywhere."""
+        fade_out, fade_in = equal_power_curves(1000)
+
+        np.testing.assert_allclose(fade_out ** 2 + fade_in ** 2, 1.0, atol=1e-6)
+        assert fade_out[0] > 0.99 and fade_in[-1] > 0.99
+
+    def test_crossfade_moves_from_outgoing_to_incoming(self) -> None:
+        """Test that a crossfade starts on the outgoing and ends on the incoming block."""
+        outgoing = np.ones((480, 2), dtype=np.float32)
+        incoming = -np.ones((480, 2), dtype=np.float32)
+
+        result = crossfade(outgoing, incoming)
+
+        assert result[0, 0] > 0.99
+        assert result[-1, 0] < -0.99
+
+    def test_db_to_gain(self) -> None:
+        """Test decibel conversion."""
+        assert db_to_gain(0.0) == 1.0
+        assert abs(db_to_gain(-6.0) - 0.501) < 0.001
+
+    def test_apply_gain_curve(self) -> None:
+        """Test that a per-frame gain curve scales each frame."""
+        block = np.ones((4, 2), dtype=np.float32)
+
+        result = apply_gain(block, np.array([0.0, 0.5, 1.0, 2.0]))
+
+        np.testing.assert_allclose(result[:, 1], [0.0, 0.5, 1.0, 2.0])
+
+    def test_mix_sums_with_gains(self) -> None:
+        """Test that mix sums blocks after applying their gains."""
+        a = np.full((4, 2), 0.5, dtype=np.float32)
+        b = np.full((4, 2), 0.25, dtype=np.float32)
+
+        np.testing.assert_allclose(mix([a, b], [1.0, 2.0]), 1.0)
+
+
+class TestLoopUnit:
+    """Tests for make_loop_unit and write_looped."""
+
+    def test_unit_length(self) -> None:
+        """Test that the unit is the region minus one crossfade."""
+        assert len(make_loop_unit(ramp(1000), 100)) == 900
+
+    def test_unit_wraps_seamlessly(self) -> None:
+        """Test that the unit ends on the frame just before where it starts."""
+        samples = ramp(1000)
+
+        unit = make_loop_unit(samples, 100)
+
+        assert unit[0, 0] == 100
+        assert abs(unit[-1, 0] - 99) < 1e-3
+
+    def test_unit_respects_loop_points(self) -> None:
+        """Test that loop_start and loop_end bound the unit."""
+        unit = make_loop_unit(ramp(1000), 50, loop_start=200, loop_end=800)
+
+        assert len(unit) == 550
+        assert unit[0, 0] == 250
+
+    def test_region_too_short_raises(self) -> None:
+        """Test that a region shorter than two crossfades is rejected."""
+        with pytest.raises(ValueError, match="too short"):
+            make_loop_unit(ramp(100), 60)
+
+    def test_write_looped_writes_exact_frame_count(self) -> None:
+        """Test that repeated units are cut at the requested length."""
+        encoder = FakeEncoder()
+        unit = ramp(300)
+
+        write_looped(encoder, unit, 1000, block_frames=128)  # type: ignore[arg-type]
+
+        written = np.concatenate(encoder.blocks)
+        assert len(written) == 1000
+        np.testing.assert_array_equal(written[:, 0], np.arange(1000) % 300)
+        assert max(len(block) for block in encoder.blocks) <= 128
+
+
+class TestLoopAudioPcm:
+    """Tests for loop_audio_pcm."""
+
+    def test_loop_points_bound_the_unit(self, tmp_path: Path) -> None:
+        """Test that loop points choose the looped region and crossfade."""
+        encoder = FakeEncoder()
+        points = {"loop_start": 0.2, "loop_end": 0.8, "crossfade": 0.05, "score": 0.0}
+
+        with patch("utils.pcm.decode_pcm", return_value=ramp(1000)), \
+             patch("utils.pcm.PcmEncoder") as mock_encoder:
+            mock_encoder.return_value.__enter__.return_value = encoder
+            loop_audio_pcm("in.mp3", str(tmp_path / "out.mp3"), 2.0,
+                           sample_rate=1000, loop_points=points)  # type: ignore[arg-type]
+
+        written = np.concatenate(encoder.blocks)[:, 0]
+        assert len(written) == 2000
+        # Unit runs from loop_start + crossfade to loop_end: 550 frames
+        assert written[0] == 250
+        assert written[550] == 250
+
+
+class TestPcmEncoder:
+    """Tests for PcmEncoder."""
+
+    def test_streams_float32_into_ffmpeg(self, tmp_path: Path) -> None:
+        """Test that blocks are clipped and piped to ffmpeg as f32le."""
+        proc = MagicMock()
+        proc.wait.return_value = 0
+        proc.stderr = io.BytesIO()
+
+        with patch("subprocess.Popen", return_value=proc) as mock_popen:
+            with PcmEncoder(str(tmp_path / "out.mp3")) as encoder:
+                encoder.write(np.full((10, 2), 2.0, dtype=np.float32))
+
+        args = mock_popen.call_args[0][0]
+        assert args[args.index("-f") + 1] == "f32le"
+        written = np.frombuffer(proc.stdin.write.call_args[0][0], dtype=np.float32)
+        assert written.max() == 1.0
+        assert encoder.frames_written == 10
+        proc.stdin.close.assert_called_once()
+
+    def test_raises_when_encoder_fails(self, tmp_path: Path) -> None:
+        """Test that a failing encoder raises RuntimeError."""
+        proc = MagicMock()
+        proc.wait.return_value = 1
+        proc.stderr = io.BytesIO(b"bad codec")
+
+        with patch("subprocess.Popen", return_value=proc):
+            with pytest.raises(RuntimeError, match="bad codec"):
+                with PcmEncoder(str(tmp_path / "out.mp3")):
+                    pass
+
+    def test_broken_pipe_reports_encoder_error(self, tmp_path: Path) -> None:
+        """Test that an encoder exiting mid-stream raises with its stderr instead of BrokenPipeError."""
+        proc = MagicMock()
+        proc.wait.return_value = 1
+        proc.stderr = io.BytesIO(b"Invalid sample rate")
+        proc.stdin.write.side_effect = BrokenPipeError
+
+        with patch("subprocess.Popen", return_value=proc):
+            with pytest.raises(RuntimeError, match="Invalid sample rate"):
+                with PcmEncoder(str(tmp_path / "out.mp3")) as encoder:
+                    encoder.write(np.zeros((10, 2), dtype=np.float32))
+
+
+class TestIterPcmBlocks:
+    """Tests for iter_pcm_blocks."""
+
+    def test_drains_stderr_while_decoding(self) -> None:
+        """Test that a chatty decoder's stderr is read as it arrives and its tail reported."""
+        proc = MagicMock()
+        proc.stdout = io.BytesIO(np.zeros((8, 2), dtype=np.float32).tobytes())
+        proc.stderr = io.BytesIO(b"warning\n" * 20000 + b"fatal: bad packet")
+        proc.wait.return_value = 1
+
+        with patch("subprocess.Popen", return_value=proc):
+            with pytest.raises(RuntimeError, match="bad packet") as error:
+                list(iter_pcm_blocks("/test/audio.mp3"))
+
+        assert len(str(error.value)) < 5000
+
+
+@requires_ffmpeg
+class TestPcmIntegration:
+    """Integration tests for the PCM engine with real ffmpeg."""
+
+    def test_decode_blocks_have_fixed_size(self, tmp_path: Path) -> None:
+        """Test that decoding yields full blocks except for the last one."""
+        source = tmp_path / "tone.wav"
+        subprocess.run([
+            "ffmpeg", "-y", "-f", "lavfi",
+            "-i", "sine=frequency=440:duration=2:sample_rate=48000",
+            str(source)
+        ], check=True, capture_output=True)
+
+        blocks = list(iter_pcm_blocks(str(source), block_frames=4096))
+
+        assert all(len(block) == 4096 for block in blocks[:-1])
+        assert sum(len(block) for block in blocks) == 96000
+
+    def test_loop_reaches_target_duration(self, tmp_path: Path) -> None:
+        """Test that the looped output has the requested duration."""
+        source = tmp_path / "tone.wav"
+        subprocess.run([
+            "ffmpeg", "-y", "-f", "lavfi",
+            "-i", "sine=frequency=440:duration=4",
+            str(source)
+        ], check=True, capture_output=True)
+        output = tmp_path / "looped.mp3"
+
+        loop_audio_pcm(str(source), str(output), 30.0, crossfade_seconds=1.0)
+
+        assert abs((probe(str(output)).duration or 0) - 30.0) < 0.2
+        assert len(decode_pcm(str(output))) > 0
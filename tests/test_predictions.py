@@ -0,0 +1,267 @@
+import asyncio
+import json
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Iterator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from agents.sound_agent import SoundAgent
+from audio_backends.mock import MockAudioBackend
+from audio_backends.replicate import MAX_DURATION_SECONDS, ReplicateAudioBackend
+from utils.predictions import (
+    CompletedPrediction,
+    PredictionHandle,
+    PredictionJournal,
+    ReplicatePrediction,
+    gather_predictions,
+    output_url,
+    submit_replicate,
+)
+from video_backends.mock import MockVideoBackend
+
+
+@contextmanager
+def patch_replicate() -> Iterator[MagicMock]:
+    """Replace the shared Replicate client with a mock."""
+    with patch("utils.predictions.get_replicate_client") as mock_get_client:
+        yield mock_get_client.return_value
+
+
+class FakePrediction:
+    """Replicate Prediction stand-in that advances one status per reload()."""
+
+    def __init__(self, statuses: list[str], output: Any = "https://replicate.delivery/out.mp4") -> None:
+        self.id = "pred123"
+        self.statuses = list(statuses)
+        self.status = self.statuses.pop(0)
+        self.output = output
+        self.error = "boom"
+        self.reloads = 0
+
+    def reload(self) -> None:
+        self.reloads += 1
+        if self.statuses:
+            self.status = self.statuses.pop(0)
+
+
+class CountingHandle(PredictionHandle):
+    """Handle that finishes after a fixed number of polls."""
+
+    def __init__(self, polls_needed: int, result: str) -> None:
+        self.polls_needed = polls_needed
+        self.result = result
+        self.polls = 0
+
+    def poll(self) -> str | None:
+        self.polls += 1
+        return self.result if self.polls >= self.polls_needed else None
+
+
+class TestReplicatePrediction:
+    """Tests for ReplicatePrediction handle."""
+
+    def test_poll_returns_none_while_running(self) -> None:
+        """Test that an unfinished prediction polls as None."""
+        handle = ReplicatePrediction(FakePrediction(["starting", "processing"]))  # type: ignore[arg-type]
+
+        assert handle.poll() is None
+
+    def test_wait_returns_output_url(self) -> None:
+        """Test that wait polls until success and returns the URL."""
+        prediction = FakePrediction(["starting", "processing", "processing", "succeeded"])
+        handle = ReplicatePrediction(prediction)  # type: ignore[arg-type]
+
+        with patch("utils.predictions.time.sleep"):
+            assert handle.wait() == "https://replicate.delivery/out.mp4"
+        assert prediction.reloads == 3
+
+    def test_failed_prediction_raises(self) -> None:
+        """Test that a failed prediction raises RuntimeError."""
+        handle = ReplicatePrediction(FakePrediction(["starting", "failed"]))  # type: ignore[arg-type]
+
+        with patch("utils.predictions.time.sleep"), pytest.raises(RuntimeError, match="failed"):
+            handle.wait()
+
+    def test_backoff_grows_until_status_changes(self) -> None:
+        """Test that the poll interval grows while idle and resets on change."""
+        prediction = FakePrediction(["starting", "starting", "starting", "processing", "processing", "succeeded"])
+        handle = ReplicatePrediction(prediction)  # type: ignore[arg-type]
+
+        with patch("utils.predictions.time.sleep") as mock_sleep:
+            handle.wait()
+
+        delays = [c.args[0] for c in mock_sleep.call_args_list]
+        assert delays[1] > delays[0]
+        assert delays[3] == delays[0]  # reset after starting -> processing
+
+
+class TestOutputUrl:
+    """Tests for output_url function."""
+
+    def test_plain_url(self) -> None:
+        """Test that a string output is returned unchanged."""
+        assert output_url("https://x/a.mp3") == "https://x/a.mp3"
+
+    def test_list_output_uses_first(self) -> None:
+        """Test that a list output yields its first URL."""
+        assert output_url(["https://x/a.mp3", "https://x/b.mp3"]) == "https://x/a.mp3"
+
+    def test_file_output_uses_url_attribute(self) -> None:
+        """Test that FileOutput-like objects yield their url."""
+        assert output_url(SimpleNamespace(url="https://x/c.mp4")) == "https://x/c.mp4"
+
+
+class TestWaitAll:
+    """Tests for awaiting several predictions at once."""
+
+    def test_gathers_results_in_order(self) -> None:
+        """Test that results come back in handle order."""
+        handles: list[PredictionHandle] = [CountingHandle(3, "video"), CountingHandle(1, "audio")]
+
+        with patch("utils.predictions.INITIAL_POLL_SECONDS", 0.0):
+            assert gather_predictions(handles) == ["video", "audio"]
+
+    def test_completed_prediction_needs_no_polling(self) -> None:
+        """Test that a completed handle resolves immediately."""
+        assert CompletedPrediction("done").wait() == "done"
+
+
+class TestBackendAsyncSurface:
+    """Tests for the submit/generate_async surface on backends."""
+
+    def test_mock_backends_work_through_async_api(self) -> None:
+        """Test that mock backends can be awaited together."""
+        async def run() -> list[str]:
+            return list(await asyncio.gather(
+                MockVideoBackend().generate_async(image_path="img.png", video_prompt="p"),
+                MockAudioBackend().generate_async(audio_prompt="p", duration_seconds=120.0),
+            ))
+
+        assert asyncio.run(run()) == ["assets/mock/mock_video.mp4", "assets/mock/mock_audio.mp3"]
+
+    def test_replicate_audio_submit_does_not_wait(self, tmp_path: Path) -> None:
+        """Test that submit creates a prediction and returns without polling."""
+        prediction = FakePrediction(["starting"])
+
+        with patch("utils.predictions.JOURNAL_PATH", str(tmp_path / "journal.json")), \
+             patch_replicate() as mock_replicate:
+            mock_create = mock_replicate.models.predictions.create
+            mock_create.return_value = prediction
+            handle = ReplicateAudioBackend().submit(audio_prompt="rain", duration_seconds=500.0)
+
+        assert prediction.reloads == 0
+        assert mock_create.call_args.kwargs["input"]["seconds_total"] == MAX_DURATION_SECONDS
+        assert isinstance(handle, ReplicatePrediction)
+
+    def test_sound_agent_submits_all_stems_before_waiting(self) -> None:
+        """Test that stems are all submitted up front with differing durations."""
+        backend = MagicMock()
+        backend.submit.side_effect = lambda audio_prompt, duration_seconds: CompletedPrediction(audio_prompt)
+
+        with patch.object(SoundAgent, "_save", side_effect=lambda url, filename: filename):
+            paths = SoundAgent(backend=backend).run_stems(["rain", "fire", "wind"], filename_prefix="cabin")
+
+        assert paths == ["cabin_stem0.mp3", "cabin_stem1.mp3", "cabin_stem2.mp3"]
+        durations = [c.kwargs["duration_seconds"] for c in backend.submit.call_args_list]
+        assert len(set(durations)) == 3
+
+
+class TestPredictionJournal:
+    """Tests for reattaching to journaled predictions."""
+
+    def test_records_prediction_id_on_submit(self, tmp_path: Path) -> None:
+        """Test that the prediction ID is journaled before waiting."""
+        journal = PredictionJournal(str(tmp_path / "journal.json"))
+
+        with patch_replicate() as mock_replicate:
+            mock_replicate.models.predictions.create.return_value = FakePrediction(["starting"])
+            submit_replicate("owner/model", {"prompt": "rain"}, journal=journal)
+
+        entry = journal.get(journal.job_key("owner/model", {"prompt": "rain"}))
+        assert entry is not None
+        assert entry["id"] == "pred123"
+
+    def test_concurrent_journals_keep_every_entry(self, tmp_path: Path) -> None:
+        """Test that separate instances writing one file at once lose no entries."""
+        path = str(tmp_path / "journal.json")
+
+        def record(index: int) -> None:
+            PredictionJournal(path).record(f"key{index}", f"pred{index}", "owner/model")
+
+        threads = [threading.Thread(target=record, args=(index,)) for index in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(json.loads(Path(path).read_text())) == 16
+        assert [p.name for p in tmp_path.iterdir()] == ["journal.json"]
+
+    def test_reattaches_to_running_prediction(self, tmp_path: Path) -> None:
+        """Test that a restart reuses a still-running prediction."""
+        journal = PredictionJournal(str(tmp_path / "journal.json"))
+        journal.record(journal.job_key("owner/model", {"prompt": "rain"}), "pred123", "owner/model")
+
+        with patch_replicate() as mock_replicate:
+            mock_replicate.predictions.get.return_value = FakePrediction(["processing"])
+            handle = submit_replicate("owner/model", {"prompt": "rain"}, journal=journal)
+
+        mock_replicate.models.predictions.create.assert_not_called()
+        mock_replicate.predictions.get.assert_called_once_with("pred123")
+        assert handle.id == "pred123"
+
+    def test_reuses_recent_finished_output(self, tmp_path: Path) -> None:
+        """Test that a recently succeeded prediction's output is reused."""
+        journal = PredictionJournal(str(tmp_path / "journal.json"))
+        journal.record(journal.job_key("owner/model", {"prompt": "rain"}), "pred123", "owner/model")
+
+        with patch_replicate() as mock_replicate:
+            mock_replicate.predictions.get.return_value = FakePrediction(["succeeded"])
+            handle = submit_replicate("owner/model", {"prompt": "rain"}, journal=journal)
+
+        mock_replicate.models.predictions.create.assert_not_called()
+        assert handle.poll() == "https://replicate.delivery/out.mp4"
+
+    def test_failed_prediction_is_resubmitted(self, tmp_path: Path) -> None:
+        """Test that a journaled failure leads to a fresh submission."""
+        journal = PredictionJournal(str(tmp_path / "journal.json"))
+        key = journal.job_key("owner/model", {"prompt": "rain"})
+        journal.record(key, "old", "owner/model")
+
+        with patch_replicate() as mock_replicate:
+            mock_replicate.predictions.get.return_value = FakePrediction(["failed"])
+            fresh = FakePrediction(["starting"])
+            fresh.id = "new"
+            mock_replicate.models.predictions.create.return_value = fresh
+            handle = submit_replicate("owner/model", {"prompt": "rain"}, journal=journal)
+
+        assert handle.id == "new"
+        assert journal.get(key)["id"] == "new"  # type: ignore[index]
+
+    def test_expired_output_is_resubmitted(self, tmp_path: Path) -> None:
+        """Test that an old succeeded prediction is not reused."""
+        journal = PredictionJournal(str(tmp_path / "journal.json"))
+        key = journal.job_key("owner/model", {"prompt": "rain"})
+        with patch("utils.predictions.time.time", return_value=0.0):
+            journal.record(key, "old", "owner/model")
+
+        with patch_replicate() as mock_replicate:
+            mock_replicate.predictions.get.return_value = FakePrediction(["succeeded"])
+            mock_replicate.models.predictions.create.return_value = FakePrediction(["starting"])
+            submit_replicate("owner/model", {"prompt": "rain"}, journal=journal)
+
+        mock_replicate.models.predictions.create.assert_called_once()
+
+    def test_key_uses_file_content(self, tmp_path: Path) -> None:
+        """Test that a regenerated image with new content is a new job."""
+        image = tmp_path / "master.png"
+        image.write_bytes(b"first image")
+        first = PredictionJournal.job_key("owner/model", {"image": str(image)})
+
+        image.write_bytes(b"second image")
+
+        assert PredictionJournal.job_key("owner/model", {"image": str(image)}) != first
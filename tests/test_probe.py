@@ -0,0 +1,142 @@
+import json
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from utils.probe import MediaInfo, probe, probe_many
+
+FFPROBE_OUTPUT = json.dumps({
+    "packets": [
+        {"stream_index": 0, "pts_time": "0.000000", "flags": "K__"},
+        {"stream_index": 1, "pts_time": "0.000000", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "0.166667", "flags": "___"},
+        {"stream_index": 1, "pts_time": "0.021333", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "2.000000", "flags": "K__"},
+    ],
+    "streams": [
+        {"index": 0, "codec_type": "video", "codec_name": "h264",
+         "width": 832, "height": 480, "r_frame_rate": "6/1", "nb_frames": "30", "has_b_frames": 2},
+        {"index": 1, "codec_type": "audio", "codec_name": "aac", "sample_rate": "48000"},
+    ],
+    "format": {"duration": "5.000000"},
+})
+
+
+def ffprobe_result(stdout: str = FFPROBE_OUTPUT) -> MagicMock:
+    """Build a successful ffprobe CompletedProcess stand-in."""
+    return MagicMock(returncode=0, stdout=stdout, stderr="")
+
+
+class TestProbe:
+    """Tests for the probe function."""
+
+    def test_parses_all_fields(self) -> None:
+        """Test that one ffprobe call fills every MediaInfo field."""
+        with patch("subprocess.run", return_value=ffprobe_result()) as mock_run:
+            info = probe("/test/video.mp4")
+
+        mock_run.assert_called_once()
+        assert info.duration == 5.0
+        assert info.fps == 6.0
+        assert info.frame_count == 30
+        assert info.resolution == (832, 480)
+        assert info.video_codec == "h264"
+        assert info.audio_codec == "aac"
+        assert info.sample_rate == 48000
+        assert info.keyframe_interval == 2.0
+        assert info.has_b_frames is True
+
+    def test_audio_only_file_has_no_video_fields(self) -> None:
+        """Test that video fields stay None for an audio file."""
+        stdout = json.dumps({
+            "streams": [{"index": 0, "codec_type": "audio", "codec_name": "mp3", "sample_rate": "44100"}],
+            "format": {"duration": "190.0"},
+        })
+        with patch("subprocess.run", return_value=ffprobe_result(stdout)):
+            info = probe("/test/audio.mp3")
+
+        assert info.duration == 190.0
+        assert info.sample_rate == 44100
+        assert info.fps is None
+        assert info.resolution is None
+        assert info.keyframe_interval is None
+
+    def test_frame_count_from_stream_duration(self) -> None:
+        """Test that a stream without nb_frames is counted from its own duration, not the container's."""
+        stdout = json.dumps({
+            "streams": [{"index": 0, "codec_type": "video", "r_frame_rate": "24/1", "duration": "5.000000"}],
+            "format": {"duration": "5.500000"},
+        })
+        with patch("subprocess.run", return_value=ffprobe_result(stdout)):
+            info = probe("/test/video.mp4")
+
+        assert info.frame_count == 120
+
+    def test_uses_slots(self) -> None:
+        """Test that MediaInfo instances carry no per-instance dict."""
+        assert not hasattr(MediaInfo("/test/video.mp4"), "__dict__")
+
+    def test_memoizes_unchanged_file(self, tmp_path: Path) -> None:
+        """Test that an unchanged file is only probed once."""
+        media = tmp_path / "clip.mp4"
+        media.write_bytes(b"data")
+
+        with patch("subprocess.run", return_value=ffprobe_result()) as mock_run:
+            first = probe(str(media))
+            second = probe(str(media))
+
+        assert first is second
+        mock_run.assert_called_once()
+
+    def test_reprobes_modified_file(self, tmp_path: Path) -> None:
+        """Test that a changed file is probed again."""
+        media = tmp_path / "clip.mp4"
+        media.write_bytes(b"data")
+
+        with patch("subprocess.run", return_value=ffprobe_result()) as mock_run:
+            probe(str(media))
+            media.write_bytes(b"longer data")
+            os.utime(media, ns=(0, 0))
+            probe(str(media))
+
+        assert mock_run.call_count == 2
+
+    def test_does_not_memoize_missing_file(self) -> None:
+        """Test that paths which cannot be stat'ed are probed every time."""
+        with patch("subprocess.run", return_value=ffprobe_result()) as mock_run:
+            probe("/nonexistent/video.mp4")
+            probe("/nonexistent/video.mp4")
+
+        assert mock_run.call_count == 2
+
+    def test_raises_value_error_on_invalid_json(self) -> None:
+        """Test that ValueError is raised when ffprobe output is not JSON."""
+        with patch("subprocess.run", return_value=ffprobe_result("not json")):
+            with pytest.raises(ValueError, match="invalid JSON"):
+                probe("/test/video.mp4")
+
+
+class TestProbeMany:
+    """Tests for the probe_many function."""
+
+    def test_preserves_order(self) -> None:
+        """Test that results come back in input order."""
+        def fake_run(cmd: list[str], **kwargs: object) -> MagicMock:
+            duration = cmd[-1].split("_")[-1].split(".")[0]
+            return ffprobe_result(json.dumps({"format": {"duration": duration}}))
+
+        paths = [f"/test/clip_{n}.mp4" for n in range(10)]
+        with patch("subprocess.run", side_effect=fake_run):
+            infos = probe_many(paths, max_workers=4)
+
+        assert [info.path for info in infos] == paths
+        assert [info.duration for info in infos] == [float(n) for n in range(10)]
+
+    def test_empty_list(self) -> None:
+        """Test that no ffprobe runs for an empty list."""
+        with patch("subprocess.run") as mock_run:
+            assert probe_many([]) == []
+
+        mock_run.assert_not_called()
@@ -0,0 +1,107 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from utils.mixer import Stem
+from utils.render import intermediate_bytes, render_final_video, render_layered_final_video
+
+
+def make_file(path: Path, size: int) -> str:
+    """Create a (sparse) file of the given size and return its path."""
+    with open(path, "wb") as f:
+        f.truncate(size)
+    return str(path)
+
+
+class TestIntermediateBytes:
+    """Tests for intermediate_bytes."""
+
+    def test_counts_looped_video_audio_and_final(self, tmp_path: Path) -> None:
+        """Test that the estimate adds the repeated clip, the MP3 and the final file."""
+        base = make_file(tmp_path / "base.mp4", 1_000_000)
+        final = make_file(tmp_path / "final.mp4", 5_000)
+
+        with patch("utils.render.get_video_duration", return_value=10.0):
+            estimate = intermediate_bytes(base, final, 3600.0)
+
+        # 360 copies of the clip + 3600s of ~190kbps MP3 + the final file
+        assert estimate == 360_000_000 + 85_500_000 + 5_000
+
+
+class TestRenderFinalVideo:
+    """Tests for the single-pass render."""
+
+    def test_pcm_pipes_audio_into_the_muxer(self, tmp_path: Path) -> None:
+        """Test that the PCM looper muxes the looping video in its own encoder."""
+        output = str(tmp_path / "final.mp4")
+
+        with patch("utils.render.loop_audio_pcm") as mock_loop, \
+             patch("utils.render.report_bytes_written"):
+            render_final_video("/test/base.mp4", "/test/audio.mp3", output, 2)
+
+        args, kwargs = mock_loop.call_args
+        assert args == ("/test/audio.mp3", output, 7200)
+        assert kwargs["input_args"] == ["-stream_loop", "-1", "-i", "/test/base.mp4"]
+        codec_args = kwargs["codec_args"]
+        assert codec_args[codec_args.index("-c:v") + 1] == "copy"
+        assert "1:v:0" in codec_args and "0:a:0" in codec_args
+
+    def test_ffmpeg_loops_both_inputs_in_one_process(self, tmp_path: Path) -> None:
+        """Test that one ffmpeg call loops the clip and the audio unit into the MP4."""
+        output = str(tmp_path / "final.mp4")
+        points = {"loop_start": 2.0, "loop_end": 100.0, "crossfade": 1.0, "score": 0.1}
+
+        with patch("utils.render.get_audio_duration", return_value=120.0), \
+             patch("utils.render.report_bytes_written"), \
+             patch("subprocess.run") as mock_run:
+            render_final_video("/test/base.mp4", "/test/audio.mp3", output, 1,
+                               loop_points=points, pcm=False)  # type: ignore[arg-type]
+
+        assert mock_run.call_count == 2
+        unit_args = mock_run.call_args_list[0][0][0]
+        assert "atrim=start=2.0:end=100.0" in unit_args[unit_args.index("-filter_complex") + 1]
+
+        render_args = mock_run.call_args_list[1][0][0]
+        assert render_args.count("-stream_loop") == 2
+        assert render_args[-1] == output
+        assert render_args[render_args.index("-t") + 1] == "3600"
+
+    def test_ffmpeg_removes_unit_on_error(self, tmp_path: Path) -> None:
+        """Test that the temporary audio unit is deleted when ffmpeg fails."""
+        with patch("utils.render.get_audio_duration", return_value=120.0), \
+             patch("subprocess.run", side_effect=RuntimeError("ffmpeg")), \
+             patch("os.remove") as mock_remove:
+            with pytest.raises(RuntimeError):
+                render_final_video("/test/base.mp4", "/test/audio.mp3",
+                                   str(tmp_path / "final.mp4"), 1, pcm=False)
+
+        assert mock_remove.call_args[0][0].endswith(".wav")
+
+    def test_layered_mix_is_muxed_directly(self, tmp_path: Path) -> None:
+        """Test that stems are mixed straight into the final MP4."""
+        output = str(tmp_path / "final.mp4")
+        stems = [Stem("rain.mp3"), Stem("fire.mp3")]
+
+        with patch("utils.render.mix_stems") as mock_mix, \
+             patch("utils.render.report_bytes_written") as mock_report:
+            render_layered_final_video("/test/base.mp4", stems, output, 1, seed=3)
+
+        args, kwargs = mock_mix.call_args
+        assert args == (stems, output, 3600)
+        assert kwargs["input_args"][-1] == "/test/base.mp4"
+        mock_report.assert_called_once_with("/test/base.mp4", output, 3600)
+
+    def test_reports_bytes_written(self, tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that the render prints its size against the intermediate path."""
+        base = make_file(tmp_path / "base.mp4", 1_000_000)
+        output = tmp_path / "final.mp4"
+
+        def fake_loop(*args: object, **kwargs: object) -> None:
+            make_file(output, 400_000_000)
+
+        with patch("utils.render.loop_audio_pcm", side_effect=fake_loop), \
+             patch("utils.render.get_video_duration", return_value=10.0):
+            render_final_video(base, "/test/audio.mp3", str(output), 1)
+
+        assert "[RENDER] Wrote 0.40 GB in one pass" in capsys.readouterr().out
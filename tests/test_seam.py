@@ -0,0 +1,147 @@
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from utils.seam import (
+    SeamTrim,
+    build_video_loop_unit,
+    decode_frames,
+    find_best_trim,
+    seam_distances,
+    whole_clip,
+    worth_trimming,
+)
+
+
+def periodic_clip(frames: int = 30, period: int = 24) -> np.ndarray:
+    """Thumbnail frames of a pattern that drifts sideways and repeats every period frames."""
+    x = np.linspace(0.0, 2 * np.pi, 64, endpoint=False)
+    clip = []
+    for index in range(frames):
+        row = 127 + 100 * np.sin(x + 2 * np.pi * index / period)
+        image = np.repeat(row[None, :], 36, axis=0)
+        clip.append(np.stack([image, image * 0.5, 255 - image], axis=-1))
+    return np.array(clip).astype(np.uint8)
+
+
+def trim(length: int = 20) -> SeamTrim:
+    """A 20-frame window of a 30-frame 6fps clip."""
+    return {"start_frame": 4, "end_frame": 4 + length, "frame_count": 30,
+            "fps": 6.0, "score": 1.0, "raw_score": 5.0}
+
+
+class TestSeamDistances:
+    """Tests for seam_distances."""
+
+    def test_consecutive_frames_are_one_step_apart(self) -> None:
+        """Test that distances are measured in median consecutive-frame steps."""
+        distance = seam_distances(periodic_clip())
+
+        steps = np.array([distance[i, i + 1] for i in range(29)])
+        np.testing.assert_allclose(np.median(steps), 1.0, rtol=0.01)
+
+    def test_identical_frames_have_zero_distance(self) -> None:
+        """Test that a frame one period later matches exactly."""
+        distance = seam_distances(periodic_clip())
+
+        assert distance[0, 24] < 1e-3
+
+
+class TestFindBestTrim:
+    """Tests for find_best_trim."""
+
+    def test_trims_to_a_whole_period(self) -> None:
+        """Test that the seam jump becomes one ordinary step."""
+        result = find_best_trim(periodic_clip(), fps=6.0)
+
+        # Jumping from the last frame back to the first advances one frame of motion
+        assert (result["end_frame"] - result["start_frame"]) % 24 == 2
+        assert abs(result["score"] - 1.0) < 0.05
+        assert result["raw_score"] > 5.0
+
+    def test_respects_minimum_length(self) -> None:
+        """Test that windows shorter than the minimum fraction are never chosen."""
+        result = find_best_trim(periodic_clip(), fps=6.0, min_loop_fraction=0.9)
+
+        assert result["end_frame"] - result["start_frame"] >= 27
+
+    def test_too_few_frames_raise(self) -> None:
+        """Test that a two-frame clip is rejected."""
+        with pytest.raises(ValueError, match="too short"):
+            find_best_trim(periodic_clip(frames=2), fps=6.0)
+
+
+class TestWorthTrimming:
+    """Tests for worth_trimming."""
+
+    def test_large_gain_on_long_window(self) -> None:
+        """Test that a clearly better seam that keeps most of the clip is cut."""
+        assert worth_trimming({**trim(length=26), "raw_score": 5.0, "score": 1.0})
+
+    def test_small_gain_keeps_whole_clip(self) -> None:
+        """Test that a barely better seam does not justify losing frames."""
+        assert not worth_trimming({**trim(length=26), "raw_score": 1.6, "score": 1.0})
+
+    def test_short_window_keeps_whole_clip(self) -> None:
+        """Test that a window under the minimum fraction is not cut even for a large gain."""
+        assert not worth_trimming(trim(length=20))
+
+    def test_whole_clip_window(self) -> None:
+        """Test that the whole-clip window scores as the untrimmed clip."""
+        result = whole_clip(trim())
+
+        assert (result["start_frame"], result["end_frame"], result["score"]) == (0, 30, 5.0)
+
+
+class TestDecodeFrames:
+    """Tests for decode_frames."""
+
+    def test_reshapes_raw_rgb(self) -> None:
+        """Test that raw RGB output becomes one array per frame."""
+        raw = bytes(range(256)) * (64 * 36 * 3 * 5 // 256)
+
+        with patch("subprocess.run", return_value=MagicMock(returncode=0, stdout=raw, stderr=b"")) as mock_run:
+            frames = decode_frames("/test/clip.mp4")
+
+        assert frames.shape == (5, 36, 64, 3)
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-pix_fmt") + 1] == "rgb24"
+
+
+class TestBuildVideoLoopUnit:
+    """Tests for build_video_loop_unit."""
+
+    def graph(self, mode: str, tmp_path: Path) -> str:
+        """Filter graph passed to ffmpeg for a mode."""
+        with patch("subprocess.run") as mock_run:
+            build_video_loop_unit("/test/clip.mp4", str(tmp_path / "unit.mp4"), trim(), mode=mode)
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-bf") + 1] == "0"
+        return args[args.index("-filter_complex") + 1]
+
+    def test_trim_cuts_window(self, tmp_path: Path) -> None:
+        """Test that trim mode cuts exactly the chosen frames."""
+        assert self.graph("trim", tmp_path).startswith("[0:v]trim=start_frame=4:end_frame=24,")
+
+    def test_crossfade_fades_tail_into_head(self, tmp_path: Path) -> None:
+        """Test that crossfade mode blends half a second at the seam."""
+        graph = self.graph("crossfade", tmp_path)
+
+        assert "xfade=transition=fade:duration=0.5:offset=2.3333" in graph
+
+    def test_pingpong_plays_window_backwards(self, tmp_path: Path) -> None:
+        """Test that ping-pong mode appends the reversed window without repeated end frames."""
+        graph = self.graph("pingpong", tmp_path)
+
+        assert "reverse,trim=start_frame=1:end_frame=19" in graph
+        assert "concat=n=2:v=1:a=0" in graph
+
+    def test_unknown_mode_raises(self, tmp_path: Path) -> None:
+        """Test that an unknown mode is rejected before running ffmpeg."""
+        with patch("subprocess.run") as mock_run:
+            with pytest.raises(ValueError, match="Unknown seam mode"):
+                build_video_loop_unit("/test/clip.mp4", str(tmp_path / "unit.mp4"), trim(), mode="spin")
+
+        mock_run.assert_not_called()
@@ -269,3 +269,27 @@ class TestUploadVideo:
         insert_call = mock_youtube.videos.return_value.insert.call_args
         body = insert_call.kwargs["body"]
         assert body["snippet"]["categoryId"] == "10"
+
+    def test_reuses_provided_client(self, tmp_path: Path) -> None:
+        """Test that a passed-in client is used instead of re-authenticating."""
+        video_file = tmp_path / "video.mp4"
+        video_file.touch()
+
+        mock_youtube = MagicMock()
+        mock_request = MagicMock()
+        mock_request.next_chunk.return_value = (None, {"id": "vid", "kind": "youtube#video", "etag": "e"})
+        mock_youtube.videos.return_value.insert.return_value = mock_request
+
+        with patch("utils.upload.get_youtube_client") as mock_get_client, \
+             patch("utils.upload.MediaFileUpload"):
+
+            result = upload_video(
+                video_path=str(video_file),
+                title="Test",
+                description="Desc",
+                tags=[],
+                youtube=mock_youtube
+            )
+
+        mock_get_client.assert_not_called()
+        assert result == "vid"
@@ -4,15 +4,23 @@ import subprocess
 from pathlib import Path
 from unittest.mock import MagicMock, call, patch
 
+import numpy as np
 import pytest
 
+from upscale_backends.ffmpeg import FfmpegBackend
+from upscale_backends.realesrgan import RealEsrganBackend
+from upscale_backends.sharpen import SharpenBackend
 from utils.upscale import (
     frame_video,
     frames_to_video,
     get_video_fps,
+    select_upscaler,
+    stream_upscale,
+    upscale_clip,
     upscale_frames,
     upscale_to_4k,
 )
+from utils.probe import MediaInfo
 
 
 # ============================================================================
@@ -117,7 +125,7 @@ class TestGetVideoFps:
         })
 
         with patch("subprocess.run") as mock_run:
-            mock_run.return_value = MagicMock(stdout=mock_output)
+            mock_run.return_value = MagicMock(returncode=0, stdout=mock_output, stderr="")
             fps = get_video_fps(Path("/test/video.mp4"))
 
         assert fps == 30.0
@@ -135,7 +143,7 @@ class TestGetVideoFps:
         })
 
         with patch("subprocess.run") as mock_run:
-            mock_run.return_value = MagicMock(stdout=mock_output)
+            mock_run.return_value = MagicMock(returncode=0, stdout=mock_output, stderr="")
             fps = get_video_fps(Path("/test/video.mp4"))
 
         assert abs(fps - 23.976) < 0.01
@@ -149,7 +157,7 @@ class TestGetVideoFps:
         })
 
         with patch("subprocess.run") as mock_run:
-            mock_run.return_value = MagicMock(stdout=mock_output)
+            mock_run.return_value = MagicMock(returncode=0, stdout=mock_output, stderr="")
             fps = get_video_fps(Path("/test/audio.mp4"))
 
         assert fps == 30.0
@@ -159,7 +167,7 @@ class TestGetVideoFps:
         mock_output = json.dumps({"streams": []})
 
         with patch("subprocess.run") as mock_run:
-            mock_run.return_value = MagicMock(stdout=mock_output)
+            mock_run.return_value = MagicMock(returncode=0, stdout=mock_output, stderr="")
             fps = get_video_fps(Path("/test/empty.mp4"))
 
         assert fps == 30.0
@@ -266,6 +274,18 @@ class TestFramesToVideo:
         assert "18" in args
         assert str(output_video) in args
 
+    def test_profile_encodes_in_segments(self, tmp_path: Path) -> None:
+        """Test that naming a profile hands the frames to the segmented encoder."""
+        with patch("utils.upscale.encode_segmented") as mock_encode:
+            frames_to_video(tmp_path, tmp_path / "output.mp4", fps=24.0, profile="fast", workers=4)
+
+        mock_encode.assert_called_once_with(tmp_path, tmp_path / "output.mp4", 24.0, profile="fast", workers=4)
+
+    def test_profile_and_codec_args_conflict(self, tmp_path: Path) -> None:
+        """Test that custom codec arguments cannot be mixed with a profile."""
+        with pytest.raises(ValueError, match="not both"):
+            frames_to_video(tmp_path, tmp_path / "output.mp4", 24.0, codec_args=["-c:v", "libx265"], profile="fast")
+
 
 class TestUpscaleTo4k:
     """Tests for upscale_to_4k orchestration function."""
@@ -334,6 +354,154 @@ class TestUpscaleTo4k:
             reassemble_call = mock_reassemble.call_args
             assert reassemble_call[0][2] == 23.976
 
+    def test_cpu_backend_streams_instead(self, tmp_path: Path) -> None:
+        """Test that an in-memory backend skips the frame directories."""
+        upscaler = SharpenBackend(workers=1)
+
+        with patch("utils.upscale.frame_video") as mock_frame, \
+             patch("utils.upscale.stream_upscale") as mock_stream:
+            upscale_to_4k(tmp_path / "input.mp4", tmp_path / "output.mp4", upscaler=upscaler)
+
+        mock_frame.assert_not_called()
+        assert mock_stream.call_args[1]["upscale_batch"] is upscaler
+
+    def test_realesrgan_backend_uses_frame_directories(self, tmp_path: Path) -> None:
+        """Test that a RealESRGAN backend runs through the whole-directory path."""
+        with patch("utils.upscale.get_video_fps", return_value=6.0), \
+             patch("utils.upscale.frame_video"), \
+             patch("utils.upscale.upscale_frames") as mock_upscale, \
+             patch("utils.upscale.frames_to_video"), \
+             patch("utils.upscale.stream_upscale") as mock_stream:
+            upscale_to_4k(tmp_path / "input.mp4", tmp_path / "output.mp4", upscaler=RealEsrganBackend())
+
+        mock_upscale.assert_called_once()
+        mock_stream.assert_not_called()
+
+    def test_profile_reaches_segmented_encoder(self, tmp_path: Path) -> None:
+        """Test that an encoder profile replaces the single encode's codec arguments."""
+        with patch("utils.upscale.get_video_fps", return_value=6.0), \
+             patch("utils.upscale.frame_video"), \
+             patch("utils.upscale.upscale_frames"), \
+             patch("utils.upscale.frames_to_video") as mock_reassemble:
+            upscale_to_4k(tmp_path / "input.mp4", tmp_path / "output.mp4", codec_args=["-c:v", "x"], profile="fast")
+
+        assert mock_reassemble.call_args[1] == {"profile": "fast"}
+
+
+def double_size(frames: np.ndarray) -> np.ndarray:
+    """Nearest-neighbour 2x upscaler standing in for RealESRGAN."""
+    return frames.repeat(2, axis=1).repeat(2, axis=2)
+
+
+class TestSelectUpscaler:
+    """Tests for select_upscaler."""
+
+    def test_prefers_realesrgan_when_installed(self) -> None:
+        """Test that the best tier picks RealESRGAN when its binary is present."""
+        with patch("shutil.which", return_value="/usr/bin/tool"):
+            assert isinstance(select_upscaler("best"), RealEsrganBackend)
+
+    def test_falls_back_to_cpu(self) -> None:
+        """Test that a machine without RealESRGAN or ffmpeg gets the NumPy backend."""
+        with patch("shutil.which", return_value=None):
+            assert isinstance(select_upscaler("best"), SharpenBackend)
+
+    def test_tier_caps_quality(self) -> None:
+        """Test that a lower tier never picks a more expensive backend."""
+        with patch("shutil.which", return_value="/usr/bin/tool"), \
+             patch("upscale_backends.ffmpeg.has_filter", return_value=False):
+            assert select_upscaler("balanced").name == "ffmpeg-lanczos"
+            assert select_upscaler("fast").name == "numpy-sharpen"
+
+    def test_unknown_tier_raises(self) -> None:
+        """Test that an unknown tier is rejected."""
+        with pytest.raises(ValueError, match="Unknown quality tier"):
+            select_upscaler("ultra")
+
+    def test_closes_backends_it_passes_over(self) -> None:
+        """Test that every candidate built but not chosen is closed."""
+        with patch("shutil.which", return_value=None), \
+             patch.object(FfmpegBackend, "close") as mock_close:
+            select_upscaler("best")
+
+        assert mock_close.call_count == 2
+
+
+class TestStreamUpscale:
+    """Tests for stream_upscale."""
+
+    def test_pipes_each_window_through_the_upscaler(self, tmp_path: Path) -> None:
+        """Test that every batch is upscaled and encoded at the upscaled size."""
+        batches = [np.zeros((4, 2, 3, 3), dtype=np.uint8), np.ones((1, 2, 3, 3), dtype=np.uint8)]
+        upscaler = MagicMock(side_effect=double_size)
+
+        with patch("utils.upscale.probe", return_value=MediaInfo("/test/clip.mp4", resolution=(3, 2))), \
+             patch("utils.upscale.get_video_fps", return_value=24.0), \
+             patch("utils.upscale.iter_frame_batches", return_value=iter(batches)) as mock_batches, \
+             patch("utils.upscale.FrameEncoder") as mock_encoder:
+            stream_upscale(Path("/test/clip.mp4"), tmp_path / "out.mp4", upscale_batch=upscaler, window=4)
+
+        assert mock_batches.call_args[0][2] == 4
+        assert upscaler.call_count == 2
+        assert mock_encoder.call_args[0][1] == (6, 4)
+        encoder = mock_encoder.return_value.__enter__.return_value
+        assert [call_args[0][0].shape for call_args in encoder.write.call_args_list] == [(4, 4, 6, 3), (1, 4, 6, 3)]
+
+    def test_empty_video_raises(self, tmp_path: Path) -> None:
+        """Test that a video without frames is rejected before encoding."""
+        with patch("utils.upscale.probe", return_value=MediaInfo("/test/clip.mp4", resolution=(3, 2))), \
+             patch("utils.upscale.get_video_fps", return_value=24.0), \
+             patch("utils.upscale.iter_frame_batches", return_value=iter([])), \
+             patch("utils.upscale.FrameEncoder") as mock_encoder:
+            with pytest.raises(ValueError, match="No frames"):
+                stream_upscale(Path("/test/clip.mp4"), tmp_path / "out.mp4", upscale_batch=double_size)
+
+        mock_encoder.assert_not_called()
+
+
+class TestUpscaleClip:
+    """Tests for upscale_clip."""
+
+    def test_upscales_once_per_content(self, tmp_path: Path) -> None:
+        """Test that a second call with the same clip reuses the cached result."""
+        clip = tmp_path / "loop.mp4"
+        clip.write_bytes(b"clip")
+        cache = str(tmp_path / "cache")
+
+        def fake_upscale(input_video: Path, output_video: Path, **kwargs: object) -> None:
+            output_video.write_bytes(b"upscaled")
+
+        with patch("utils.upscale.get_video_fps", return_value=6.0), \
+             patch("utils.upscale.select_upscaler", return_value=SharpenBackend(workers=1)), \
+             patch("utils.upscale.stream_upscale", side_effect=fake_upscale) as mock_upscale:
+            first = upscale_clip(str(clip), cache_dir=cache)
+            second = upscale_clip(str(clip), cache_dir=cache)
+
+        mock_upscale.assert_called_once()
+        assert mock_upscale.call_args[1]["window"] == 16
+        assert first == second
+        assert Path(first).read_bytes() == b"upscaled"
+
+    def test_frame_directories_when_not_streaming(self, tmp_path: Path) -> None:
+        """Test that the JPG path keeps the loop-friendly encoding and its own cache entry."""
+        clip = tmp_path / "loop.mp4"
+        clip.write_bytes(b"clip")
+
+        with patch("utils.upscale.get_video_fps", return_value=6.0), \
+             patch("utils.upscale.select_upscaler", return_value=RealEsrganBackend()), \
+             patch("utils.upscale.frame_video"), \
+             patch("utils.upscale.upscale_frames"), \
+             patch("subprocess.run") as mock_run:
+            with pytest.raises(FileNotFoundError):
+                # Nothing is written by the mocked encoder, so nothing is cached
+                upscale_clip(str(clip), streaming=False, dedup=False, static_mask=False, cache_dir=str(tmp_path / "cache"))
+
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-bf") + 1] == "0"
+        assert args[args.index("-g") + 1] == "12"
+        assert args[args.index("-pix_fmt") + 1] == "yuv420p"
+        assert list((tmp_path / "cache").iterdir()) == []
+
 
 # ============================================================================
 # Integration Tests (Real Execution)
@@ -516,3 +684,18 @@ class TestUpscaleTo4kIntegration:
             capture_output=True
         )
         assert result.returncode == 0, f"ffprobe failed: {result.stderr.decode()}"
+
+
+@requires_ffmpeg
+class TestStreamUpscaleIntegration:
+    """Integration tests for stream_upscale with real ffmpeg."""
+
+    def test_streams_every_frame_at_the_new_size(self, tiny_video: Path, tmp_path: Path) -> None:
+        """Test that every frame is upscaled without writing frame files."""
+        output_video = tmp_path / "streamed.mp4"
+
+        frames = stream_upscale(tiny_video, output_video, upscale_batch=double_size, window=2)
+
+        assert frames == 5
+        assert get_video_resolution(output_video) == (64, 64)
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["streamed.mp4", "test_input.mp4"]
@@ -0,0 +1,245 @@
+import shutil
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from upscale_backends.base import shard
+from upscale_backends.dedup import DedupBackend, block_signatures, group_duplicates
+from upscale_backends.ffmpeg import FfmpegBackend
+from upscale_backends.sharpen import SharpenBackend, sharpen_upscale
+from upscale_backends.static_mask import StaticRegionBackend, moving_tiles
+
+requires_ffmpeg = pytest.mark.skipif(
+    shutil.which("ffmpeg") is None,
+    reason="ffmpeg not installed"
+)
+
+
+def gradient_frames(count: int = 4, height: int = 6, width: int = 8) -> np.ndarray:
+    """Frames with a horizontal ramp that shifts by one step per frame."""
+    ramp = (np.arange(width)[None, :] * 20 + np.arange(count)[:, None] * 5) % 256
+    return np.repeat(ramp[:, None, :, None], height, axis=1).repeat(3, axis=3).astype(np.uint8)
+
+
+class TestShard:
+    """Tests for shard."""
+
+    def test_splits_into_contiguous_ranges(self) -> None:
+        """Test that ranges cover every frame in order."""
+        frames = gradient_frames(count=7)
+
+        ranges = shard(frames, 3)
+
+        assert [len(part) for part in ranges] == [3, 2, 2]
+        np.testing.assert_array_equal(np.concatenate(ranges), frames)
+
+    def test_never_more_ranges_than_frames(self) -> None:
+        """Test that idle workers get no empty ranges."""
+        assert len(shard(gradient_frames(count=2), 8)) == 2
+
+
+class TestSharpenBackend:
+    """Tests for the NumPy sharpening backend."""
+
+    def test_doubles_resolution(self) -> None:
+        """Test the output shape and dtype."""
+        result = sharpen_upscale(gradient_frames())
+
+        assert result.shape == (4, 12, 16, 3)
+        assert result.dtype == np.uint8
+
+    def test_flat_frame_stays_flat(self) -> None:
+        """Test that a uniform colour is neither blurred nor ringed."""
+        frames = np.full((1, 4, 4, 3), 90, dtype=np.uint8)
+
+        np.testing.assert_array_equal(sharpen_upscale(frames), 90)
+
+    def test_sharding_matches_single_process(self) -> None:
+        """Test that frame ranges upscaled in a process pool give the same frames."""
+        frames = gradient_frames(count=5)
+        backend = SharpenBackend(workers=2)
+        try:
+            sharded = backend(frames)
+        finally:
+            backend.close()
+
+        np.testing.assert_array_equal(sharded, SharpenBackend(workers=1).upscale(frames))
+
+    def test_pool_never_forks(self) -> None:
+        """Test that the pool starts on first use without forking the threaded parent."""
+        backend = SharpenBackend(workers=2)
+        try:
+            assert backend._pool is None
+            backend(gradient_frames(count=2))
+            assert backend._pool._mp_context.get_start_method() in ("forkserver", "spawn")
+        finally:
+            backend.close()
+
+
+class TestFfmpegBackend:
+    """Tests for the ffmpeg resampling backend."""
+
+    def test_one_process_per_shard(self) -> None:
+        """Test that each frame range is scaled by its own ffmpeg process."""
+        frames = gradient_frames(count=4)
+
+        def fake_ffmpeg(cmd: list[str], input: bytes, **kwargs: object) -> MagicMock:
+            count = len(input) // (6 * 8 * 3)
+            return MagicMock(returncode=0, stdout=bytes(count * 12 * 16 * 3), stderr=b"")
+
+        with patch("subprocess.run", side_effect=fake_ffmpeg) as mock_run:
+            result = FfmpegBackend("lanczos", workers=2).upscale(frames)
+
+        assert mock_run.call_count == 2
+        args = mock_run.call_args[0][0]
+        assert args[args.index("-vf") + 1].startswith("scale=16:12:flags=lanczos")
+        assert result.shape == (4, 12, 16, 3)
+
+    def test_zscale_uses_spline(self) -> None:
+        """Test the zimg filter string."""
+        assert FfmpegBackend("zscale").scale_filter(8, 6) == "zscale=w=16:h=12:filter=spline36"
+
+    def test_unknown_kernel_raises(self) -> None:
+        """Test that an unknown kernel is rejected."""
+        with pytest.raises(ValueError, match="Unknown ffmpeg kernel"):
+            FfmpegBackend("bicubic")
+
+    @requires_ffmpeg
+    def test_real_ffmpeg_doubles_resolution(self) -> None:
+        """Test a real lanczos upscale across two processes."""
+        result = FfmpegBackend("lanczos", workers=2).upscale(gradient_frames(count=3, height=16, width=16))
+
+        assert result.shape == (3, 32, 32, 3)
+
+
+class CountingBackend(SharpenBackend):
+    """Sharpen backend that records how many frames it was given."""
+
+    def __init__(self) -> None:
+        super().__init__(workers=1)
+        self.batches: list[int] = []
+
+    def upscale(self, frames: np.ndarray) -> np.ndarray:
+        self.batches.append(len(frames))
+        return super().upscale(frames)
+
+
+def held_frames(pattern: list[int], height: int = 32, width: int = 32) -> np.ndarray:
+    """Frames of flat grey levels, one per entry of pattern."""
+    return np.array([np.full((height, width, 3), level, dtype=np.uint8) for level in pattern])
+
+
+class TestDedup:
+    """Tests for near-duplicate frame grouping."""
+
+    def test_signatures_are_block_means(self) -> None:
+        """Test one luma mean per block."""
+        signatures = block_signatures(held_frames([10, 200]), block_size=16)
+
+        assert signatures.shape == (2, 2, 2)
+        np.testing.assert_allclose(signatures[1], 200, rtol=1e-5)
+
+    def test_groups_follow_the_representative(self) -> None:
+        """Test that slow drift starts a new group once it exceeds the tolerance."""
+        signatures = np.array([[0.0], [1.0], [2.0], [3.0], [3.5]])
+
+        groups = group_duplicates(signatures, tolerance=1.5)
+
+        assert groups.tolist() == [0, 0, 1, 1, 1]
+
+    def test_local_motion_is_not_averaged_away(self) -> None:
+        """Test that one changed block breaks a duplicate run."""
+        frames = held_frames([50, 50])
+        frames[1, :16, :16] = 255
+
+        assert group_duplicates(block_signatures(frames), tolerance=1.5).tolist() == [0, 1]
+
+    def test_upscales_one_frame_per_run(self) -> None:
+        """Test that duplicates reuse their representative's upscaled frame."""
+        inner = CountingBackend()
+        backend = DedupBackend(inner)
+        frames = held_frames([40, 40, 41, 120, 120])
+
+        result = backend.upscale(frames)
+
+        assert inner.batches == [2]
+        assert result.shape == (5, 64, 64, 3)
+        np.testing.assert_array_equal(result[2], result[0])
+        assert result[3, 0, 0, 0] == 120
+
+    def test_runs_continue_across_batches(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that a run spanning two windows is upscaled once and reported."""
+        inner = CountingBackend()
+        backend = DedupBackend(inner)
+
+        first = backend.upscale(held_frames([40, 40]))
+        second = backend.upscale(held_frames([40, 90, 90]))
+        backend.close()
+
+        assert inner.batches == [1, 1]
+        np.testing.assert_array_equal(second[0], first[0])
+        assert second[1, 0, 0, 0] == 90
+        assert "Skipped 3 of 5" in capsys.readouterr().out
+
+
+class TestStaticMask:
+    """Tests for static-region masking."""
+
+    def test_small_motion_marks_its_tile(self) -> None:
+        """Test that an 8x8 change is caught while compression-level noise is not."""
+        background = np.full((64, 128, 3), 80, dtype=np.uint8)
+        frames = np.repeat(background[None], 2, axis=0)
+        frames[0] += 2  # Noise everywhere, below the tolerance
+        frames[1, 8:16, 72:80] = 250
+
+        moving = moving_tiles(frames, background, tile_size=64)
+
+        assert moving.tolist() == [[[False, False]], [[False, True]]]
+
+    def test_tile_size_must_fit_sub_blocks(self) -> None:
+        """Test that a tile size off the sub-block grid is rejected."""
+        with pytest.raises(ValueError, match="multiple of 8"):
+            moving_tiles(held_frames([0]), held_frames([0])[0], tile_size=20)
+
+    def test_only_moving_tiles_are_upscaled(self) -> None:
+        """Test that static tiles come from the background and moving ones match a full upscale."""
+        frames = np.repeat(gradient_frames(count=1, height=40, width=72), 3, axis=0)
+        frames[2, 20:28, 40:48] = 255
+        inner = CountingBackend()
+        backend = StaticRegionBackend(inner, tile_size=16, margin=8)
+
+        result = backend.upscale(frames)
+
+        # The whole first frame, then one tile of the last frame
+        assert inner.batches == [1, 1]
+        assert result.shape == (3, 80, 144, 3)
+        np.testing.assert_array_equal(result[1], result[0])
+        full = sharpen_upscale(frames[2:])[0]
+        np.testing.assert_array_equal(result[2, 32:64, 64:96], full[32:64, 64:96])
+
+    def test_edge_tiles_are_cropped_to_the_frame(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """Test that a moving tile hanging past the frame edge is pasted without overflow."""
+        frames = held_frames([30, 30], height=24, width=24)
+        frames[1, 20:, 20:] = 200
+        backend = StaticRegionBackend(CountingBackend(), tile_size=16, margin=4)
+
+        result = backend.upscale(frames)
+        backend.close()
+
+        assert result.shape == (2, 48, 48, 3)
+        assert result[1, 47, 47, 0] == 200
+        assert result[1, 0, 0, 0] == 30
+        assert "never moves" in capsys.readouterr().out
+
+    def test_full_frame_motion_upscales_whole_batches(self) -> None:
+        """Test that a clip moving everywhere never costs more pixels than a plain upscale."""
+        frames = gradient_frames(count=4, height=32, width=32)
+        inner = CountingBackend()
+        backend = StaticRegionBackend(inner, tile_size=16, margin=8)
+
+        result = backend.upscale(frames)
+
+        assert inner.batches == [4]
+        assert backend.pixels_upscaled <= backend.pixels_seen
+        np.testing.assert_array_equal(result, sharpen_upscale(frames))
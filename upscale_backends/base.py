@@ -0,0 +1,61 @@
+# upscale_backends/base.py
+import os
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# From cheapest to best looking; a requested tier also accepts anything cheaper
+QUALITY_TIERS: tuple[str, ...] = ("fast", "balanced", "best")
+
+
+class UpscaleBackend(ABC):
+    """
+    Upscales batches of RGB frames in memory.
+
+    Instances are callable, so any backend can be passed to
+    utils.upscale.stream_upscale as its batch upscaler.
+    """
+    name: str
+    tier: str
+    scale: int = 2
+
+    @abstractmethod
+    def upscale(self, frames: np.ndarray) -> np.ndarray:
+        """
+        Upscale a batch of frames.
+
+        Args:
+            frames: uint8 array of shape (frames, height, width, 3).
+
+        Returns:
+            uint8 array of shape (frames, height * scale, width * scale, 3).
+        """
+        pass
+
+    def available(self) -> bool:
+        """
+        Whether this machine can run the backend (binaries, GPU, filters).
+        """
+        return True
+
+    def close(self) -> None:
+        """
+        Release anything held between batches, such as a worker pool.
+        """
+        pass
+
+    def __call__(self, frames: np.ndarray) -> np.ndarray:
+        return self.upscale(frames)
+
+
+def default_workers() -> int:
+    """Worker count for sharded backends: one per available core."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        return os.cpu_count() or 1
+
+
+def shard(frames: np.ndarray, workers: int) -> list[np.ndarray]:
+    """Split a batch into at most ``workers`` contiguous frame ranges."""
+    return [part for part in np.array_split(frames, max(1, min(workers, len(frames)))) if len(part)]
@@ -0,0 +1,116 @@
+# upscale_backends/dedup.py
+import time
+
+import numpy as np
+
+from upscale_backends.base import UpscaleBackend
+
+BLOCK_SIZE: int = 16  # Pixels per side of each compared block
+TOLERANCE: float = 1.5  # Largest block-mean luma change (0-255) still counted as a duplicate
+LUMA_WEIGHTS: np.ndarray = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def block_signatures(frames: np.ndarray, block_size: int = BLOCK_SIZE) -> np.ndarray:
+    """Mean luma of each block of each frame.
+
+    Args:
+        frames: uint8 array of shape (frames, height, width, 3).
+        block_size: Block side in pixels; partial blocks at the edges are dropped.
+
+    Returns:
+        float32 array of shape (frames, height // block_size, width // block_size).
+    """
+    count, height, width, _ = frames.shape
+    rows: int = max(1, height // block_size)
+    cols: int = max(1, width // block_size)
+    size_y: int = min(block_size, height)
+    size_x: int = min(block_size, width)
+    luma: np.ndarray = frames[:, :rows * size_y, :cols * size_x].astype(np.float32) @ LUMA_WEIGHTS
+    return luma.reshape(count, rows, size_y, cols, size_x).mean(axis=(2, 4))
+
+
+def group_duplicates(signatures: np.ndarray, tolerance: float, reference: np.ndarray | None = None) -> np.ndarray:
+    """Assign each frame to the group of the last representative it matches.
+
+    A frame joins the current group while no block differs from the
+    group's representative by more than ``tolerance``; otherwise it
+    starts a new group. Comparing with the representative rather than
+    the previous frame keeps slow drift from chaining into one group.
+
+    Args:
+        signatures: Block signatures from ``block_signatures``.
+        tolerance: Largest block difference counted as a duplicate.
+        reference: Signature of the representative carried over from the
+            previous batch, which is group -1.
+
+    Returns:
+        Group index per frame; -1 for frames matching ``reference``.
+    """
+    groups: np.ndarray = np.empty(len(signatures), dtype=np.intp)
+    current: np.ndarray | None = reference
+    group: int = -1
+    for index, signature in enumerate(signatures):
+        if current is None or float(np.abs(signature - current).max()) > tolerance:
+            group += 1
+            current = signature
+        groups[index] = group
+    return groups
+
+
+class DedupBackend(UpscaleBackend):
+    """
+    Upscales one representative per run of near-identical frames.
+
+    Static-camera clips at low frame rates repeat almost the same image
+    for several frames. Each run is upscaled once and every frame in it
+    reuses that result. The last representative carries over to the
+    next batch, so runs continue across streaming windows.
+    """
+
+    def __init__(self, inner: UpscaleBackend, tolerance: float = TOLERANCE) -> None:
+        self.inner = inner
+        self.tolerance = tolerance
+        self.name = f"{inner.name}+dedup{tolerance:g}"
+        self.tier = inner.tier
+        self.scale = inner.scale
+        self.frames_seen = 0
+        self.frames_upscaled = 0
+        self.upscale_seconds = 0.0
+        self._reference: np.ndarray | None = None
+        self._reference_output: np.ndarray | None = None
+
+    def available(self) -> bool:
+        return self.inner.available()
+
+    def upscale(self, frames: np.ndarray) -> np.ndarray:
+        signatures: np.ndarray = block_signatures(frames)
+        groups: np.ndarray = group_duplicates(signatures, self.tolerance, self._reference)
+        # First frame of each new group is its representative
+        starts: np.ndarray = np.flatnonzero(np.diff(groups, prepend=-2) != 0)
+        starts = starts[groups[starts] >= 0]
+
+        previous: np.ndarray | None = self._reference_output
+        outputs: list[np.ndarray] = [] if previous is None else [previous[None]]
+        if len(starts):
+            started: float = time.perf_counter()
+            outputs.append(self.inner.upscale(frames[starts]))
+            self.upscale_seconds += time.perf_counter() - started
+            self._reference = signatures[starts[-1]]
+            # A copy, so the rest of the batch is not kept alive with it
+            self._reference_output = outputs[-1][-1].copy()
+
+        self.frames_seen += len(frames)
+        self.frames_upscaled += len(starts)
+        # With a carried-over representative at index 0, group -1 maps to it
+        return np.concatenate(outputs)[groups + (previous is not None)]
+
+    def close(self) -> None:
+        if self.frames_seen:
+            skipped: int = self.frames_seen - self.frames_upscaled
+            speedup: float = self.frames_seen / max(1, self.frames_upscaled)
+            per_frame: float = self.upscale_seconds / max(1, self.frames_upscaled)
+            print(
+                f"[DEDUP] Skipped {skipped} of {self.frames_seen} near-duplicate frames "
+                f"({speedup:.1f}x fewer upscales, ~{skipped * per_frame:.1f}s saved)"
+            )
+        self.inner.close()
@@ -0,0 +1,69 @@
+# upscale_backends/realesrgan.py
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from upscale_backends.base import UpscaleBackend
+
+BINARY: str = "realesrgan-ncnn-vulkan"
+MODEL: str = "realesrgan-x4plus"
+SCALE: int = 2
+
+
+def realesrgan_command(input_dir: Path, output_dir: Path, image_format: str = "jpg") -> list[str]:
+    """Command line upscaling every image in input_dir into output_dir."""
+    return [
+        BINARY,
+        "-i", str(input_dir),
+        "-o", str(output_dir),
+        "-n", MODEL,
+        "-s", str(SCALE),
+        "-f", image_format,
+    ]
+
+
+class RealEsrganBackend(UpscaleBackend):
+    """
+    RealESRGAN on the GPU through realesrgan-ncnn-vulkan.
+
+    The CLI only reads image files, so each batch passes through lossless
+    PNGs in a temporary directory holding just that batch.
+    """
+    name = f"realesrgan-{MODEL}"
+    tier = "best"
+    scale = SCALE
+
+    def available(self) -> bool:
+        return shutil.which(BINARY) is not None
+
+    def upscale(self, frames: np.ndarray) -> np.ndarray:
+        count, height, width, _ = frames.shape
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_dir = Path(tmpdir) / "batch"
+            output_dir = Path(tmpdir) / "upscaled"
+            input_dir.mkdir()
+            output_dir.mkdir()
+            subprocess.run([
+                "ffmpeg", "-y", "-v", "error",
+                "-f", "rawvideo",
+                "-pix_fmt", "rgb24",
+                "-s", f"{width}x{height}",
+                "-i", "pipe:0",
+                str(input_dir / "frame_%06d.png")
+            ], input=np.ascontiguousarray(frames).tobytes(), check=True, capture_output=True)
+
+            subprocess.run(realesrgan_command(input_dir, output_dir, "png"), check=True, capture_output=True)
+
+            result: subprocess.CompletedProcess[bytes] = subprocess.run([
+                "ffmpeg", "-v", "error",
+                "-i", str(output_dir / "frame_%06d.png"),
+                "-f", "rawvideo",
+                "-pix_fmt", "rgb24",
+                "pipe:1"
+            ], capture_output=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to read upscaled frames: {result.stderr.decode(errors='replace')}")
+        return np.frombuffer(result.stdout, dtype=np.uint8).reshape(count, height * SCALE, width * SCALE, 3)
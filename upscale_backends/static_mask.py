@@ -0,0 +1,155 @@
+# upscale_backends/static_mask.py
+import numpy as np
+
+from upscale_backends.base import UpscaleBackend
+
+TILE_SIZE: int = 64  # Pixels per side of each tile upscaled on its own
+MARGIN: int = 8  # Context around each tile so the upscaler sees past its edges
+SUB_BLOCK: int = 8  # Motion is measured on blocks this size, so a small ember still counts
+TOLERANCE: float = 3.0  # Largest block-mean difference (0-255) from the background counted as static
+# Share of a plain upscale's pixels, margins included, above which tiles cost more than they save
+MAX_TILE_WORK: float = 0.5
+
+
+def moving_tiles(
+    frames: np.ndarray,
+    background: np.ndarray,
+    tile_size: int = TILE_SIZE,
+    tolerance: float = TOLERANCE,
+) -> np.ndarray:
+    """Which tiles of each frame differ from the background.
+
+    A tile moves when any of its ``SUB_BLOCK`` blocks differs from the
+    background by more than ``tolerance`` on average, which ignores
+    compression noise but not small local motion.
+
+    Args:
+        frames: uint8 array of shape (frames, height, width, 3).
+        background: uint8 array of shape (height, width, 3).
+        tile_size: Tile side in pixels; a multiple of ``SUB_BLOCK``.
+        tolerance: Largest static block difference.
+
+    Returns:
+        bool array of shape (frames, tile rows, tile columns).
+
+    Raises:
+        ValueError: If the tile size is not a multiple of ``SUB_BLOCK``.
+    """
+    if tile_size % SUB_BLOCK:
+        raise ValueError(f"Tile size {tile_size} is not a multiple of {SUB_BLOCK}")
+    count, height, width, _ = frames.shape
+    rows: int = -(-height // tile_size)
+    cols: int = -(-width // tile_size)
+    diff: np.ndarray = np.abs(frames.astype(np.int16) - background.astype(np.int16)).max(axis=3)
+    diff = np.pad(diff, ((0, 0), (0, rows * tile_size - height), (0, cols * tile_size - width)))
+    blocks: np.ndarray = diff.reshape(
+        count, rows * tile_size // SUB_BLOCK, SUB_BLOCK, cols * tile_size // SUB_BLOCK, SUB_BLOCK
+    ).mean(axis=(2, 4))
+    per_tile: int = tile_size // SUB_BLOCK
+    return blocks.reshape(count, rows, per_tile, cols, per_tile).max(axis=(2, 4)) > tolerance
+
+
+class StaticRegionBackend(UpscaleBackend):
+    """
+    Upscales the static background once and only the moving tiles per frame.
+
+    With a locked-off camera most of every frame is the background. The
+    first frame is upscaled whole and becomes the background; in every
+    later frame only tiles that differ from it are upscaled, each with a
+    margin of context, and pasted over a copy of the upscaled background.
+    When so much moves that the tiles would cost more than
+    ``max_tile_work`` of a plain upscale, as with full-frame flicker or
+    rain, the batch is upscaled whole instead.
+    """
+
+    def __init__(
+        self,
+        inner: UpscaleBackend,
+        tile_size: int = TILE_SIZE,
+        margin: int = MARGIN,
+        tolerance: float = TOLERANCE,
+        max_tile_work: float = MAX_TILE_WORK,
+    ) -> None:
+        self.inner = inner
+        self.tile_size = tile_size
+        self.margin = margin
+        self.tolerance = tolerance
+        self.max_tile_work = max_tile_work
+        self.name = f"{inner.name}+static{tile_size}"
+        self.tier = inner.tier
+        self.scale = inner.scale
+        self.pixels_seen = 0
+        self.pixels_upscaled = 0
+        self._background: np.ndarray | None = None
+        self._background_output: np.ndarray | None = None
+        self._ever_moving: np.ndarray | None = None
+
+    def available(self) -> bool:
+        return self.inner.available()
+
+    def _crops(self, frames: np.ndarray, tiles: np.ndarray) -> np.ndarray:
+        """Each moving tile with its margin, edge-padded past the frame."""
+        _, height, width, _ = frames.shape
+        size: int = self.tile_size
+        rows: int = -(-height // size)
+        cols: int = -(-width // size)
+        padded: np.ndarray = np.pad(frames, (
+            (0, 0),
+            (self.margin, self.margin + rows * size - height),
+            (self.margin, self.margin + cols * size - width),
+            (0, 0),
+        ), mode="edge")
+        span: int = size + 2 * self.margin
+        return np.stack([
+            padded[frame, row * size:row * size + span, col * size:col * size + span]
+            for frame, row, col in tiles
+        ])
+
+    def upscale(self, frames: np.ndarray) -> np.ndarray:
+        count, height, width, _ = frames.shape
+        if self._background is None:
+            self._background = frames[0].copy()
+
+        moving: np.ndarray = moving_tiles(frames, self._background, self.tile_size, self.tolerance)
+        any_moving: np.ndarray = moving.any(axis=0)
+        self._ever_moving = any_moving if self._ever_moving is None else self._ever_moving | any_moving
+        self.pixels_seen += count * height * width
+
+        tile_pixels: int = int(moving.sum()) * (self.tile_size + 2 * self.margin) ** 2
+        if tile_pixels > self.max_tile_work * count * height * width:
+            whole: np.ndarray = self.inner.upscale(frames)
+            if self._background_output is None:
+                self._background_output = whole[0]
+            self.pixels_upscaled += count * height * width
+            return whole
+
+        if self._background_output is None:
+            self._background_output = self.inner.upscale(frames[:1])[0]
+            self.pixels_upscaled += height * width
+        output: np.ndarray = np.repeat(self._background_output[None], count, axis=0)  # type: ignore[index]
+
+        tiles: np.ndarray = np.argwhere(moving)
+        if len(tiles):
+            upscaled: np.ndarray = self.inner.upscale(self._crops(frames, tiles))
+            scale: int = self.scale
+            edge: int = self.margin * scale
+            size: int = self.tile_size * scale
+            for (frame, row, col), tile in zip(tiles, upscaled):
+                top: int = row * size
+                left: int = col * size
+                # Tiles in the last row or column may hang past the frame
+                fit_y: int = min(size, height * scale - top)
+                fit_x: int = min(size, width * scale - left)
+                output[frame, top:top + fit_y, left:left + fit_x] = tile[edge:edge + fit_y, edge:edge + fit_x]
+            self.pixels_upscaled += tile_pixels
+        return output
+
+    def close(self) -> None:
+        if self.pixels_seen and self._ever_moving is not None:
+            static: float = 1.0 - float(self._ever_moving.mean())
+            print(
+                f"[STATIC] {static:.0%} of the frame never moves; upscaled "
+                f"{self.pixels_upscaled / self.pixels_seen:.0%} of the pixels "
+                f"({self.pixels_seen / max(1, self.pixels_upscaled):.1f}x less work)"
+            )
+        self.inner.close()
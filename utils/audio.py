@@ -1,7 +1,12 @@
 import subprocess
 import tempfile
 import os
-import math
+from typing import TYPE_CHECKING
+
+from utils.probe import probe
+
+if TYPE_CHECKING:
+    from utils.loop_points import LoopPoints
 
 
 def get_audio_duration(path: str) -> float:
@@ -17,43 +22,76 @@ def get_audio_duration(path: str) -> float:
         RuntimeError: If ffprobe command fails.
         ValueError: If ffprobe returns empty or invalid output.
     """
-    cmd: list[str] = [
-        "ffprobe",
-        "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        path
-    ]
-    result: subprocess.CompletedProcess[str] = subprocess.run(
-        cmd, capture_output=True, text=True
-    )
+    duration: float | None = probe(path).duration
+    if duration is None:
+        raise ValueError(f"ffprobe returned no duration for {path}")
+    return duration
 
-    if result.returncode != 0:
-        raise RuntimeError(f"ffprobe failed for {path}: {result.stderr}")
 
-    output: str = result.stdout.strip()
-    if not output:
-        raise ValueError(f"ffprobe returned empty output for {path}")
+def build_loop_unit(
+    input_path: str,
+    output_path: str,
+    crossfade_seconds: float,
+    loop_start: float = 0.0,
+    loop_end: float | None = None
+) -> str:
+    """Render one seamless loop unit of an audio file as PCM WAV.
 
-    try:
-        return float(output)
-    except ValueError:
-        raise ValueError(f"ffprobe returned invalid duration '{output}' for {path}")
+    The unit is the loop region without its first ``crossfade_seconds``,
+    whose tail crossfades into the region's head. It ends exactly where it
+    begins, so back-to-back copies play without a seam. One decoder and
+    one crossfade are used regardless of how long the final loop will be.
+
+    Args:
+        input_path: Path to the source audio.
+        output_path: Path for the WAV loop unit.
+        crossfade_seconds: Duration of the crossfade at the seam.
+        loop_start: Start of the looped region in seconds.
+        loop_end: End of the looped region in seconds (default: end of clip).
+
+    Returns:
+        Path to the loop unit.
+    """
+    region: str = f"atrim=start={loop_start}" + (f":end={loop_end}" if loop_end is not None else "")
+    filter_complex: str = (
+        f"[0:a]{region},asetpts=PTS-STARTPTS,asplit=2[body][head];"
+        f"[body]atrim=start={crossfade_seconds},asetpts=PTS-STARTPTS[b];"
+        f"[head]atrim=end={crossfade_seconds},asetpts=PTS-STARTPTS[h];"
+        f"[b][h]acrossfade=d={crossfade_seconds}:c1=tri:c2=tri[out]"
+    )
+    cmd: list[str] = [
+        "ffmpeg", "-y",
+        "-i", input_path,
+        "-filter_complex", filter_complex,
+        "-map", "[out]",
+        "-c:a", "pcm_s16le",
+        output_path
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+    return output_path
 
 
 def loop_audio(
     input_path: str,
     output_path: str,
     target_duration_seconds: float,
-    crossfade_seconds: float = 3.0
+    crossfade_seconds: float = 3.0,
+    loop_points: "LoopPoints | None" = None
 ) -> str:
     """Loop audio to reach a target duration with smooth crossfades.
 
+    A single seamless loop unit is rendered once, then repeated with
+    ``-stream_loop`` and encoded in one pass. Memory use and filter graph
+    size do not depend on the target duration.
+
     Args:
         input_path: Path to the source audio.
         output_path: Path for the output audio.
         target_duration_seconds: Target duration in seconds.
         crossfade_seconds: Duration of crossfade between loops.
+        loop_points: Loop region and crossfade from
+            ``utils.loop_points``; overrides ``crossfade_seconds``.
+            Default loops the whole clip.
 
     Returns:
         Path to the output audio.
@@ -73,42 +111,35 @@ def loop_audio(
         subprocess.run(cmd, check=True, capture_output=True)
         return output_path
 
-    # Calculate loops needed (accounting for crossfade overlap)
-    effective_duration: float = base_duration - crossfade_seconds
-    loops_needed: int = math.ceil(target_duration_seconds / effective_duration) + 1
-
-    # Build filter_complex for crossfading multiple inputs
-    # Each loop overlaps with the next by crossfade_seconds
-    inputs: list[str] = []
-    for _ in range(loops_needed):
-        inputs.extend(["-i", input_path])
+    loop_start: float = 0.0
+    loop_end: float | None = None
+    if loop_points is not None:
+        crossfade_seconds = loop_points["crossfade"]
+        loop_start, loop_end = loop_points["loop_start"], loop_points["loop_end"]
+    else:
+        # The seam needs audio on both sides of the crossfade
+        crossfade_seconds = min(crossfade_seconds, base_duration / 2)
 
-    # Build the acrossfade chain
-    filter_parts: list[str] = []
-    current_input = "[0:a]"
+    # PCM has no encoder priming, so repeated copies join sample-exactly
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+        unit_path: str = f.name
 
-    for i in range(1, loops_needed):
-        next_input = f"[{i}:a]"
-        output_label = f"[a{i}]" if i < loops_needed - 1 else "[out]"
-        filter_parts.append(
-            f"{current_input}{next_input}acrossfade=d={crossfade_seconds}:c1=tri:c2=tri{output_label}"
-        )
-        current_input = output_label
-
-    filter_complex = ";".join(filter_parts)
+    try:
+        build_loop_unit(input_path, unit_path, crossfade_seconds, loop_start, loop_end)
 
-    cmd = [
-        "ffmpeg", "-y",
-        *inputs,
-        "-filter_complex", filter_complex,
-        "-map", "[out]",
-        "-t", str(target_duration_seconds),
-        "-c:a", "libmp3lame", "-q:a", "2",
-        output_path
-    ]
+        cmd = [
+            "ffmpeg", "-y",
+            "-stream_loop", "-1",
+            "-i", unit_path,
+            "-t", str(target_duration_seconds),
+            "-c:a", "libmp3lame", "-q:a", "2",
+            output_path
+        ]
+        subprocess.run(cmd, check=True, capture_output=True)
+        return output_path
 
-    subprocess.run(cmd, check=True, capture_output=True)
-    return output_path
+    finally:
+        os.remove(unit_path)
 
 
 def merge_audio_video(video_path: str, audio_path: str, output_path: str) -> str:
@@ -0,0 +1,259 @@
+"""Muxed audio/video loop unit for stream-copy assembly of long videos.
+
+One unit holds a whole number of base-clip repeats and exactly as much
+looping audio, already AAC-encoded. Its length is a common multiple of
+the clip length and the 1024-sample AAC frame, so video frames and audio
+frames both end exactly on the unit boundary. The full-length video is
+then the unit concatenated with ``-c copy``: audio is encoded once, for
+the unit only, and assembly never decodes or encodes anything.
+
+AAC encoders prepend priming samples, which would leave a short gap at
+every join. The unit's audio is therefore encoded with a pre-roll of its
+own tail; the frames covering priming and pre-roll are dropped from the
+ADTS stream, so the first kept frame already overlaps the audio that
+precedes it in the loop.
+"""
+
+import math
+import os
+import subprocess
+import tempfile
+import time
+from fractions import Fraction
+
+import numpy as np
+
+from utils.loop import choose_strategy, repeat_file
+from utils.loop_points import LoopPoints
+from utils.pcm import SAMPLE_RATE, PcmEncoder, decode_pcm, make_loop_unit
+from utils.probe import probe
+
+AAC_FRAME_SAMPLES: int = 1024
+AAC_PRIMING_SAMPLES: int = 1024  # Encoder delay of ffmpeg's native AAC encoder
+PREROLL_FRAMES: int = 2
+AAC_UNIT_ARGS: list[str] = ["-c:a", "aac", "-b:a", "192k", "-f", "adts"]
+DEFAULT_CROSSFADE_SECONDS: float = 3.0
+
+
+def alignment(clip_frames: int, fps: Fraction, sample_rate: int = SAMPLE_RATE) -> tuple[int, int]:
+    """Smallest run of clip repeats that ends on an AAC frame boundary.
+
+    Args:
+        clip_frames: Video frames in one base clip.
+        fps: Exact frame rate of the clip.
+        sample_rate: Audio sample rate.
+
+    Returns:
+        (clip repeats, audio samples) of the shortest aligned length;
+        every aligned length is a multiple of it.
+    """
+    clip_samples: Fraction = Fraction(clip_frames) * sample_rate / fps
+    # Repeats needed for clip_samples * repeats to be a multiple of 1024
+    repeats: int = (clip_samples / AAC_FRAME_SAMPLES).denominator
+    return repeats, int(clip_samples * repeats)
+
+
+def loop_lengths(step_samples: int, available: int) -> list[int]:
+    """Lengths of the audio loops that make up one unit.
+
+    The unit is the most whole aligned steps that fit in the available
+    audio, played as one loop. When even one step is longer than the
+    audio, the step is instead split into the fewest loops that fit,
+    differing by at most one sample. Every loop ends where it begins, so
+    back-to-back loops of different lengths still join without a seam.
+
+    Args:
+        step_samples: Samples in one aligned step (see ``alignment``).
+        available: Samples of audio usable for one loop, at least one.
+
+    Returns:
+        Loop lengths in samples, summing to a multiple of ``step_samples``.
+    """
+    if available >= step_samples:
+        return [available // step_samples * step_samples]
+    count: int = math.ceil(step_samples / available)
+    return [step_samples // count + (index < step_samples % count) for index in range(count)]
+
+
+def split_adts(data: bytes) -> list[bytes]:
+    """Split an ADTS stream into its frames, headers included.
+
+    Raises:
+        ValueError: If the data is not a well-formed ADTS stream.
+    """
+    frames: list[bytes] = []
+    position: int = 0
+    while position < len(data):
+        header: bytes = data[position:position + 7]
+        if len(header) < 7 or header[0] != 0xFF or header[1] & 0xF0 != 0xF0:
+            raise ValueError(f"No ADTS sync word at byte {position}")
+        length: int = ((header[3] & 0x03) << 11) | (header[4] << 3) | (header[5] >> 5)
+        if length < 7 or position + length > len(data):
+            raise ValueError(f"Truncated ADTS frame at byte {position}")
+        frames.append(data[position:position + length])
+        position += length
+    return frames
+
+
+def encode_gapless_aac(unit: np.ndarray, output_path: str, sample_rate: int = SAMPLE_RATE) -> str:
+    """Encode a loop unit to ADTS AAC that repeats without priming gaps.
+
+    The encoder is fed the unit's tail, the unit, then its head. Frame
+    ``k`` of the output decodes input samples ``(k - 1) * 1024`` onward
+    (one frame of priming), so keeping the frames after the pre-roll
+    yields exactly ``len(unit) / 1024`` frames whose first one was
+    encoded against the audio that precedes it in the loop.
+
+    Args:
+        unit: Loop unit, a whole number of AAC frames long.
+        output_path: Path for the ADTS file.
+        sample_rate: Sample rate of ``unit``.
+
+    Returns:
+        Path to the ADTS file.
+
+    Raises:
+        ValueError: If the unit is not a whole number of AAC frames.
+        RuntimeError: If the encoder produced too few frames.
+    """
+    if len(unit) % AAC_FRAME_SAMPLES:
+        raise ValueError(f"Unit of {len(unit)} samples is not a whole number of AAC frames")
+    preroll: int = PREROLL_FRAMES * AAC_FRAME_SAMPLES
+    unit_frames: int = len(unit) // AAC_FRAME_SAMPLES
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".aac") as f:
+        raw_path: str = f.name
+    try:
+        with PcmEncoder(raw_path, sample_rate, codec_args=AAC_UNIT_ARGS) as encoder:
+            encoder.write(unit[-preroll:])
+            encoder.write(unit)
+            encoder.write(unit[:preroll])
+        with open(raw_path, "rb") as f:
+            frames: list[bytes] = split_adts(f.read())
+    finally:
+        os.remove(raw_path)
+
+    first: int = (preroll + AAC_PRIMING_SAMPLES) // AAC_FRAME_SAMPLES
+    kept: list[bytes] = frames[first:first + unit_frames]
+    if len(kept) < unit_frames:
+        raise RuntimeError(f"AAC encoder returned {len(frames)} frames, expected at least {first + unit_frames}")
+
+    with open(output_path, "wb") as f:
+        f.write(b"".join(kept))
+    return output_path
+
+
+def build_av_loop_unit(
+    base_video: str,
+    base_audio: str,
+    output_path: str,
+    loop_points: LoopPoints | None = None,
+    sample_rate: int = SAMPLE_RATE,
+) -> str:
+    """Build a muxed MP4 loop unit from a looping clip and its audio.
+
+    The unit is the longest aligned length (see ``alignment``) that fits
+    in the audio after ``loop_start`` and one crossfade. The audio loop
+    is cut to exactly that length, crossfaded at its seam and encoded
+    gaplessly; the video is the base clip stream-copied the matching
+    number of times. When one aligned length is longer than the audio,
+    as with odd frame counts at low frame rates, the unit is one aligned
+    length made of several shorter audio loops (see ``loop_lengths``).
+
+    Args:
+        base_video: Seamlessly looping base clip.
+        base_audio: Audio clip to loop under it.
+        output_path: Path for the MP4 unit.
+        loop_points: Loop start and crossfade for the audio; the loop end
+            is moved to the aligned length. Default starts at 0 with a
+            3s crossfade.
+        sample_rate: Audio sample rate of the unit.
+
+    Returns:
+        Path to the MP4 unit.
+
+    Raises:
+        ValueError: If the audio is too short for its crossfade or the
+            clip's frame rate or frame count cannot be read.
+    """
+    info = probe(base_video)
+    if not info.fps or not info.frame_count:
+        raise ValueError(f"Cannot read frame rate and frame count of {base_video}")
+    fps: Fraction = Fraction(info.fps).limit_denominator(1001)
+    # The container duration also covers longer audio and edit lists; only the stream counts
+    clip_frames: int = info.frame_count
+    step_repeats, step_samples = alignment(clip_frames, fps, sample_rate)
+
+    samples: np.ndarray = decode_pcm(base_audio, sample_rate)
+    loop_start: int = int(round((loop_points["loop_start"] if loop_points else 0.0) * sample_rate))
+    crossfade_frames: int = int(round(
+        (loop_points["crossfade"] if loop_points else DEFAULT_CROSSFADE_SECONDS) * sample_rate
+    ))
+    available: int = len(samples) - loop_start - crossfade_frames
+    lengths: list[int] = loop_lengths(step_samples, available) if available >= max(1, crossfade_frames) else []
+    if not lengths or min(lengths) < crossfade_frames:
+        raise ValueError(
+            f"Audio of {len(samples) / sample_rate:.1f}s is too short for an aligned unit "
+            f"of {step_samples / sample_rate:.2f}s"
+        )
+
+    unit: np.ndarray = np.concatenate([
+        make_loop_unit(samples, crossfade_frames, loop_start, loop_start + crossfade_frames + length)
+        for length in lengths
+    ])
+    unit_samples: int = len(unit)
+    repeats: int = unit_samples // step_samples * step_repeats
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".aac") as f:
+        audio_path: str = f.name
+    try:
+        encode_gapless_aac(unit, audio_path, sample_rate)
+        cmd: list[str] = [
+            "ffmpeg", "-y",
+            "-stream_loop", str(repeats - 1),
+            "-i", base_video,
+            "-i", audio_path,
+            "-map", "0:v:0",
+            "-map", "1:a:0",
+            "-c", "copy",
+            output_path
+        ]
+        subprocess.run(cmd, check=True, capture_output=True)
+    finally:
+        os.remove(audio_path)
+
+    print(
+        f"[AV UNIT] {unit_samples / sample_rate:.2f}s unit: {repeats} clips of {clip_frames} frames, "
+        f"{unit_samples // AAC_FRAME_SAMPLES} AAC frames"
+    )
+    return output_path
+
+
+def concat_units(unit_path: str, output_path: str, target_seconds: float) -> str:
+    """Repeat a muxed loop unit to the target length with stream copy only.
+
+    Uses the same strategies as ``utils.loop.loop_video``: a short concat
+    list for a few copies, one demuxer with ``-stream_loop`` (or doubled
+    intermediates) for many, so assembly does not grow a line per copy.
+
+    Args:
+        unit_path: MP4 unit from ``build_av_loop_unit``.
+        output_path: Path for the full-length video.
+        target_seconds: Target duration in seconds.
+
+    Returns:
+        Path to the full-length video.
+    """
+    unit_duration: float | None = probe(unit_path).duration
+    if not unit_duration:
+        raise ValueError(f"Cannot read duration of {unit_path}")
+    copies: int = math.ceil(target_seconds / unit_duration)
+    strategy: str = choose_strategy(unit_path, copies)
+
+    started: float = time.perf_counter()
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    repeat_file(unit_path, output_path, copies, target_seconds, strategy)
+
+    print(f"[AV UNIT] Assembled {copies} copies via {strategy} in {time.perf_counter() - started:.1f}s (stream copy)")
+    return output_path
@@ -0,0 +1,116 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, TypedDict
+
+
+class BatchResult(TypedDict):
+    """Outcome of one job after it left the last step (or failed)."""
+    index: int
+    value: Any
+    error: BaseException | None
+    failed_step: str | None
+
+
+class _Failure:
+    """Marker passed downstream so later steps skip a failed job."""
+    step: str
+    error: BaseException
+
+    def __init__(self, step: str, error: BaseException) -> None:
+        self.step = step
+        self.error = error
+
+
+_DONE = object()
+
+
+def _run_step(
+    name: str,
+    func: Callable[[Any], Any],
+    inbox: "queue.Queue[Any]",
+    outbox: "queue.Queue[Any]",
+) -> None:
+    while True:
+        item = inbox.get()
+        if item is _DONE:
+            outbox.put(_DONE)
+            return
+
+        index, value = item
+        if isinstance(value, _Failure):
+            outbox.put((index, value))
+            continue
+
+        start: float = time.perf_counter()
+        print(f"[BATCH] job {index}: {name} started")
+        try:
+            result = func(value)
+        except Exception as e:
+            print(f"[BATCH] job {index}: {name} failed: {e}")
+            outbox.put((index, _Failure(name, e)))
+            continue
+
+        print(f"[BATCH] job {index}: {name} finished in {time.perf_counter() - start:.2f}s")
+        outbox.put((index, result))
+
+
+def run_pipelined(
+    items: Iterable[Any],
+    steps: list[tuple[str, Callable[[Any], Any]]],
+    queue_size: int = 1,
+) -> list[BatchResult]:
+    """Push items through a chain of steps, one worker thread per step.
+
+    Each step runs in its own thread and hands results to the next step
+    through a bounded queue, so job N+1 can be in step 1 while job N is in
+    step 2. A full queue blocks the upstream step, which caps how many
+    finished-but-unconsumed intermediates (and their files) exist at once.
+    A job that fails in one step is reported and skipped by later steps.
+
+    Args:
+        items: Inputs for the first step, one per job.
+        steps: Ordered (name, function) pairs; each function takes the
+            previous step's output.
+        queue_size: Maximum number of jobs waiting between two steps.
+
+    Returns:
+        One result per job, in input order.
+    """
+    queues: list[queue.Queue[Any]] = [queue.Queue(maxsize=queue_size) for _ in range(len(steps) + 1)]
+    workers: list[threading.Thread] = [
+        threading.Thread(
+            target=_run_step,
+            args=(name, func, queues[i], queues[i + 1]),
+            name=f"batch-{name}",
+            daemon=True,
+        )
+        for i, (name, func) in enumerate(steps)
+    ]
+    for worker in workers:
+        worker.start()
+
+    def feed() -> None:
+        for index, item in enumerate(items):
+            queues[0].put((index, item))
+        queues[0].put(_DONE)
+
+    feeder = threading.Thread(target=feed, name="batch-feed", daemon=True)
+    feeder.start()
+
+    results: list[BatchResult] = []
+    while True:
+        item = queues[-1].get()
+        if item is _DONE:
+            break
+        index, value = item
+        if isinstance(value, _Failure):
+            results.append({"index": index, "value": None, "error": value.error, "failed_step": value.step})
+        else:
+            results.append({"index": index, "value": value, "error": None, "failed_step": None})
+
+    feeder.join()
+    for worker in workers:
+        worker.join()
+
+    return sorted(results, key=lambda r: r["index"])
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, TypedDict
+
+from utils.hashing import file_digest, remember_file_digest, value_digest
+
+RUNS_DIR: str = "data/runs"
+
+
+class FileFingerprint(TypedDict):
+    """Identity of an output file when its checkpoint was written."""
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+class Checkpoint(TypedDict):
+    """A completed stage: the hash of its inputs and the outputs it produced."""
+    key: str
+    outputs: dict[str, Any]
+    files: dict[str, FileFingerprint]
+
+
+class CheckpointStore:
+    """Per-run record of completed stages, keyed by a hash of their inputs.
+
+    A stage is skipped on resume when its input hash matches the recorded
+    one and every output file it produced still exists unchanged. Because
+    file inputs hash by content, regenerating an upstream file invalidates
+    every stage downstream of it.
+    """
+    run_id: str
+    run_dir: str
+    _checkpoints: dict[str, Checkpoint]
+    _lock: threading.Lock
+
+    def __init__(self, run_id: str, runs_dir: str = RUNS_DIR) -> None:
+        self.run_id = run_id
+        self.run_dir = os.path.join(runs_dir, run_id)
+        self._lock = threading.Lock()
+        self._checkpoints = {}
+
+        if os.path.exists(self._checkpoints_path):
+            with open(self._checkpoints_path, "r", encoding="utf-8") as f:
+                self._checkpoints = json.load(f)
+
+        # Reuse recorded digests so unchanged multi-GB outputs are not re-read
+        for checkpoint in self._checkpoints.values():
+            for path, fp in checkpoint["files"].items():
+                remember_file_digest(path, fp["size"], fp["mtime_ns"], fp["sha256"])
+
+    @property
+    def _checkpoints_path(self) -> str:
+        return os.path.join(self.run_dir, "checkpoints.json")
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.run_dir, "manifest.json")
+
+    def save_manifest(self, manifest: dict[str, Any]) -> None:
+        """Store the run's parameters (e.g. the concept) for later resume."""
+        _write_json(self._manifest_path, manifest)
+
+    def load_manifest(self) -> dict[str, Any]:
+        """Load the run's parameters.
+
+        Raises:
+            FileNotFoundError: If the run does not exist.
+        """
+        with open(self._manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def stage_key(stage_name: str, inputs: dict[str, Any]) -> str:
+        """Hash a stage's name and input values into a checkpoint key."""
+        sha = hashlib.sha256(stage_name.encode("utf-8"))
+        for name in sorted(inputs):
+            sha.update(f"\0{name}={value_digest(inputs[name])}".encode("utf-8"))
+        return sha.hexdigest()
+
+    def lookup(self, stage_name: str, key: str) -> dict[str, Any] | None:
+        """Return the recorded outputs if the checkpoint is still valid.
+
+        Args:
+            stage_name: Name of the stage.
+            key: Current input hash from stage_key.
+
+        Returns:
+            Output values by name, or None if the stage must run again.
+        """
+        with self._lock:
+            checkpoint = self._checkpoints.get(stage_name)
+        if checkpoint is None or checkpoint["key"] != key:
+            return None
+
+        for path, fp in checkpoint["files"].items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            if stat.st_size != fp["size"]:
+                return None
+            if stat.st_mtime_ns != fp["mtime_ns"] and file_digest(path) != fp["sha256"]:
+                return None
+
+        return checkpoint["outputs"]
+
+    def record(self, stage_name: str, key: str, outputs: dict[str, Any]) -> None:
+        """Persist a completed stage.
+
+        Output values that are paths to existing files, or lists of such
+        paths, are fingerprinted so a later lookup can tell whether they
+        were deleted or modified.
+        """
+        files: dict[str, FileFingerprint] = {}
+        for output in outputs.values():
+            for value in output if isinstance(output, list) else [output]:
+                if not (isinstance(value, str) and os.path.isfile(value)):
+                    continue
+                stat = os.stat(value)
+                files[value] = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "sha256": file_digest(value),
+                }
+
+        with self._lock:
+            self._checkpoints[stage_name] = {"key": key, "outputs": outputs, "files": files}
+            _write_json(self._checkpoints_path, self._checkpoints)
+
+    def completed_stages(self) -> list[str]:
+        """Names of stages with a recorded checkpoint."""
+        with self._lock:
+            return list(self._checkpoints)
+
+
+def new_run_id(slug: str) -> str:
+    """Create a run ID from the current time and the concept slug."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}"
+
+
+def _write_json(path: str, data: Any) -> None:
+    # Write-then-rename so a crash never leaves a truncated file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path: str = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,214 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, TypedDict
+
+from utils.checkpoint import CheckpointStore
+
+
+class StageTiming(TypedDict):
+    """Wall-clock window of one executed stage, relative to pipeline start."""
+    stage: str
+    start: float
+    end: float
+    cached: bool
+
+
+class Stage:
+    """A pipeline step with declared inputs and outputs.
+
+    The stage function is called with one keyword argument per input name.
+    A stage with a single output returns the value directly; a stage with
+    several outputs returns a tuple in the same order as ``outputs``.
+    """
+    name: str
+    func: Callable[..., Any]
+    inputs: tuple[str, ...]
+    outputs: tuple[str, ...]
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        inputs: tuple[str, ...],
+        outputs: tuple[str, ...],
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.outputs = outputs
+
+    def __repr__(self) -> str:
+        return f"Stage({self.name!r}, inputs={self.inputs}, outputs={self.outputs})"
+
+
+def validate_stages(stages: list[Stage], available: set[str]) -> None:
+    """Check that a stage graph is complete and acyclic.
+
+    Args:
+        stages: Stages to validate.
+        available: Names already present in the context before any stage runs.
+
+    Raises:
+        ValueError: If a name is produced twice, an input is never produced,
+            or the graph contains a cycle.
+    """
+    producers: dict[str, str] = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers or output in available:
+                raise ValueError(f"Output '{output}' of stage '{stage.name}' is already provided")
+            producers[output] = stage.name
+
+    for stage in stages:
+        for name in stage.inputs:
+            if name not in producers and name not in available:
+                raise ValueError(f"Input '{name}' of stage '{stage.name}' is never produced")
+
+    # Kahn-style pass: repeatedly resolve stages whose inputs are known
+    known: set[str] = set(available)
+    remaining: list[Stage] = list(stages)
+    while remaining:
+        ready = [s for s in remaining if all(name in known for name in s.inputs)]
+        if not ready:
+            names = ", ".join(s.name for s in remaining)
+            raise ValueError(f"Stage graph has a cycle between: {names}")
+        for stage in ready:
+            known.update(stage.outputs)
+            remaining.remove(stage)
+
+
+def _output_values(stage: Stage, result: Any) -> dict[str, Any]:
+    if len(stage.outputs) == 1:
+        return {stage.outputs[0]: result}
+
+    if not isinstance(result, tuple) or len(result) != len(stage.outputs):
+        raise ValueError(
+            f"Stage '{stage.name}' must return a {len(stage.outputs)}-tuple "
+            f"for outputs {stage.outputs}"
+        )
+    return dict(zip(stage.outputs, result))
+
+
+def _call_stage(
+    stage: Stage,
+    kwargs: dict[str, Any],
+    checkpoints: CheckpointStore | None,
+) -> tuple[dict[str, Any], bool]:
+    """Run one stage, or reuse its checkpoint. Returns (outputs, cached)."""
+    if checkpoints is None:
+        return _output_values(stage, stage.func(**kwargs)), False
+
+    key: str = checkpoints.stage_key(stage.name, kwargs)
+    outputs = checkpoints.lookup(stage.name, key)
+    if outputs is not None:
+        return outputs, True
+
+    outputs = _output_values(stage, stage.func(**kwargs))
+    checkpoints.record(stage.name, key, outputs)
+    return outputs, False
+
+
+def run_stages(
+    stages: list[Stage],
+    context: dict[str, Any],
+    max_workers: int = 4,
+    checkpoints: CheckpointStore | None = None,
+) -> list[StageTiming]:
+    """Run stages concurrently as soon as their inputs are available.
+
+    Independent branches overlap on a thread pool, so total wall-clock time
+    approaches the critical path instead of the sum of all stage latencies.
+    Outputs are written into ``context`` as each stage completes.
+
+    Args:
+        stages: Stages to run, in any order.
+        context: Initial values; updated in place with every stage output.
+        max_workers: Maximum number of stages running at once.
+        checkpoints: Store used to skip stages whose inputs are unchanged
+            since a previous attempt, and to record newly completed ones.
+
+    Returns:
+        Start/end timings for each stage, in completion order.
+
+    Raises:
+        ValueError: If the stage graph is invalid.
+        Exception: The first exception raised by a stage, after running
+            stages have finished.
+    """
+    validate_stages(stages, set(context))
+
+    pending: list[Stage] = list(stages)
+    running: dict[Future[Any], tuple[Stage, float]] = {}
+    timings: list[StageTiming] = []
+    error: BaseException | None = None
+    origin: float = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as pool:
+        while pending or running:
+            if error is None:
+                ready = [s for s in pending if all(name in context for name in s.inputs)]
+                for stage in ready:
+                    pending.remove(stage)
+                    kwargs = {name: context[name] for name in stage.inputs}
+                    start = time.perf_counter() - origin
+                    print(f"[PIPELINE] {stage.name} started (+{start:.2f}s)")
+                    running[pool.submit(_call_stage, stage, kwargs, checkpoints)] = (stage, start)
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, start = running.pop(future)
+                end = time.perf_counter() - origin
+
+                exc = future.exception()
+                if exc is not None:
+                    timings.append({"stage": stage.name, "start": start, "end": end, "cached": False})
+                    print(f"[PIPELINE] {stage.name} failed after {end - start:.2f}s: {exc}")
+                    if error is None:
+                        error = exc
+                    continue
+
+                outputs, cached = future.result()
+                context.update(outputs)
+                timings.append({"stage": stage.name, "start": start, "end": end, "cached": cached})
+                if cached:
+                    print(f"[PIPELINE] {stage.name} restored from checkpoint")
+                else:
+                    print(f"[PIPELINE] {stage.name} finished (+{end:.2f}s, took {end - start:.2f}s)")
+
+    if error is not None:
+        raise error
+
+    return timings
+
+
+def format_timeline(timings: list[StageTiming], width: int = 40) -> str:
+    """Render stage timings as a text Gantt chart showing overlap.
+
+    Args:
+        timings: Timings returned by run_stages.
+        width: Width of the bar area in characters.
+
+    Returns:
+        Multi-line string with one row per stage, ordered by start time.
+    """
+    if not timings:
+        return ""
+
+    total: float = max(t["end"] for t in timings) or 1.0
+    name_width: int = max(len(t["stage"]) for t in timings)
+    lines: list[str] = []
+
+    for timing in sorted(timings, key=lambda t: t["start"]):
+        first = int(timing["start"] / total * width)
+        last = max(first + 1, int(round(timing["end"] / total * width)))
+        bar = " " * first + ("=" if timing["cached"] else "#") * (last - first)
+        lines.append(
+            f"{timing['stage']:<{name_width}} |{bar:<{width}}| "
+            f"{timing['start']:8.2f}s -> {timing['end']:8.2f}s"
+            + (" (checkpoint)" if timing["cached"] else "")
+        )
+
+    return "\n".join(lines)
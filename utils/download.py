@@ -0,0 +1,268 @@
+import json
+import os
+import threading
+import time
+
+import requests
+
+CHUNK_SIZE: int = 1024 * 1024  # 1MB chunks keep peak memory constant
+PARALLEL_THRESHOLD: int = 64 * 1024 * 1024  # Only split files larger than 64MB
+MAX_RETRIES: int = 5
+RETRY_BACKOFF_SECONDS: float = 2.0
+
+
+class ServerError(requests.HTTPError):
+    """HTTP 5xx reply; the server may well succeed on a later attempt."""
+
+
+# Failures worth retrying: dropped connections, truncated bodies, timeouts, 5xx
+RETRYABLE_ERRORS: tuple[type[Exception], ...] = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    ServerError,
+)
+
+
+def _raise_for_status(response: requests.Response) -> None:
+    """raise_for_status(), with 5xx replies raised as retryable ServerError."""
+    if response.status_code >= 500:
+        raise ServerError(f"HTTP {response.status_code} from server", response=response)
+    response.raise_for_status()
+
+
+def _meta_path(part_path: str) -> str:
+    """Sidecar recording which URL and ETag a .part file's bytes came from."""
+    return f"{part_path}.meta"
+
+
+def _load_meta(part_path: str) -> dict[str, str | None] | None:
+    try:
+        with open(_meta_path(part_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _save_meta(part_path: str, url: str, etag: str | None) -> None:
+    with open(_meta_path(part_path), "w", encoding="utf-8") as f:
+        json.dump({"url": url, "etag": etag}, f)
+
+
+def _discard_partial(part_path: str) -> None:
+    for path in (part_path, _meta_path(part_path)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _range_total(response: requests.Response) -> int | None:
+    """Full size from a ``Content-Range: bytes .../TOTAL`` header, if known."""
+    total: str = response.headers.get("Content-Range", "").rpartition("/")[2]
+    return int(total) if total.isdigit() else None
+
+
+def _probe_size(url: str, timeout: float) -> int | None:
+    """Return the remote size if the server supports byte ranges."""
+    response: requests.Response = requests.head(url, timeout=timeout, allow_redirects=True)
+    if response.status_code != 200 or response.headers.get("Accept-Ranges") != "bytes":
+        return None
+    length: str | None = response.headers.get("Content-Length")
+    return int(length) if length else None
+
+
+def _download_serial(
+    url: str,
+    part_path: str,
+    timeout: float,
+    chunk_size: int,
+    max_retries: int,
+) -> None:
+    """Stream into part_path, resuming from its current size after failures.
+
+    A partial file is only resumed when its sidecar shows it came from the
+    same URL, and the ETag it was started with is sent as ``If-Range`` so a
+    changed file is served whole instead of spliced onto stale bytes.
+    """
+    meta: dict[str, str | None] | None = _load_meta(part_path)
+    if os.path.exists(part_path) and (meta is None or meta.get("url") != url):
+        # Left by another download to the same path, e.g. an earlier prediction
+        _discard_partial(part_path)
+        meta = None
+
+    attempt: int = 0
+    while True:
+        offset: int = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers: dict[str, str] = {"Range": f"bytes={offset}-"} if offset else {}
+        etag: str | None = meta.get("etag") if meta else None
+        if offset and etag:
+            headers["If-Range"] = etag
+
+        try:
+            with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                if response.status_code == 416 and offset:
+                    if _range_total(response) == offset:
+                        # Range starts at the end: an earlier attempt already finished
+                        return
+                    # The partial is longer than the file, so it cannot be ours
+                    _discard_partial(part_path)
+                    meta = None
+                    continue
+                _raise_for_status(response)
+
+                # 200 means the server ignored the Range header or the file changed; start over
+                mode: str = "ab" if response.status_code == 206 else "wb"
+                if mode == "wb" or meta is None:
+                    meta = {"url": url, "etag": response.headers.get("ETag")}
+                    _save_meta(part_path, url, meta["etag"])
+                expected: str | None = response.headers.get("Content-Length")
+
+                written: int = 0
+                with open(part_path, mode) as f:
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        written += len(chunk)
+
+                if expected is not None and written < int(expected):
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f"Connection closed after {written} of {expected} bytes"
+                    )
+                return
+
+        except RETRYABLE_ERRORS as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            print(f"Download interrupted ({e}), resuming (attempt {attempt}/{max_retries})")
+            time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+
+
+def _download_range(
+    url: str,
+    part_path: str,
+    start: int,
+    end: int,
+    timeout: float,
+    chunk_size: int,
+    max_retries: int,
+) -> None:
+    """Fill bytes [start, end] of part_path, resuming within the range on failure."""
+    position: int = start
+    attempt: int = 0
+    while position <= end:
+        try:
+            headers: dict[str, str] = {"Range": f"bytes={position}-{end}"}
+            with requests.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                _raise_for_status(response)
+                if response.status_code != 206:
+                    raise RuntimeError(f"Server did not honour range request (HTTP {response.status_code})")
+                with open(part_path, "r+b") as f:
+                    f.seek(position)
+                    for chunk in response.iter_content(chunk_size=chunk_size):
+                        f.write(chunk)
+                        position += len(chunk)
+            if position <= end:
+                raise requests.exceptions.ChunkedEncodingError(
+                    f"Range closed at byte {position}, expected {end}"
+                )
+        except RETRYABLE_ERRORS as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            print(f"Range {start}-{end} interrupted ({e}), resuming at {position}")
+            time.sleep(RETRY_BACKOFF_SECONDS * attempt)
+
+
+def _download_parallel(
+    url: str,
+    part_path: str,
+    size: int,
+    connections: int,
+    timeout: float,
+    chunk_size: int,
+    max_retries: int,
+) -> None:
+    """Download size bytes as `connections` concurrent ranged requests."""
+    with open(part_path, "wb") as f:
+        f.truncate(size)
+
+    span: int = -(-size // connections)
+    errors: list[BaseException] = []
+
+    def worker(start: int, end: int) -> None:
+        try:
+            _download_range(url, part_path, start, end, timeout, chunk_size, max_retries)
+        except BaseException as e:
+            errors.append(e)
+
+    threads: list[threading.Thread] = [
+        threading.Thread(target=worker, args=(start, min(start + span, size) - 1))
+        for start in range(0, size, span)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+
+def download_file(
+    url: str,
+    output_path: str,
+    timeout: float,
+    chunk_size: int = CHUNK_SIZE,
+    max_retries: int = MAX_RETRIES,
+    connections: int = 1,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+) -> str:
+    """Stream a URL to disk with constant memory and resume support.
+
+    Data is written in fixed-size chunks to ``<output_path>.part``. After a
+    dropped connection or a 5xx reply the download continues from the bytes
+    already on disk using an HTTP Range request, including across process
+    restarts; a partial file from a different URL or ETag is discarded.
+    With ``connections > 1``, files above ``parallel_threshold`` on servers
+    that accept ranges are fetched as that many concurrent ranged requests.
+    The finished file is atomically renamed into place, so ``output_path``
+    never holds a partial download.
+
+    Args:
+        url: URL to download.
+        output_path: Final destination path.
+        timeout: Per-request connect/read timeout in seconds.
+        chunk_size: Bytes read and written per chunk.
+        max_retries: Retries after retryable network errors.
+        connections: Maximum parallel ranged requests for large files.
+        parallel_threshold: Minimum size in bytes before splitting.
+
+    Returns:
+        output_path.
+
+    Raises:
+        requests.HTTPError: On a non-retryable HTTP error status.
+        requests.RequestException: When retries are exhausted.
+    """
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    part_path: str = f"{output_path}.part"
+
+    size: int | None = None
+    if connections > 1 and not os.path.exists(part_path):
+        size = _probe_size(url, timeout)
+
+    if size is not None and size >= parallel_threshold:
+        # A preallocated file with holes cannot be resumed by its size, so
+        # it never uses the .part name the serial path resumes from
+        ranges_path: str = f"{output_path}.ranges"
+        try:
+            _download_parallel(url, ranges_path, size, connections, timeout, chunk_size, max_retries)
+        except BaseException:
+            os.remove(ranges_path)
+            raise
+        os.replace(ranges_path, output_path)
+        return output_path
+
+    _download_serial(url, part_path, timeout, chunk_size, max_retries)
+    os.replace(part_path, output_path)
+    _discard_partial(part_path)
+    return output_path
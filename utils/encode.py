@@ -0,0 +1,243 @@
+"""Parallel segmented H.264 encoding of frame sequences.
+
+One libx264 process leaves most cores of a wide CPU idle. The frames are
+instead split into segments of whole GOPs, each segment is encoded by its
+own ffmpeg process, and the segments are joined with the concat demuxer
+without re-encoding. Every segment starts a closed GOP with the same
+settings, so the joined stream looks like one encode with fixed GOPs.
+
+Encoder profiles trade speed for size; the frame rate each profile
+achieves is recorded so profiles can be compared on real hardware.
+"""
+
+import json
+import math
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TypedDict
+
+from utils.normalize import GOP_SECONDS, PIXEL_FORMAT, TRACK_TIMESCALE
+
+STATS_PATH: str = "data/encoder_stats.json"
+FRAME_PREFIX: str = "frame_"
+
+# One lock per stats file, shared by every thread that records into it
+_STATS_LOCKS: dict[str, threading.Lock] = {}
+_STATS_LOCKS_GUARD: threading.Lock = threading.Lock()
+
+
+class EncoderProfile(TypedDict):
+    """libx264 settings for one worker."""
+    preset: str
+    crf: int
+    threads: int  # x264 threads per worker process
+
+
+class EncoderStats(TypedDict):
+    """Throughput recorded for one profile across runs."""
+    runs: int
+    frames: int
+    seconds: float
+    fps: float  # Frames over seconds, across all runs
+    last_fps: float
+    last_workers: int
+
+
+ENCODER_PROFILES: dict[str, EncoderProfile] = {
+    "fast": {"preset": "veryfast", "crf": 20, "threads": 2},
+    "balanced": {"preset": "medium", "crf": 18, "threads": 4},
+    "quality": {"preset": "slow", "crf": 16, "threads": 4},
+}
+
+
+def profile_args(profile: EncoderProfile, gop: int) -> list[str]:
+    """Codec arguments for one segment: fixed closed GOPs and no B-frames.
+
+    Without B-frames every segment's timestamps start at zero, which the
+    concat demuxer needs to join segments without gaps.
+    """
+    return [
+        "-c:v", "libx264",
+        "-preset", profile["preset"],
+        "-crf", str(profile["crf"]),
+        "-threads", str(profile["threads"]),
+        "-pix_fmt", PIXEL_FORMAT,
+        "-bf", "0",
+        "-g", str(gop),
+        "-keyint_min", str(gop),
+        "-sc_threshold", "0",
+        "-flags", "+cgop",
+    ]
+
+
+def segment_ranges(frame_count: int, gop: int, workers: int) -> list[tuple[int, int]]:
+    """Split frames into at most ``workers`` runs of whole GOPs.
+
+    Returns:
+        (first frame offset, frame count) per segment; only the last
+        segment may end mid-GOP.
+    """
+    gops: int = math.ceil(frame_count / gop)
+    length: int = math.ceil(gops / max(1, workers)) * gop
+    return [(start, min(length, frame_count - start)) for start in range(0, frame_count, length)]
+
+
+def segment_workers(profile: EncoderProfile) -> int:
+    """Worker processes that fill the available cores at the profile's thread count."""
+    return max(1, (os.cpu_count() or 1) // profile["threads"])
+
+
+def _stats_lock(path: str) -> threading.Lock:
+    with _STATS_LOCKS_GUARD:
+        return _STATS_LOCKS.setdefault(os.path.abspath(path), threading.Lock())
+
+
+def record_fps(profile_name: str, frames: int, seconds: float, workers: int, path: str = STATS_PATH) -> EncoderStats:
+    """Add one run to a profile's recorded throughput.
+
+    Concurrent encodes in one process (batch mode) update the file under
+    a shared lock, and each write goes through its own temporary file.
+
+    Returns:
+        The profile's updated stats.
+    """
+    with _stats_lock(path):
+        stats: dict[str, EncoderStats] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                stats = json.load(f)
+
+        previous: EncoderStats | None = stats.get(profile_name)
+        total_frames: int = frames + (previous["frames"] if previous else 0)
+        total_seconds: float = seconds + (previous["seconds"] if previous else 0.0)
+        entry: EncoderStats = {
+            "runs": 1 + (previous["runs"] if previous else 0),
+            "frames": total_frames,
+            "seconds": total_seconds,
+            "fps": total_frames / total_seconds if total_seconds > 0 else 0.0,
+            "last_fps": frames / seconds if seconds > 0 else 0.0,
+            "last_workers": workers,
+        }
+        stats[profile_name] = entry
+
+        directory: str = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(stats, f, indent=2)
+        os.replace(f.name, path)
+    return entry
+
+
+def _frame_numbers(frames_dir: Path, extension: str) -> list[int]:
+    """Sorted numbers of the ``frame_%06d`` images in a directory."""
+    return sorted(
+        int(path.stem[len(FRAME_PREFIX):])
+        for path in frames_dir.glob(f"{FRAME_PREFIX}*.{extension}")
+    )
+
+
+def _encode_segment(
+    frames_dir: Path,
+    output_path: str,
+    fps: float,
+    first_number: int,
+    count: int,
+    codec_args: list[str],
+    extension: str,
+) -> None:
+    """Encode ``count`` frames starting at image ``first_number``."""
+    cmd: list[str] = [
+        "ffmpeg", "-y", "-v", "error",
+        "-framerate", str(fps),
+        "-start_number", str(first_number),
+        "-i", str(frames_dir / f"{FRAME_PREFIX}%06d.{extension}"),
+        "-frames:v", str(count),
+        *codec_args,
+        output_path
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def encode_segmented(
+    frames_dir: Path,
+    output_video: Path,
+    fps: float,
+    profile: str = "balanced",
+    workers: int | None = None,
+    extension: str = "jpg",
+    stats_path: str = STATS_PATH,
+) -> float:
+    """Encode a frame directory in parallel GOP-aligned segments.
+
+    Args:
+        frames_dir: Directory of ``frame_%06d`` images, numbered consecutively.
+        output_video: Path for the output video.
+        fps: Framerate for the output video.
+        profile: Name of an entry in ``ENCODER_PROFILES``.
+        workers: Parallel encoder processes (default: enough to fill the cores).
+        extension: Image file extension.
+        stats_path: JSON file of recorded throughput per profile.
+
+    Returns:
+        Frames encoded per second, wall clock, including the join.
+
+    Raises:
+        ValueError: If the profile is unknown or the directory has no frames.
+    """
+    if profile not in ENCODER_PROFILES:
+        raise ValueError(f"Unknown encoder profile '{profile}' (expected one of {', '.join(ENCODER_PROFILES)})")
+    settings: EncoderProfile = ENCODER_PROFILES[profile]
+    numbers: list[int] = _frame_numbers(frames_dir, extension)
+    if not numbers:
+        raise ValueError(f"No {FRAME_PREFIX}*.{extension} frames in {frames_dir}")
+
+    gop: int = max(1, round(GOP_SECONDS * fps))
+    worker_count: int = workers or segment_workers(settings)
+    ranges: list[tuple[int, int]] = segment_ranges(len(numbers), gop, worker_count)
+    codec_args: list[str] = profile_args(settings, gop)
+
+    started: float = time.perf_counter()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        segments: list[str] = [os.path.join(tmpdir, f"segment_{index:04d}.mp4") for index in range(len(ranges))]
+        # Threads only wait on the ffmpeg processes doing the work
+        with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+            jobs = [
+                pool.submit(
+                    _encode_segment, frames_dir, segment, fps, numbers[0] + start, count, codec_args, extension
+                )
+                for segment, (start, count) in zip(segments, ranges)
+            ]
+            for job in jobs:
+                job.result()
+
+        concat_file: str = os.path.join(tmpdir, "segments.txt")
+        with open(concat_file, "w", encoding="utf-8") as f:
+            f.writelines(f"file '{segment}'\n" for segment in segments)
+        subprocess.run([
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", concat_file,
+            "-c", "copy",
+            # Same container settings as utils.normalize, so loops can stream-copy the result
+            "-video_track_timescale", str(TRACK_TIMESCALE),
+            "-use_editlist", "0",
+            "-movflags", "+faststart",
+            str(output_video)
+        ], check=True, capture_output=True)
+    elapsed: float = time.perf_counter() - started
+
+    achieved: float = len(numbers) / elapsed if elapsed > 0 else 0.0
+    stats: EncoderStats = record_fps(profile, len(numbers), elapsed, len(ranges), stats_path)
+    print(
+        f"[ENCODE] {len(numbers)} frames in {len(ranges)} segments with '{profile}': "
+        f"{achieved:.1f} fps (profile average {stats['fps']:.1f} fps)"
+    )
+    return achieved
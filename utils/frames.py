@@ -0,0 +1,159 @@
+"""Streaming video frames: ffmpeg decodes and encodes, NumPy holds a window.
+
+Frames move as uint8 RGB arrays of shape (frames, height, width, 3) in
+batches of a fixed window, so memory depends on the window and the frame
+size, never on the length of the clip, and nothing touches the disk.
+"""
+
+import os
+import subprocess
+import time
+from fractions import Fraction
+from typing import IO, Iterator, NoReturn
+
+import numpy as np
+
+from utils.pcm import StderrTail
+
+WINDOW_FRAMES: int = 16  # ~100MB of 1080p input and ~400MB of 4K output per batch
+
+
+def iter_frame_batches(
+    path: str,
+    resolution: tuple[int, int],
+    window: int = WINDOW_FRAMES,
+) -> Iterator[np.ndarray]:
+    """Decode a video through an ffmpeg pipe into batches of RGB frames.
+
+    Args:
+        path: Video file to decode.
+        resolution: (width, height) of the video.
+        window: Frames per batch; only the last batch may be shorter.
+
+    Yields:
+        uint8 arrays of shape (frames, height, width, 3).
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the file.
+    """
+    width, height = resolution
+    cmd: list[str] = [
+        "ffmpeg", "-v", "error",
+        "-i", path,
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "pipe:1"
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout: IO[bytes] = proc.stdout  # type: ignore[assignment]
+    stderr = StderrTail(proc.stderr)  # type: ignore[arg-type]
+    frame_bytes: int = width * height * 3
+    try:
+        while data := stdout.read(window * frame_bytes):
+            usable: int = len(data) - len(data) % frame_bytes
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.uint8).reshape(-1, height, width, 3)
+    except GeneratorExit:
+        # Consumer stopped early; the decoder is no longer needed
+        proc.kill()
+        raise
+    finally:
+        stdout.close()
+        returncode: int = proc.wait()
+        message: str = stderr.text()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {path}: {message}")
+
+
+class FrameEncoder:
+    """Streams uint8 RGB frame batches into an ffmpeg encoder process.
+
+    Use as a context manager; the output file is complete once the block
+    exits without an error.
+    """
+    output_path: str
+    fps: Fraction
+    resolution: tuple[int, int]
+    frames_written: int
+    _proc: subprocess.Popen[bytes]
+    _stderr: StderrTail
+    _started: float
+
+    def __init__(
+        self,
+        output_path: str,
+        resolution: tuple[int, int],
+        fps: Fraction,
+        codec_args: list[str],
+    ) -> None:
+        self.output_path = output_path
+        self.fps = fps
+        self.resolution = resolution
+        self.frames_written = 0
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        width, height = resolution
+        cmd: list[str] = [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{width}x{height}",
+            "-framerate", str(fps),
+            "-i", "pipe:0",
+            *codec_args,
+            output_path
+        ]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._stderr = StderrTail(self._proc.stderr)  # type: ignore[arg-type]
+        self._started = time.perf_counter()
+
+    def write(self, frames: np.ndarray) -> None:
+        """Encode one batch of frames.
+
+        Raises:
+            ValueError: If the frames do not match the encoder's resolution.
+            RuntimeError: If the encoder has exited, with its error output.
+        """
+        width, height = self.resolution
+        if frames.shape[1:] != (height, width, 3):
+            raise ValueError(f"Frames of shape {frames.shape[1:]} do not match {width}x{height} RGB")
+        try:
+            self._proc.stdin.write(np.ascontiguousarray(frames, dtype=np.uint8).tobytes())  # type: ignore[union-attr]
+        except BrokenPipeError:
+            self._fail()
+        self.frames_written += len(frames)
+
+    def _fail(self) -> NoReturn:
+        """Raise the error of an encoder that closed its input early."""
+        self._proc.wait()
+        raise RuntimeError(f"ffmpeg failed to encode {self.output_path}: {self._stderr.text()}")
+
+    def close(self) -> None:
+        """Finish encoding and report throughput.
+
+        Raises:
+            RuntimeError: If the encoder exits with an error.
+        """
+        try:
+            self._proc.stdin.close()  # type: ignore[union-attr]
+        except BrokenPipeError:
+            self._fail()
+        returncode: int = self._proc.wait()
+        message: str = self._stderr.text()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {self.output_path}: {message}")
+
+        elapsed: float = time.perf_counter() - self._started
+        rate: str = f"{self.frames_written / elapsed:.1f} fps" if elapsed > 0 else "instant"
+        print(f"[FRAMES] Wrote {self.frames_written} frames in {elapsed:.1f}s ({rate})")
+
+    def __enter__(self) -> "FrameEncoder":
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._proc.kill()
+            self._proc.wait()
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any
+
+CHUNK_SIZE: int = 1024 * 1024
+
+_digests: dict[tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """Return the SHA-256 of a file's contents.
+
+    Results are memoized by (absolute path, size, mtime), so a file is only
+    read again after it changes.
+
+    Args:
+        path: Path to the file.
+
+    Returns:
+        Hex digest of the file contents.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+    with _lock:
+        cached = _digests.get(key)
+    if cached is not None:
+        return cached
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha.update(chunk)
+    digest: str = sha.hexdigest()
+
+    with _lock:
+        _digests[key] = digest
+    return digest
+
+
+def remember_file_digest(path: str, size: int, mtime_ns: int, digest: str) -> None:
+    """Seed the digest memo with a previously computed value.
+
+    Lets a caller that persisted (size, mtime, digest) skip re-reading a
+    large unchanged file in a new process.
+    """
+    with _lock:
+        _digests[(os.path.abspath(path), size, mtime_ns)] = digest
+
+
+def value_digest(value: Any) -> str:
+    """Return a stable SHA-256 for a stage input value.
+
+    Paths to existing files hash by content, also inside lists;
+    JSON-compatible values hash by their canonical JSON form. Other objects (clients, backends) hash by
+    type name, since only their kind affects the result.
+
+    Args:
+        value: The value to fingerprint.
+
+    Returns:
+        Hex digest identifying the value.
+    """
+    if isinstance(value, str) and os.path.isfile(value):
+        return "file:" + file_digest(value)
+    if isinstance(value, list):
+        value = [value_digest(item) for item in value]
+
+    encoded: str = json.dumps(
+        value,
+        sort_keys=True,
+        default=lambda o: f"<{type(o).__module__}.{type(o).__qualname__}>",
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
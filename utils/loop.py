@@ -1,8 +1,16 @@
+import json
 import subprocess
 import tempfile
 import os
 import math
-from typing import TextIO
+import statistics
+
+from utils.probe import probe
+
+# Every concat-list line is a separate demuxer open and timestamp rewrite
+CONCAT_MAX_LOOPS: int = 120
+STRATEGIES: tuple[str, ...] = ("concat", "stream_loop", "doubling")
+SEAMS_TO_VALIDATE: int = 3
 
 
 def get_video_duration(path: str) -> float:
@@ -18,49 +26,32 @@ def get_video_duration(path: str) -> float:
         RuntimeError: If ffprobe command fails.
         ValueError: If ffprobe returns empty or invalid output.
     """
-    cmd: list[str] = [
-        "ffprobe",
-        "-v", "error",
-        "-show_entries", "format=duration",
-        "-of", "default=noprint_wrappers=1:nokey=1",
-        path
-    ]
-    result: subprocess.CompletedProcess[str] = subprocess.run(
-        cmd, capture_output=True, text=True
-    )
+    duration: float | None = probe(path).duration
+    if duration is None:
+        raise ValueError(f"ffprobe returned no duration for {path}")
+    return duration
 
-    if result.returncode != 0:
-        raise RuntimeError(f"ffprobe failed for {path}: {result.stderr}")
 
-    output: str = result.stdout.strip()
-    if not output:
-        raise ValueError(f"ffprobe returned empty output for {path}")
+def choose_strategy(input_path: str, loops_needed: int) -> str:
+    """Pick the cheapest way to repeat a clip loops_needed times.
 
-    try:
-        return float(output)
-    except ValueError:
-        raise ValueError(f"ffprobe returned invalid duration '{output}' for {path}")
-
-
-def loop_video(input_path: str, output_path: str, duration_hours: int) -> str:
-    """Loop a video to reach a target duration.
-
-    Args:
-        input_path: Path to the source video.
-        output_path: Path for the output video.
-        duration_hours: Target duration in hours.
-
-    Returns:
-        Path to the output video.
+    Short lists are concatenated directly. Longer targets use
+    ``-stream_loop``, which demuxes the clip once and offsets each repeat
+    by its duration. Clips with B-frames have reordered timestamps that
+    can run past that offset at the seam, so they are doubled into an
+    intermediate instead, keeping the final concat list short.
     """
-    target_seconds: int = duration_hours * 3600
-    base_duration: float = get_video_duration(input_path)
+    if loops_needed <= CONCAT_MAX_LOOPS:
+        return "concat"
+    if probe(input_path).has_b_frames:
+        return "doubling"
+    return "stream_loop"
 
-    loops_needed: int = math.ceil(target_seconds / base_duration)
 
-    # Create concat file
+def _concat(input_path: str, output_path: str, copies: int, target_seconds: float | None = None) -> None:
+    """Stream-copy ``copies`` repeats of a file through the concat demuxer."""
     with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".txt") as f:
-        for _ in range(loops_needed):
+        for _ in range(copies):
             f.write(f"file '{os.path.abspath(input_path)}'\n")
         concat_file: str = f.name
 
@@ -71,13 +62,173 @@ def loop_video(input_path: str, output_path: str, duration_hours: int) -> str:
             "-f", "concat",
             "-safe", "0",
             "-i", concat_file,
-            "-t", str(target_seconds),
+            *(["-t", str(target_seconds)] if target_seconds is not None else []),
             "-c", "copy",
             output_path
         ]
 
-        subprocess.run(cmd, check=True)
-        return output_path
+        subprocess.run(cmd, check=True, capture_output=True)
 
     finally:
         os.remove(concat_file)
+
+
+def _stream_loop(input_path: str, output_path: str, loops_needed: int, target_seconds: float) -> None:
+    """Repeat a clip with a single demuxer using -stream_loop."""
+    cmd: list[str] = [
+        "ffmpeg",
+        "-y",
+        "-stream_loop", str(loops_needed - 1),
+        "-i", input_path,
+        "-t", str(target_seconds),
+        "-c", "copy",
+        output_path
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+
+
+def _doubling(input_path: str, output_path: str, loops_needed: int, target_seconds: float) -> None:
+    """Double an intermediate until a short concat list of it covers the target."""
+    intermediate: str = input_path
+    copies: int = 1
+    try:
+        while math.ceil(loops_needed / copies) > CONCAT_MAX_LOOPS:
+            fd, doubled = tempfile.mkstemp(suffix=os.path.splitext(input_path)[1] or ".mp4",
+                                           dir=os.path.dirname(os.path.abspath(output_path)))
+            os.close(fd)
+            try:
+                _concat(intermediate, doubled, 2)
+            except BaseException:
+                os.remove(doubled)
+                raise
+            if intermediate != input_path:
+                os.remove(intermediate)
+            intermediate, copies = doubled, copies * 2
+
+        _concat(intermediate, output_path, math.ceil(loops_needed / copies), target_seconds)
+
+    finally:
+        if intermediate != input_path:
+            os.remove(intermediate)
+
+
+def repeat_file(
+    input_path: str,
+    output_path: str,
+    loops_needed: int,
+    target_seconds: float,
+    strategy: str | None = None,
+) -> str:
+    """Stream-copy a file ``loops_needed`` times, cut to the target length.
+
+    Args:
+        input_path: File to repeat; may hold audio as well as video.
+        output_path: Path for the output file.
+        loops_needed: Repeats that cover the target.
+        target_seconds: Length of the output in seconds.
+        strategy: "concat", "stream_loop" or "doubling" (default: see
+            ``choose_strategy``).
+
+    Returns:
+        Path to the output file.
+
+    Raises:
+        ValueError: If the strategy is unknown.
+    """
+    if strategy is None:
+        strategy = choose_strategy(input_path, loops_needed)
+    if strategy == "concat":
+        _concat(input_path, output_path, loops_needed, target_seconds)
+    elif strategy == "stream_loop":
+        _stream_loop(input_path, output_path, loops_needed, target_seconds)
+    elif strategy == "doubling":
+        _doubling(input_path, output_path, loops_needed, target_seconds)
+    else:
+        raise ValueError(f"Unknown loop strategy '{strategy}' (expected one of {', '.join(STRATEGIES)})")
+    return output_path
+
+
+def validate_loop_seams(path: str, base_duration: float, seams: int = SEAMS_TO_VALIDATE) -> None:
+    """Check that video timestamps run on smoothly across the first seams.
+
+    Reads the packets a second either side of each seam and requires
+    decode timestamps that strictly increase with no step longer than
+    1.5 frame durations.
+
+    Args:
+        path: Looped video.
+        base_duration: Duration of one repeat of the base clip.
+        seams: Number of seams to check.
+
+    Raises:
+        RuntimeError: If a seam has a timestamp gap, overlap or duplicate.
+    """
+    for index in range(1, seams + 1):
+        seam: float = index * base_duration
+        cmd: list[str] = [
+            "ffprobe", "-v", "error",
+            "-select_streams", "v:0",
+            "-print_format", "json",
+            "-show_entries", "packet=dts_time",
+            "-read_intervals", f"{max(seam - 1.0, 0.0)}%+2",
+            path
+        ]
+        result: subprocess.CompletedProcess[str] = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffprobe failed for {path}: {result.stderr}")
+
+        times: list[float] = []
+        for packet in json.loads(result.stdout or "{}").get("packets", []):
+            try:
+                times.append(float(packet["dts_time"]))
+            except (KeyError, ValueError):
+                continue
+        if len(times) < 3:
+            continue  # Seam lies past the end of the file
+
+        steps: list[float] = [b - a for a, b in zip(times, times[1:])]
+        frame: float = statistics.median(steps)
+        for previous, step in zip(times, steps):
+            if step <= 0 or step > 1.5 * frame:
+                raise RuntimeError(
+                    f"Timestamp discontinuity at the {seam:.2f}s seam of {path}: "
+                    f"{previous:.3f}s -> {previous + step:.3f}s (frame {frame:.3f}s)"
+                )
+
+
+def loop_video(
+    input_path: str,
+    output_path: str,
+    duration_hours: int,
+    strategy: str | None = None,
+    validate_seams: bool = False
+) -> str:
+    """Loop a video to reach a target duration.
+
+    Args:
+        input_path: Path to the source video.
+        output_path: Path for the output video.
+        duration_hours: Target duration in hours.
+        strategy: "concat", "stream_loop" or "doubling"; by default the
+            cheapest for the number of loops (see ``choose_strategy``).
+        validate_seams: Check timestamps across the first seams afterwards.
+
+    Returns:
+        Path to the output video.
+
+    Raises:
+        ValueError: If the strategy is unknown.
+        RuntimeError: If seam validation finds a discontinuity.
+    """
+    target_seconds: int = duration_hours * 3600
+    base_duration: float = get_video_duration(input_path)
+
+    loops_needed: int = math.ceil(target_seconds / base_duration)
+    if strategy is None:
+        strategy = choose_strategy(input_path, loops_needed)
+    print(f"[LOOP] {loops_needed} loops of {base_duration:.2f}s via {strategy}")
+    repeat_file(input_path, output_path, loops_needed, target_seconds, strategy)
+
+    if validate_seams:
+        validate_loop_seams(output_path, base_duration)
+    return output_path
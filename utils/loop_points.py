@@ -0,0 +1,253 @@
+"""Find loop-in/loop-out points and a crossfade length that hide the seam.
+
+Generated clips often fade in, fade out or change texture near their ends,
+so the natural end of the file is rarely the best place to loop. The
+search compares short-time log spectra across every pair of candidate
+points (spectral similarity) and favours loop lengths at which the
+waveform correlates with itself (autocorrelation), which is how material
+that really repeats is recognised. The chosen loop end is then refined to
+the sample with a cross-correlation around the seam, so the crossfade
+joins in phase.
+"""
+
+import time
+from typing import TypedDict
+
+import numpy as np
+
+from utils.pcm import SAMPLE_RATE, decode_pcm
+
+HOP_FRAMES: int = 4096  # ~85ms analysis resolution at 48kHz
+BANDS: int = 48
+LOW_BAND_BINS: int = 32  # ~375Hz at 48kHz with a 4096-sample window
+AUTOCORR_RATE: int = 4000  # Autocorrelation runs on a decimated copy of the clip
+CROSSFADE_CHOICES: tuple[float, ...] = (0.5, 1.0, 2.0, 3.0, 4.0)
+MIN_LOOP_SECONDS: float = 20.0
+EDGE_SECONDS: float = 0.5  # Ignore fade-in/fade-out at the very ends of the clip
+# Preferences, in standard deviations of the seam distance: longer loops
+# repeat less often and longer crossfades hide texture changes better
+LENGTH_WEIGHT: float = 1.0
+FADE_WEIGHT: float = 0.5
+AUTOCORR_WEIGHT: float = 8.0  # Per unit of normalized autocorrelation
+
+
+class LoopPoints(TypedDict):
+    """Where to loop a clip, in seconds from its start."""
+    loop_start: float
+    loop_end: float
+    crossfade: float
+    score: float  # Mean log-spectral distance across the seam; lower is better
+
+
+def _band_features(mono: np.ndarray, hop: int) -> np.ndarray:
+    """Log energy in log-spaced frequency bands, one row per hop."""
+    frames: int = len(mono) // hop
+    windowed: np.ndarray = mono[:frames * hop].reshape(frames, hop) * np.hanning(hop).astype(np.float32)
+    power: np.ndarray = np.abs(np.fft.rfft(windowed, axis=1)) ** 2
+
+    # Everything below LOW_BAND_BINS shares one band: single-bin bands of
+    # noisy material vary so much between frames that they drown real matches
+    edges: np.ndarray = np.unique(np.concatenate((
+        [0], np.geomspace(LOW_BAND_BINS, power.shape[1], BANDS).astype(int)
+    )))
+    bands: np.ndarray = np.add.reduceat(power, edges[:-1], axis=1)
+    return np.log10(bands + 1e-10).astype(np.float32)
+
+
+def _diagonal_sums(distance: np.ndarray) -> np.ndarray:
+    """Zero-padded running sums along diagonals: P[i+w, j+w] - P[i, j] sums w steps."""
+    rows, cols = distance.shape
+    padded: np.ndarray = np.zeros((rows + 1, cols + 1), dtype=np.float32)
+    padded[1:, 1:] = distance
+    for row in range(1, rows + 1):
+        padded[row, 1:] += padded[row - 1, :-1]
+    return padded
+
+
+def _lag_similarity(mono: np.ndarray, sample_rate: int, hop: int, count: int) -> np.ndarray:
+    """Best normalized autocorrelation of the waveform for each lag in hops.
+
+    Entry ``k`` is the highest correlation between the clip and itself
+    shifted by ``k`` hops, give or take half a hop, normalized by the
+    energy of the overlapping parts so it lies in [-1, 1].
+    """
+    factor: int = max(1, sample_rate // AUTOCORR_RATE)
+    # Block averaging is a crude low-pass, good enough to compare lags
+    decimated: np.ndarray = mono[:len(mono) // factor * factor].reshape(-1, factor).mean(axis=1, dtype=np.float64)
+    decimated -= decimated.mean()
+    n: int = len(decimated)
+
+    size: int = 1 << int(np.ceil(np.log2(2 * n)))
+    spectrum: np.ndarray = np.fft.rfft(decimated, size)
+    acf: np.ndarray = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, size)[:n]
+
+    energy: np.ndarray = np.concatenate(([0.0], np.cumsum(decimated ** 2)))
+    lags: np.ndarray = np.arange(n)
+    # Energy of decimated[:n - lag] and of decimated[lag:]
+    overlap: np.ndarray = np.sqrt(np.maximum(energy[n - lags] * (energy[n] - energy[lags]), 1e-12))
+    normalized: np.ndarray = acf / overlap
+
+    # Lag k hops covers decimated lags within half a hop of k * hop / factor
+    step: float = hop / factor
+    edges: np.ndarray = np.clip(np.round((np.arange(count) - 0.5) * step).astype(int), 0, n - 1)
+    edges[0] = 0
+    return np.maximum.reduceat(normalized, edges).astype(np.float32)
+
+
+def _refine_end(mono: np.ndarray, start: int, end: int, crossfade: int, search: int) -> int:
+    """Shift loop_end by up to ``search`` samples to maximize seam correlation."""
+    template: np.ndarray = mono[start:start + crossfade].astype(np.float64)
+    low: int = max(end - crossfade - search, start + crossfade)
+    high: int = min(end + search, len(mono))
+    region: np.ndarray = mono[low:high].astype(np.float64)
+    if len(region) <= len(template) or not template.any():
+        return end
+
+    size: int = 1 << int(np.ceil(np.log2(len(region) + len(template))))
+    corr: np.ndarray = np.fft.irfft(
+        np.fft.rfft(region, size) * np.conj(np.fft.rfft(template, size)), size
+    )[:len(region) - len(template) + 1]
+
+    energy: np.ndarray = np.concatenate(([0.0], np.cumsum(region ** 2)))
+    window_energy: np.ndarray = energy[len(template):] - energy[:-len(template)]
+    normalized: np.ndarray = corr / np.sqrt(np.maximum(window_energy, 1e-12))
+
+    # Offset of the best-matching window, converted back to an end point
+    return low + int(np.argmax(normalized)) + crossfade
+
+
+def find_loop_points(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    min_loop_seconds: float = MIN_LOOP_SECONDS,
+    crossfade_choices: tuple[float, ...] = CROSSFADE_CHOICES,
+) -> LoopPoints:
+    """Choose loop points and crossfade length for decoded audio.
+
+    The seam crossfades ``samples[loop_end - crossfade:loop_end]`` into
+    ``samples[loop_start:loop_start + crossfade]`` (see
+    ``utils.pcm.make_loop_unit``), so the search looks for two stretches
+    of audio, one crossfade long, whose spectra match most closely.
+
+    Args:
+        samples: Decoded audio, shape (frames, channels) or (frames,).
+        sample_rate: Sample rate of ``samples``.
+        min_loop_seconds: Shortest acceptable loop.
+        crossfade_choices: Crossfade lengths to try, in seconds.
+
+    Returns:
+        Loop points in seconds and the seam score.
+
+    Raises:
+        ValueError: If the clip is too short for the shortest loop.
+    """
+    # A matrix product downmixes far faster than mean(axis=1) over 2 columns
+    mono: np.ndarray = (
+        samples @ np.full(samples.shape[1], 1.0 / samples.shape[1], dtype=samples.dtype)
+        if samples.ndim == 2 else samples
+    ).astype(np.float32, copy=False)
+    features: np.ndarray = _band_features(mono, HOP_FRAMES)
+    count: int = len(features)
+
+    edge: int = int(np.ceil(EDGE_SECONDS * sample_rate / HOP_FRAMES))
+    min_loop: int = int(np.ceil(min_loop_seconds * sample_rate / HOP_FRAMES))
+    if count - 2 * edge < min_loop:
+        raise ValueError(
+            f"Clip of {len(mono) / sample_rate:.1f}s is too short for a {min_loop_seconds}s loop"
+        )
+
+    # Squared distance between every pair of analysis frames
+    sq: np.ndarray = (features ** 2).sum(axis=1)
+    distance: np.ndarray = np.maximum(sq[:, None] + sq[None, :] - 2.0 * features @ features.T, 0.0) / features.shape[1]
+    sums: np.ndarray = _diagonal_sums(distance)
+    lag_similarity: np.ndarray = _lag_similarity(mono, sample_rate, HOP_FRAMES, count)
+
+    # Loops must start after the head edge and leave room for min_loop
+    first_start: int = edge
+    last_start: int = count - edge - min_loop
+    starts: np.ndarray = np.arange(first_start, last_start + 1)
+    longest_fade: float = max(crossfade_choices)
+    best: tuple[float, float, int, int, int] | None = None
+    for seconds in crossfade_choices:
+        width: int = max(1, int(round(seconds * sample_rate / HOP_FRAMES)))
+        if 2 * width > min_loop:
+            continue  # make_loop_unit needs the region to hold two crossfades
+        # Window starts on the loop_end side; the loop ends width frames later
+        first_window: int = first_start + min_loop - width
+        last_window: int = count - edge - width
+        if last_window < first_window:
+            continue
+        windows: np.ndarray = np.arange(first_window, last_window + 1)
+
+        # distance[i, j]: mean distance between frames i.. and j.. over the crossfade
+        seam: np.ndarray = sums[starts[0] + width:starts[-1] + width + 1, windows[0] + width:windows[-1] + width + 1]
+        seam = (seam - sums[starts[0]:starts[-1] + 1, windows[0]:windows[-1] + 1]) / width
+
+        # Loop length is min_loop + (j - i), so j < i means too short
+        rows, cols = seam.shape
+        too_short: np.ndarray = np.tri(rows, cols, -1, dtype=bool)
+
+        # Short windows match by chance more often than long ones, so rank
+        # seams by how unusual they are for this crossfade length
+        valid: np.ndarray = seam[~too_short]
+        objective: np.ndarray = (seam - valid.mean()) / max(float(valid.std()), 1e-9)
+
+        # The length preference splits into a row term and a column term
+        objective += (LENGTH_WEIGHT * (1.0 - min_loop / count) + LENGTH_WEIGHT / count * np.arange(rows, dtype=np.float32))[:, None]
+        objective -= (LENGTH_WEIGHT / count * np.arange(cols, dtype=np.float32))[None, :]
+        objective -= FADE_WEIGHT * seconds / longest_fade
+
+        # The seam windows sit min_loop - width + j - i hops apart, so the
+        # autocorrelation term is constant along diagonals; reversed sliding
+        # windows over the lag curve lay it out without a Python loop
+        lags: np.ndarray = lag_similarity[min_loop - width:min_loop - width + cols]
+        padded: np.ndarray = np.concatenate((np.zeros(rows - 1, dtype=np.float32), lags))
+        padded = np.pad(padded, (0, rows - 1 + cols - len(padded)))
+        objective -= AUTOCORR_WEIGHT * np.lib.stride_tricks.sliding_window_view(padded, cols)[::-1]
+        objective[too_short] = np.inf
+
+        i, j = np.unravel_index(int(np.argmin(objective)), objective.shape)
+        candidate: float = float(objective[i, j])
+        if best is None or candidate < best[0]:
+            best = (candidate, float(seam[i, j]), int(starts[i]), int(windows[j]) + width, width)
+
+    if best is None:
+        raise ValueError(
+            f"Clip of {len(mono) / sample_rate:.1f}s is too short for a {min_loop_seconds}s loop"
+        )
+
+    _, seam_distance, start_frame, end_frame, width = best
+    loop_start: int = start_frame * HOP_FRAMES
+    crossfade: int = width * HOP_FRAMES
+    loop_end: int = _refine_end(mono, loop_start, end_frame * HOP_FRAMES, crossfade, HOP_FRAMES)
+    loop_end = min(loop_end, len(mono))
+
+    return {
+        "loop_start": loop_start / sample_rate,
+        "loop_end": loop_end / sample_rate,
+        "crossfade": crossfade / sample_rate,
+        "score": seam_distance,
+    }
+
+
+def analyze_loop_points(path: str, sample_rate: int = SAMPLE_RATE) -> LoopPoints:
+    """Decode an audio file and find its loop points.
+
+    Args:
+        path: Audio file to analyze.
+        sample_rate: Rate the file is decoded at for analysis.
+
+    Returns:
+        Loop points in seconds and the seam score.
+    """
+    samples: np.ndarray = decode_pcm(path, sample_rate)
+
+    started: float = time.perf_counter()
+    points: LoopPoints = find_loop_points(samples, sample_rate)
+    elapsed: float = time.perf_counter() - started
+
+    print(
+        f"[LOOP POINTS] {points['loop_start']:.2f}s -> {points['loop_end']:.2f}s, "
+        f"{points['crossfade']:.1f}s crossfade (analyzed {len(samples) / sample_rate:.0f}s in {elapsed:.2f}s)"
+    )
+    return points
@@ -0,0 +1,175 @@
+"""Layered ambience mixer built on the PCM engine.
+
+Several stems (rain, fire crackle, wind...) are each turned into a seamless
+loop unit. The units get lengths that do not line up, random start offsets
+and slow random gain automation, so the combined mix does not repeat for
+far longer than any single stem.
+"""
+
+import math
+import random
+
+import numpy as np
+
+from utils.pcm import (
+    BLOCK_FRAMES,
+    SAMPLE_RATE,
+    PcmEncoder,
+    apply_gain,
+    db_to_gain,
+    decode_pcm,
+    make_loop_unit,
+    mix,
+)
+
+GAIN_RANGE_DB: float = 4.0  # Each stem drifts within +/- this many dB
+AUTOMATION_SECONDS: float = 30.0  # Average spacing of gain breakpoints
+MAX_TRIM_FRACTION: float = 0.2  # At most this much of a stem is cut to detune its loop
+
+
+class Stem:
+    """One layer of a mix.
+
+    Args:
+        path: Audio file for the layer.
+        gain_db: Base level of the layer in the mix.
+    """
+    path: str
+    gain_db: float
+
+    def __init__(self, path: str, gain_db: float = 0.0) -> None:
+        self.path = path
+        self.gain_db = gain_db
+
+
+class _Layer:
+    """A stem's loop unit plus its playback position and gain automation."""
+    unit: np.ndarray
+    position: int
+    breakpoints: np.ndarray
+    gains: np.ndarray
+
+    def __init__(self, unit: np.ndarray, position: int, breakpoints: np.ndarray, gains: np.ndarray) -> None:
+        self.unit = unit
+        self.position = position
+        self.breakpoints = breakpoints
+        self.gains = gains
+
+    def read(self, start: int, count: int) -> np.ndarray:
+        """Next ``count`` frames of the looping unit, gain automation applied."""
+        parts: list[np.ndarray] = []
+        remaining: int = count
+        while remaining > 0:
+            take: int = min(remaining, len(self.unit) - self.position)
+            parts.append(self.unit[self.position:self.position + take])
+            self.position = (self.position + take) % len(self.unit)
+            remaining -= take
+        block: np.ndarray = parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+        frames: np.ndarray = np.arange(start, start + count, dtype=np.float64)
+        return apply_gain(block, np.interp(frames, self.breakpoints, self.gains))
+
+
+def detuned_lengths(lengths: list[int], rng: random.Random, max_trim_fraction: float = MAX_TRIM_FRACTION) -> list[int]:
+    """Shorten loop lengths so no two share a common factor.
+
+    The first length is kept. Every other one is cut by a random fraction
+    of up to ``max_trim_fraction``, then nudged down until it is coprime
+    with all lengths before it. The layers then only line up again after
+    the product of their lengths, far longer than any video.
+
+    Args:
+        lengths: Maximum loop length of each layer, in frames.
+        rng: Random source.
+        max_trim_fraction: Largest fraction of a layer that may be cut.
+
+    Returns:
+        Loop length of each layer, in frames.
+    """
+    result: list[int] = []
+    for index, length in enumerate(lengths):
+        candidate: int = length if index == 0 else length - int(length * rng.uniform(0.05, max_trim_fraction))
+        while any(math.gcd(candidate, other) != 1 for other in result):
+            candidate -= 1
+        result.append(candidate)
+    return result
+
+
+def _automation(total_frames: int, sample_rate: int, base_gain_db: float, rng: random.Random) -> tuple[np.ndarray, np.ndarray]:
+    """Random piecewise-linear gain curve covering total_frames."""
+    points: list[float] = [0.0]
+    while points[-1] < total_frames:
+        points.append(points[-1] + rng.uniform(0.5, 1.5) * AUTOMATION_SECONDS * sample_rate)
+    gains: list[float] = [db_to_gain(base_gain_db + rng.uniform(-GAIN_RANGE_DB, GAIN_RANGE_DB)) for _ in points]
+    return np.array(points), np.array(gains)
+
+
+def mix_stems(
+    stems: list[Stem],
+    output_path: str,
+    target_duration_seconds: float,
+    crossfade_seconds: float = 3.0,
+    seed: int | None = None,
+    sample_rate: int = SAMPLE_RATE,
+    codec_args: list[str] | None = None,
+    input_args: list[str] | None = None,
+) -> str:
+    """Layer looping stems into one long, non-repeating ambience track.
+
+    Each stem is decoded once. The mix is streamed block by block into
+    the encoder, so memory holds the stems plus one block.
+
+    Args:
+        stems: Layers to mix.
+        output_path: Path for the output audio.
+        target_duration_seconds: Target duration in seconds.
+        crossfade_seconds: Crossfade at each stem's loop seam.
+        seed: Seed for offsets, loop lengths and gain automation.
+        sample_rate: Sample rate of the output.
+        codec_args: Output arguments for the encoder (default MP3).
+        input_args: Extra encoder inputs, e.g. a video to mux the mix
+            into (see ``utils.render``).
+
+    Returns:
+        Path to the output audio.
+
+    Raises:
+        ValueError: If no stems are given or a stem holds no audio.
+    """
+    if not stems:
+        raise ValueError("mix_stems needs at least one stem")
+
+    rng = random.Random(seed)
+    total_frames: int = int(round(target_duration_seconds * sample_rate))
+    crossfade_frames: int = int(crossfade_seconds * sample_rate)
+
+    samples: list[np.ndarray] = [decode_pcm(stem.path, sample_rate) for stem in stems]
+    for stem, stem_samples in zip(stems, samples):
+        if not len(stem_samples):
+            raise ValueError(f"Stem {stem.path} decoded to no audio")
+    # Each unit is its region minus one crossfade; detune the units themselves
+    unit_lengths: list[int] = detuned_lengths(
+        [len(s) - min(crossfade_frames, len(s) // 2) for s in samples], rng
+    )
+
+    layers: list[_Layer] = []
+    for stem, stem_samples, unit_length in zip(stems, samples, unit_lengths):
+        fade: int = min(crossfade_frames, len(stem_samples) // 2)
+        unit: np.ndarray = make_loop_unit(stem_samples, fade, loop_end=unit_length + fade)
+        breakpoints, gains = _automation(total_frames, sample_rate, stem.gain_db, rng)
+        layers.append(_Layer(unit, rng.randrange(len(unit)), breakpoints, gains))
+
+    # Uncorrelated layers add in power, so keep the sum near unity loudness
+    headroom: float = 1.0 / math.sqrt(len(layers))
+
+    print(f"[MIXER] Layering {len(layers)} stems with loop lengths "
+          f"{', '.join(f'{len(layer.unit) / sample_rate:.1f}s' for layer in layers)}")
+
+    with PcmEncoder(output_path, sample_rate, codec_args=codec_args, input_args=input_args) as encoder:
+        start: int = 0
+        while start < total_frames:
+            count: int = min(BLOCK_FRAMES, total_frames - start)
+            encoder.write(mix([layer.read(start, count) for layer in layers]) * np.float32(headroom))
+            start += count
+
+    return output_path
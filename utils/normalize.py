@@ -0,0 +1,109 @@
+"""Normalize-once: re-encode the short base clip into a loop-friendly form.
+
+Generated clips arrive with whatever GOP structure, B-frames, edit lists
+and timebase the model's encoder chose, and those show up as stutter at
+loop seams or force re-encodes later. The clip is only a few seconds
+long, so re-encoding it once is cheap; every loop, render and rendition
+after it can then stream-copy.
+
+The canonical form is H.264 with a closed GOP starting on frame 0,
+no B-frames (so decode and presentation timestamps match), constant
+frame rate on a fixed 90kHz track timescale, yuv420p and no edit list.
+Results are cached by the content hash of the input and the settings,
+so the same clip is never normalized twice.
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+from fractions import Fraction
+
+from utils.hashing import file_digest
+from utils.probe import probe
+
+NORMALIZED_DIR: str = "assets/normalized"
+GOP_SECONDS: float = 2.0
+TRACK_TIMESCALE: int = 90000  # Whole ticks per frame for 6, 24, 25, 30 and 29.97fps
+PIXEL_FORMAT: str = "yuv420p"
+CRF: int = 16  # Near-transparent; the clip is short, so size hardly matters
+
+
+def normalize_args(fps: Fraction) -> list[str]:
+    """ffmpeg output arguments for the canonical loop-friendly encoding."""
+    return [
+        "-an",
+        "-vf", f"fps={fps},format={PIXEL_FORMAT}",
+        *encoder_args(fps),
+    ]
+
+
+def encoder_args(fps: Fraction) -> list[str]:
+    """Codec and muxer half of ``normalize_args``, for callers with their own filter graph."""
+    gop: int = max(1, round(GOP_SECONDS * fps))
+    return [
+        "-fps_mode", "cfr",
+        "-c:v", "libx264",
+        "-preset", "medium",
+        "-crf", str(CRF),
+        "-bf", "0",
+        "-g", str(gop),
+        "-keyint_min", str(gop),
+        "-sc_threshold", "0",
+        "-flags", "+cgop",
+        "-force_key_frames", "expr:eq(n,0)",
+        "-video_track_timescale", str(TRACK_TIMESCALE),
+        "-use_editlist", "0",
+        "-movflags", "+faststart",
+    ]
+
+
+def normalized_path(input_path: str, fps: Fraction, cache_dir: str = NORMALIZED_DIR) -> str:
+    """Cache path for a clip: its content hash combined with the settings."""
+    settings: str = json.dumps(normalize_args(fps))
+    key: str = hashlib.sha256(f"{file_digest(input_path)}\n{settings}".encode()).hexdigest()
+    return os.path.join(cache_dir, f"{key[:24]}.mp4")
+
+
+def normalize_clip(input_path: str, fps: float | None = None, cache_dir: str = NORMALIZED_DIR) -> str:
+    """Re-encode a base clip into the canonical form, once per content.
+
+    Args:
+        input_path: Base clip to normalize.
+        fps: Target frame rate (default: the clip's own rate).
+        cache_dir: Directory of normalized clips.
+
+    Returns:
+        Path to the normalized clip.
+
+    Raises:
+        ValueError: If no frame rate is given and the clip has none.
+    """
+    rate: float | None = fps or probe(input_path).fps
+    if not rate:
+        raise ValueError(f"Cannot read frame rate of {input_path}")
+    target: Fraction = Fraction(rate).limit_denominator(1001)
+
+    output_path: str = normalized_path(input_path, target, cache_dir)
+    if os.path.exists(output_path):
+        print(f"[NORMALIZE] Reusing {output_path}")
+        return output_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written under a temporary name so an interrupted encode is never reused
+    partial_path: str = f"{output_path}.partial.mp4"
+    cmd: list[str] = [
+        "ffmpeg", "-y",
+        "-i", input_path,
+        *normalize_args(target),
+        partial_path
+    ]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    print(f"[NORMALIZE] {input_path} -> {output_path} ({target}fps, closed {GOP_SECONDS:g}s GOPs)")
+    return output_path
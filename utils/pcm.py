@@ -0,0 +1,350 @@
+"""Streaming PCM engine: ffmpeg decodes and encodes, NumPy does the mixing.
+
+Audio moves through the engine as float32 arrays of shape (frames, channels)
+in fixed-size blocks, so memory depends on the block size and the loop unit,
+never on the length of the output.
+"""
+
+import os
+import subprocess
+import threading
+import time
+from typing import IO, TYPE_CHECKING, Iterator, NoReturn
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from utils.loop_points import LoopPoints
+
+SAMPLE_RATE: int = 48000
+CHANNELS: int = 2
+BLOCK_FRAMES: int = 1 << 16  # ~1.4s at 48kHz
+MP3_CODEC_ARGS: list[str] = ["-c:a", "libmp3lame", "-q:a", "2"]
+STDERR_TAIL_BYTES: int = 4096  # Kept for error messages
+
+
+class StderrTail:
+    """Drains a process's stderr on a thread, keeping only its last bytes.
+
+    Reading stderr only after stdout ends lets a decoder that logs enough
+    warnings fill the pipe and block forever; draining it as it arrives
+    cannot.
+    """
+    _stream: IO[bytes]
+    _tail: bytes
+    _thread: threading.Thread
+
+    def __init__(self, stream: IO[bytes]) -> None:
+        self._stream = stream
+        self._tail = b""
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self) -> None:
+        while chunk := self._stream.read(STDERR_TAIL_BYTES):
+            self._tail = (self._tail + chunk)[-STDERR_TAIL_BYTES:]
+
+    def text(self) -> str:
+        """Wait for the process to close stderr and return what was kept."""
+        self._thread.join()
+        self._stream.close()
+        return self._tail.decode(errors="replace")
+
+
+def iter_pcm_blocks(
+    path: str,
+    sample_rate: int = SAMPLE_RATE,
+    channels: int = CHANNELS,
+    block_frames: int = BLOCK_FRAMES,
+) -> Iterator[np.ndarray]:
+    """Decode a file through an ffmpeg pipe into fixed-size float32 blocks.
+
+    Args:
+        path: Audio (or video) file to decode.
+        sample_rate: Output sample rate; ffmpeg resamples if needed.
+        channels: Output channel count.
+        block_frames: Frames per block; only the last block may be shorter.
+
+    Yields:
+        Arrays of shape (frames, channels).
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the file.
+    """
+    cmd: list[str] = [
+        "ffmpeg", "-v", "error",
+        "-i", path,
+        "-f", "f32le",
+        "-ac", str(channels),
+        "-ar", str(sample_rate),
+        "pipe:1"
+    ]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout: IO[bytes] = proc.stdout  # type: ignore[assignment]
+    stderr = StderrTail(proc.stderr)  # type: ignore[arg-type]
+    block_bytes: int = block_frames * channels * 4
+    try:
+        while data := stdout.read(block_bytes):
+            usable: int = len(data) - len(data) % (channels * 4)
+            yield np.frombuffer(data[:usable], dtype=np.float32).reshape(-1, channels)
+    except GeneratorExit:
+        # Consumer stopped early; the decoder is no longer needed
+        proc.kill()
+        raise
+    finally:
+        stdout.close()
+        returncode: int = proc.wait()
+        message: str = stderr.text()
+
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {path}: {message}")
+
+
+def decode_pcm(path: str, sample_rate: int = SAMPLE_RATE, channels: int = CHANNELS) -> np.ndarray:
+    """Decode a whole file into one (frames, channels) float32 array."""
+    blocks: list[np.ndarray] = list(iter_pcm_blocks(path, sample_rate, channels))
+    if not blocks:
+        return np.zeros((0, channels), dtype=np.float32)
+    return np.concatenate(blocks)
+
+
+def db_to_gain(db: float) -> float:
+    """Convert decibels to a linear amplitude factor."""
+    return float(10.0 ** (db / 20.0))
+
+
+def apply_gain(block: np.ndarray, gain: float | np.ndarray) -> np.ndarray:
+    """Scale a block by a constant gain or a per-frame gain curve."""
+    if isinstance(gain, np.ndarray):
+        return block * gain.astype(np.float32)[:, None]
+    return block * np.float32(gain)
+
+
+def mix(blocks: list[np.ndarray], gains: list[float | np.ndarray] | None = None) -> np.ndarray:
+    """Sum equally sized blocks, each scaled by its gain (default 1.0)."""
+    out: np.ndarray = np.zeros_like(blocks[0])
+    for index, block in enumerate(blocks):
+        out += block if gains is None else apply_gain(block, gains[index])
+    return out
+
+
+def equal_power_curves(frames: int) -> tuple[np.ndarray, np.ndarray]:
+    """Fade-out and fade-in curves whose squares sum to one at every frame.
+
+    Keeps the perceived loudness of uncorrelated material (rain, wind,
+    crowd noise) constant through a crossfade, unlike a linear ramp which
+    dips by 3dB in the middle.
+    """
+    # Endpoints are exact, so the first frame continues the outgoing audio
+    # and the last frame is the incoming audio alone
+    t: np.ndarray = np.linspace(0.0, 1.0, frames, dtype=np.float32)
+    angle: np.ndarray = t * np.float32(np.pi / 2)
+    return np.cos(angle), np.sin(angle)
+
+
+def crossfade(outgoing: np.ndarray, incoming: np.ndarray) -> np.ndarray:
+    """Equal-power crossfade between two blocks of the same shape."""
+    fade_out, fade_in = equal_power_curves(len(outgoing))
+    return outgoing * fade_out[:, None] + incoming * fade_in[:, None]
+
+
+def make_loop_unit(
+    samples: np.ndarray,
+    crossfade_frames: int,
+    loop_start: int = 0,
+    loop_end: int | None = None,
+) -> np.ndarray:
+    """Build a seamless loop unit from decoded samples.
+
+    The unit plays from ``loop_start + crossfade_frames`` to ``loop_end``,
+    with its last ``crossfade_frames`` crossfaded into the region that
+    follows ``loop_start``. It ends exactly where it begins, so repeated
+    copies join without a seam.
+
+    Args:
+        samples: Decoded audio, shape (frames, channels).
+        crossfade_frames: Length of the crossfade at the seam.
+        loop_start: First frame of the looped region.
+        loop_end: Frame after the looped region (default: end of samples).
+
+    Returns:
+        Loop unit of ``loop_end - loop_start - crossfade_frames`` frames.
+
+    Raises:
+        ValueError: If the region is too short for the crossfade.
+    """
+    end: int = len(samples) if loop_end is None else loop_end
+    if end - loop_start < 2 * crossfade_frames:
+        raise ValueError(
+            f"Loop region of {end - loop_start} frames is too short for a "
+            f"{crossfade_frames} frame crossfade"
+        )
+
+    unit: np.ndarray = samples[loop_start + crossfade_frames:end].copy()
+    if crossfade_frames:
+        unit[-crossfade_frames:] = crossfade(
+            samples[end - crossfade_frames:end],
+            samples[loop_start:loop_start + crossfade_frames],
+        )
+    return unit
+
+
+class PcmEncoder:
+    """Streams float32 PCM blocks into an ffmpeg encoder process.
+
+    Use as a context manager; the output file is complete once the block
+    exits without an error. The piped audio is ffmpeg input 0; more inputs
+    (a looping video to mux with it, say) can follow via ``input_args``.
+    """
+    output_path: str
+    sample_rate: int
+    channels: int
+    frames_written: int
+    _proc: subprocess.Popen[bytes]
+    _stderr: StderrTail
+    _started: float
+
+    def __init__(
+        self,
+        output_path: str,
+        sample_rate: int = SAMPLE_RATE,
+        channels: int = CHANNELS,
+        codec_args: list[str] | None = None,
+        input_args: list[str] | None = None,
+    ) -> None:
+        self.output_path = output_path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames_written = 0
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        cmd: list[str] = [
+            "ffmpeg", "-y", "-v", "error",
+            "-f", "f32le",
+            "-ar", str(sample_rate),
+            "-ac", str(channels),
+            "-i", "pipe:0",
+            *(input_args or []),
+            *(codec_args if codec_args is not None else MP3_CODEC_ARGS),
+            output_path
+        ]
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._stderr = StderrTail(self._proc.stderr)  # type: ignore[arg-type]
+        self._started = time.perf_counter()
+
+    def write(self, block: np.ndarray) -> None:
+        """Encode one block; samples are clipped to [-1, 1].
+
+        Raises:
+            RuntimeError: If the encoder has exited, with its error output.
+        """
+        data: np.ndarray = np.clip(block, -1.0, 1.0).astype(np.float32, copy=False)
+        try:
+            self._proc.stdin.write(np.ascontiguousarray(data).tobytes())  # type: ignore[union-attr]
+        except BrokenPipeError:
+            self._fail()
+        self.frames_written += len(block)
+
+    def _fail(self) -> NoReturn:
+        """Raise the error of an encoder that closed its input early."""
+        self._proc.wait()
+        raise RuntimeError(f"ffmpeg failed to encode {self.output_path}: {self._stderr.text()}")
+
+    def close(self) -> None:
+        """Finish encoding and report throughput.
+
+        Raises:
+            RuntimeError: If the encoder exits with an error.
+        """
+        try:
+            self._proc.stdin.close()  # type: ignore[union-attr]
+        except BrokenPipeError:
+            self._fail()
+        returncode: int = self._proc.wait()
+        message: str = self._stderr.text()
+        if returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to encode {self.output_path}: {message}")
+
+        elapsed: float = time.perf_counter() - self._started
+        seconds: float = self.frames_written / self.sample_rate
+        speed: str = f"{seconds / elapsed:.0f}x realtime" if elapsed > 0 else "instant"
+        print(f"[PCM] Wrote {seconds:.0f}s of audio in {elapsed:.1f}s ({speed})")
+
+    def __enter__(self) -> "PcmEncoder":
+        return self
+
+    def __exit__(self, exc_type: object, exc: object, tb: object) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._proc.kill()
+            self._proc.wait()
+
+
+def write_looped(
+    encoder: PcmEncoder,
+    unit: np.ndarray,
+    total_frames: int,
+    block_frames: int = BLOCK_FRAMES,
+) -> None:
+    """Write ``total_frames`` of a repeating loop unit in fixed-size blocks."""
+    position: int = 0
+    remaining: int = total_frames
+    while remaining > 0:
+        count: int = min(block_frames, remaining, len(unit) - position)
+        encoder.write(unit[position:position + count])
+        position = (position + count) % len(unit)
+        remaining -= count
+
+
+def loop_audio_pcm(
+    input_path: str,
+    output_path: str,
+    target_duration_seconds: float,
+    crossfade_seconds: float = 3.0,
+    sample_rate: int = SAMPLE_RATE,
+    loop_points: "LoopPoints | None" = None,
+    codec_args: list[str] | None = None,
+    input_args: list[str] | None = None,
+) -> str:
+    """Loop audio to a target duration through the PCM engine.
+
+    The clip is decoded once, turned into a seamless loop unit with an
+    equal-power crossfade, and streamed block by block into the encoder.
+    Memory holds the clip and one block, whatever the target duration.
+
+    Args:
+        input_path: Path to the source audio.
+        output_path: Path for the output audio.
+        target_duration_seconds: Target duration in seconds.
+        crossfade_seconds: Duration of the crossfade at the seam.
+        sample_rate: Sample rate of the output.
+        loop_points: Loop region and crossfade from
+            ``utils.loop_points``; overrides ``crossfade_seconds``.
+            Default loops the whole clip.
+        codec_args: Output arguments for the encoder (default MP3).
+        input_args: Extra encoder inputs, e.g. a video to mux the audio
+            into (see ``utils.render``).
+
+    Returns:
+        Path to the output audio.
+    """
+    samples: np.ndarray = decode_pcm(input_path, sample_rate)
+    total_frames: int = int(round(target_duration_seconds * sample_rate))
+
+    with PcmEncoder(output_path, sample_rate, codec_args=codec_args, input_args=input_args) as encoder:
+        if total_frames <= len(samples):
+            write_looped(encoder, samples, total_frames)
+        elif loop_points is not None:
+            write_looped(encoder, make_loop_unit(
+                samples,
+                int(round(loop_points["crossfade"] * sample_rate)),
+                int(round(loop_points["loop_start"] * sample_rate)),
+                min(int(round(loop_points["loop_end"] * sample_rate)), len(samples)),
+            ), total_frames)
+        else:
+            # The seam needs audio on both sides of the crossfade
+            crossfade_frames: int = min(int(crossfade_seconds * sample_rate), len(samples) // 2)
+            write_looped(encoder, make_loop_unit(samples, crossfade_frames), total_frames)
+
+    return output_path
@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, Any, TypedDict
+
+from clients import get_replicate_client
+from utils.hashing import value_digest
+
+if TYPE_CHECKING:
+    from replicate.prediction import Prediction
+
+INITIAL_POLL_SECONDS: float = 1.0
+MAX_POLL_SECONDS: float = 15.0
+BACKOFF_FACTOR: float = 1.5
+
+JOURNAL_PATH: str = "data/replicate_predictions.json"
+# Replicate deletes API prediction outputs after about an hour
+OUTPUT_REUSE_SECONDS: float = 3600.0
+JOURNAL_RETENTION_SECONDS: float = 7 * 24 * 3600
+
+
+class PredictionHandle(ABC):
+    """A generation job that may still be running.
+
+    Call ``wait()`` from threads or ``await wait_async()`` from asyncio code;
+    several handles can be awaited together with ``wait_all``.
+    """
+
+    @abstractmethod
+    def poll(self) -> str | None:
+        """Check the job once.
+
+        Returns:
+            The output URL or path once finished, None while still running.
+
+        Raises:
+            RuntimeError: If the job failed or was canceled.
+        """
+
+    def status(self) -> str:
+        """Coarse job state used to adapt the polling interval."""
+        return "unknown"
+
+    def wait(self, max_interval: float = MAX_POLL_SECONDS) -> str:
+        """Block until the job finishes, polling with adaptive backoff."""
+        delay: float = INITIAL_POLL_SECONDS
+        last_status: str = self.status()
+        while (result := self.poll()) is None:
+            time.sleep(delay)
+            delay, last_status = self._next_delay(delay, last_status, max_interval)
+        return result
+
+    async def wait_async(self, max_interval: float = MAX_POLL_SECONDS) -> str:
+        """Await the job without blocking the event loop."""
+        delay: float = INITIAL_POLL_SECONDS
+        last_status: str = self.status()
+        while (result := await asyncio.to_thread(self.poll)) is None:
+            await asyncio.sleep(delay)
+            delay, last_status = self._next_delay(delay, last_status, max_interval)
+        return result
+
+    def _next_delay(self, delay: float, last_status: str, max_interval: float) -> tuple[float, str]:
+        # Poll quickly right after a state change (e.g. starting -> processing),
+        # then back off while nothing changes
+        current: str = self.status()
+        if current != last_status:
+            return INITIAL_POLL_SECONDS, current
+        return min(delay * BACKOFF_FACTOR, max_interval), current
+
+
+class CompletedPrediction(PredictionHandle):
+    """Handle for a result that is already available (mocks, cached outputs)."""
+    result: str
+
+    def __init__(self, result: str) -> None:
+        self.result = result
+
+    def poll(self) -> str | None:
+        return self.result
+
+    def status(self) -> str:
+        return "succeeded"
+
+
+class ReplicatePrediction(PredictionHandle):
+    """Handle for a Replicate prediction created without blocking."""
+    prediction: "Prediction"
+
+    def __init__(self, prediction: "Prediction") -> None:
+        self.prediction = prediction
+
+    @property
+    def id(self) -> str:
+        return self.prediction.id
+
+    def status(self) -> str:
+        return self.prediction.status
+
+    def poll(self) -> str | None:
+        if self.prediction.status not in ("succeeded", "failed", "canceled"):
+            self.prediction.reload()
+
+        if self.prediction.status == "succeeded":
+            return output_url(self.prediction.output)
+        if self.prediction.status in ("failed", "canceled"):
+            raise RuntimeError(
+                f"Replicate prediction {self.prediction.id} {self.prediction.status}: "
+                f"{self.prediction.error}"
+            )
+        return None
+
+
+def output_url(output: Any) -> str:
+    """Extract a single URL from a prediction's output (URL, file or list)."""
+    if isinstance(output, list):
+        if not output:
+            raise RuntimeError("Replicate prediction returned no output")
+        output = output[0]
+    if isinstance(output, str):
+        return output
+    url = getattr(output, "url", None)
+    if isinstance(url, str):
+        return url
+    raise RuntimeError(f"Unexpected Replicate output: {output!r}")
+
+
+# One lock per journal file, shared by every PredictionJournal instance in the
+# process: concurrent stages each create their own journal for the same file
+_JOURNAL_LOCKS: dict[str, threading.Lock] = {}
+_JOURNAL_LOCKS_GUARD: threading.Lock = threading.Lock()
+
+
+def _journal_lock(path: str) -> threading.Lock:
+    with _JOURNAL_LOCKS_GUARD:
+        return _JOURNAL_LOCKS.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class JournalEntry(TypedDict):
+    """A submitted prediction, recorded before its result is awaited."""
+    id: str
+    model: str
+    submitted: float
+
+
+class PredictionJournal:
+    """Local record of submitted Replicate predictions, keyed by job inputs.
+
+    Paid predictions keep running on Replicate when this process dies. The
+    journal lets a restarted run find the prediction it already paid for
+    and reattach to it, instead of submitting a duplicate.
+    """
+    path: str
+    _lock: threading.Lock
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path or JOURNAL_PATH
+        self._lock = _journal_lock(self.path)
+
+    @staticmethod
+    def job_key(model: str, input: dict[str, Any]) -> str:
+        """Hash a model and its inputs; file paths hash by content."""
+        sha = hashlib.sha256(model.encode("utf-8"))
+        for name in sorted(input):
+            sha.update(f"\0{name}={value_digest(input[name])}".encode("utf-8"))
+        return sha.hexdigest()
+
+    def _load(self) -> dict[str, JournalEntry]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save(self, entries: dict[str, JournalEntry]) -> None:
+        directory: str = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A unique temporary name, so no other writer can replace or remove it first
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=directory, suffix=".tmp", delete=False
+        ) as f:
+            json.dump(entries, f, indent=2)
+        os.replace(f.name, self.path)
+
+    def get(self, key: str) -> JournalEntry | None:
+        with self._lock:
+            return self._load().get(key)
+
+    def record(self, key: str, prediction_id: str, model: str) -> None:
+        now: float = time.time()
+        with self._lock:
+            entries = {
+                k: v for k, v in self._load().items()
+                if now - v["submitted"] < JOURNAL_RETENTION_SECONDS
+            }
+            entries[key] = {"id": prediction_id, "model": model, "submitted": now}
+            self._save(entries)
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            entries = self._load()
+            if entries.pop(key, None) is not None:
+                self._save(entries)
+
+
+def _reattach(journal: PredictionJournal, key: str) -> ReplicatePrediction | None:
+    """Return a handle for a journaled prediction that is still useful."""
+    entry: JournalEntry | None = journal.get(key)
+    if entry is None:
+        return None
+
+    try:
+        prediction: "Prediction" = get_replicate_client().predictions.get(entry["id"])
+    except Exception as e:
+        print(f"[PREDICTIONS] Could not look up prediction {entry['id']}: {e}")
+        journal.forget(key)
+        return None
+
+    if prediction.status in ("starting", "processing"):
+        print(f"[PREDICTIONS] Reattaching to running prediction {prediction.id}")
+        return ReplicatePrediction(prediction)
+
+    if prediction.status == "succeeded" and time.time() - entry["submitted"] < OUTPUT_REUSE_SECONDS:
+        print(f"[PREDICTIONS] Reusing finished prediction {prediction.id}")
+        return ReplicatePrediction(prediction)
+
+    # Failed, canceled, or finished so long ago that its output has expired
+    journal.forget(key)
+    return None
+
+
+def submit_replicate(
+    model: str,
+    input: dict[str, Any],
+    key_input: dict[str, Any] | None = None,
+    journal: PredictionJournal | None = None,
+) -> ReplicatePrediction:
+    """Create a Replicate prediction and return immediately.
+
+    The prediction ID is journaled before returning, so if the process dies
+    while waiting, the next call with the same inputs reattaches to the
+    running prediction (or reuses its recent output) instead of paying for
+    a duplicate.
+
+    Args:
+        model: Model reference, e.g. "owner/name".
+        input: Model input; open files are uploaded by the client.
+        key_input: JSON-friendly stand-in for ``input`` used to identify the
+            job (e.g. a file path instead of an open file). Defaults to input.
+        journal: Journal to consult and update (default on-disk journal).
+
+    Returns:
+        Handle for polling or awaiting the prediction.
+    """
+    journal = journal or PredictionJournal()
+    key: str = journal.job_key(model, key_input if key_input is not None else input)
+
+    existing: ReplicatePrediction | None = _reattach(journal, key)
+    if existing is not None:
+        return existing
+
+    prediction: "Prediction" = get_replicate_client().models.predictions.create(model=model, input=input)
+    journal.record(key, prediction.id, model)
+    return ReplicatePrediction(prediction)
+
+
+async def wait_all(handles: list[PredictionHandle]) -> list[str]:
+    """Await several predictions concurrently, preserving order."""
+    return list(await asyncio.gather(*(handle.wait_async() for handle in handles)))
+
+
+def gather_predictions(handles: list[PredictionHandle]) -> list[str]:
+    """Blocking wrapper around wait_all for synchronous callers."""
+    return asyncio.run(wait_all(handles))
@@ -0,0 +1,221 @@
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+# Keyframes are located from the packets in the first few seconds only;
+# reading every packet of a multi-hour file would take far longer
+KEYFRAME_SCAN_SECONDS: float = 20.0
+
+_probes: dict[tuple[str, int, int], "MediaInfo"] = {}
+_lock = threading.Lock()
+
+
+class MediaInfo:
+    """Stream properties of a media file, from a single ffprobe call.
+
+    Fields that do not apply to the file (e.g. fps for an audio file) are None.
+    """
+    __slots__ = (
+        "path",
+        "duration",
+        "fps",
+        "frame_count",
+        "resolution",
+        "video_codec",
+        "audio_codec",
+        "sample_rate",
+        "keyframe_interval",
+        "has_b_frames",
+    )
+
+    path: str
+    duration: float | None
+    fps: float | None
+    frame_count: int | None  # Of the video stream, not derived from the container duration
+    resolution: tuple[int, int] | None
+    video_codec: str | None
+    audio_codec: str | None
+    sample_rate: int | None
+    keyframe_interval: float | None
+    has_b_frames: bool | None
+
+    def __init__(
+        self,
+        path: str,
+        duration: float | None = None,
+        fps: float | None = None,
+        frame_count: int | None = None,
+        resolution: tuple[int, int] | None = None,
+        video_codec: str | None = None,
+        audio_codec: str | None = None,
+        sample_rate: int | None = None,
+        keyframe_interval: float | None = None,
+        has_b_frames: bool | None = None,
+    ) -> None:
+        self.path = path
+        self.duration = duration
+        self.fps = fps
+        self.frame_count = frame_count
+        self.resolution = resolution
+        self.video_codec = video_codec
+        self.audio_codec = audio_codec
+        self.sample_rate = sample_rate
+        self.keyframe_interval = keyframe_interval
+        self.has_b_frames = has_b_frames
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"MediaInfo({fields})"
+
+
+def _parse_rate(rate: str | None) -> float | None:
+    """Parse an ffprobe rate like "30/1" or "24000/1001"."""
+    if not rate:
+        return None
+    num, _, denom = rate.partition("/")
+    try:
+        value: float = float(num) / float(denom or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return value or None
+
+
+def _keyframe_interval(packets: list[dict[str, Any]], video_index: int) -> float | None:
+    """Seconds between the first two keyframes of the video stream."""
+    keyframes: list[float] = []
+    for packet in packets:
+        if packet.get("stream_index") != video_index or "K" not in packet.get("flags", ""):
+            continue
+        try:
+            keyframes.append(float(packet["pts_time"]))
+        except (KeyError, ValueError):
+            continue
+        if len(keyframes) == 2:
+            return keyframes[1] - keyframes[0]
+    return None
+
+
+def _frame_count(stream: dict[str, Any], fps: float | None) -> int | None:
+    """Frames in a video stream: its nb_frames, else its own duration at its rate."""
+    try:
+        return int(stream["nb_frames"])
+    except (KeyError, ValueError):
+        pass
+    try:
+        return round(float(stream["duration"]) * fps) if fps else None
+    except (KeyError, ValueError):
+        return None
+
+
+def _parse(path: str, data: dict[str, Any]) -> MediaInfo:
+    info = MediaInfo(path)
+
+    raw_duration: Any = data.get("format", {}).get("duration")
+    if raw_duration is not None:
+        try:
+            info.duration = float(raw_duration)
+        except ValueError:
+            raise ValueError(f"ffprobe returned invalid duration '{raw_duration}' for {path}")
+
+    for stream in data.get("streams", []):
+        codec_type: str | None = stream.get("codec_type")
+        if codec_type == "video" and info.video_codec is None:
+            info.video_codec = stream.get("codec_name")
+            info.fps = _parse_rate(stream.get("r_frame_rate"))
+            info.frame_count = _frame_count(stream, info.fps)
+            if stream.get("width") and stream.get("height"):
+                info.resolution = (int(stream["width"]), int(stream["height"]))
+            info.keyframe_interval = _keyframe_interval(data.get("packets", []), stream.get("index", 0))
+            if "has_b_frames" in stream:
+                info.has_b_frames = int(stream["has_b_frames"]) > 0
+        elif codec_type == "audio" and info.audio_codec is None:
+            info.audio_codec = stream.get("codec_name")
+            if stream.get("sample_rate"):
+                info.sample_rate = int(stream["sample_rate"])
+
+    return info
+
+
+def probe(path: str) -> MediaInfo:
+    """Inspect a media file with one ffprobe call.
+
+    Results are memoized by (absolute path, size, mtime), so probing the
+    same unchanged file again is free. Paths that cannot be stat'ed are
+    probed every time.
+
+    Args:
+        path: Path to the media file.
+
+    Returns:
+        Duration, frame rate, frame count, resolution, codecs, sample rate, keyframe
+        interval and B-frame use of the file.
+
+    Raises:
+        RuntimeError: If ffprobe command fails.
+        ValueError: If ffprobe returns empty or invalid output.
+    """
+    key: tuple[str, int, int] | None = None
+    try:
+        stat = os.stat(path)
+        key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        pass
+
+    if key is not None:
+        with _lock:
+            cached = _probes.get(key)
+        if cached is not None:
+            return cached
+
+    cmd: list[str] = [
+        "ffprobe",
+        "-v", "error",
+        "-print_format", "json",
+        "-show_entries",
+        "format=duration"
+        ":stream=index,codec_type,codec_name,width,height,r_frame_rate,nb_frames,duration,sample_rate,has_b_frames"
+        ":packet=stream_index,pts_time,flags",
+        "-read_intervals", f"%+{KEYFRAME_SCAN_SECONDS}",
+        str(path)
+    ]
+    result: subprocess.CompletedProcess[str] = subprocess.run(
+        cmd, capture_output=True, text=True
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed for {path}: {result.stderr}")
+
+    output: str = result.stdout.strip()
+    if not output:
+        raise ValueError(f"ffprobe returned empty output for {path}")
+
+    try:
+        data: dict[str, Any] = json.loads(output)
+    except json.JSONDecodeError:
+        raise ValueError(f"ffprobe returned invalid JSON for {path}")
+
+    info: MediaInfo = _parse(str(path), data)
+
+    if key is not None:
+        with _lock:
+            _probes[key] = info
+    return info
+
+
+def probe_many(paths: list[str], max_workers: int = 8) -> list[MediaInfo]:
+    """Probe several files concurrently, preserving order.
+
+    Args:
+        paths: Media files to inspect.
+        max_workers: Maximum ffprobe processes running at once.
+
+    Returns:
+        One MediaInfo per path.
+    """
+    if not paths:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return list(executor.map(probe, paths))
@@ -0,0 +1,178 @@
+"""Single-pass final render straight from the base clip and the audio.
+
+The intermediate path writes a looped video, a looped audio file and then
+the final MP4, reading both intermediates back to mux them. Here the base
+video is looped with ``-stream_loop`` and stream-copied into the same
+ffmpeg process that encodes the looping audio, so the final MP4 is the
+only long file ever written.
+"""
+
+import os
+import subprocess
+import tempfile
+
+from utils.audio import build_loop_unit, get_audio_duration
+from utils.loop import get_video_duration
+from utils.loop_points import LoopPoints
+from utils.mixer import Stem, mix_stems
+from utils.pcm import loop_audio_pcm
+
+AAC_CODEC_ARGS: list[str] = ["-c:a", "aac"]
+# LAME -q:a 2 averages about 190kbps; used to size the looped MP3
+LOOPED_MP3_BITS_PER_SECOND: int = 190_000
+
+
+def looped_video_input(video_path: str) -> list[str]:
+    """ffmpeg input arguments that repeat a video without end."""
+    return ["-stream_loop", "-1", "-i", video_path]
+
+
+def mux_args(video_input: int, audio_input: int, target_seconds: float) -> list[str]:
+    """Output arguments that copy the video, encode AAC and cut at the target."""
+    return [
+        "-map", f"{video_input}:v:0",
+        "-map", f"{audio_input}:a:0",
+        "-c:v", "copy",
+        *AAC_CODEC_ARGS,
+        "-t", str(target_seconds),
+    ]
+
+
+def intermediate_bytes(base_video: str, output_path: str, target_seconds: float) -> int:
+    """Estimate what the looped-intermediate path writes for the same output.
+
+    The looped video stream-copies the base clip, so it is the clip's size
+    times the number of repeats. The looped audio is an MP3 of the target
+    length, and the final MP4 is the same size either way.
+    """
+    looped_video: float = os.path.getsize(base_video) * target_seconds / get_video_duration(base_video)
+    looped_audio: float = target_seconds * LOOPED_MP3_BITS_PER_SECOND / 8
+    return int(looped_video + looped_audio) + os.path.getsize(output_path)
+
+
+def report_bytes_written(base_video: str, output_path: str, target_seconds: float) -> None:
+    """Print bytes written by the single pass against the intermediate path."""
+    written: int = os.path.getsize(output_path)
+    legacy: int = intermediate_bytes(base_video, output_path, target_seconds)
+    print(
+        f"[RENDER] Wrote {written / 1e9:.2f} GB in one pass "
+        f"(looped intermediates would write ~{legacy / 1e9:.2f} GB, {legacy / max(written, 1):.1f}x)"
+    )
+
+
+def render_final_video(
+    base_video: str,
+    base_audio: str,
+    output_path: str,
+    duration_hours: int,
+    loop_points: LoopPoints | None = None,
+    pcm: bool = True,
+) -> str:
+    """Render the final MP4 from the base clip and base audio in one pass.
+
+    Args:
+        base_video: Short clip to loop.
+        base_audio: Audio clip to loop under it.
+        output_path: Path for the final video.
+        duration_hours: Target duration in hours.
+        loop_points: Audio loop region and crossfade (default whole clip).
+        pcm: Loop the audio with the NumPy PCM engine piped into the muxer;
+            otherwise ffmpeg renders an audio loop unit and loops both inputs.
+
+    Returns:
+        Path to the final video.
+    """
+    target_seconds: int = duration_hours * 3600
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    if pcm:
+        # Piped audio is input 0, the looping video input 1
+        loop_audio_pcm(
+            base_audio, output_path, target_seconds,
+            loop_points=loop_points,
+            codec_args=mux_args(1, 0, target_seconds),
+            input_args=looped_video_input(base_video),
+        )
+    else:
+        _render_with_ffmpeg(base_video, base_audio, output_path, target_seconds, loop_points)
+
+    report_bytes_written(base_video, output_path, target_seconds)
+    return output_path
+
+
+def _render_with_ffmpeg(
+    base_video: str,
+    base_audio: str,
+    output_path: str,
+    target_seconds: int,
+    loop_points: LoopPoints | None,
+) -> None:
+    """Loop the base clip and a WAV audio loop unit in one ffmpeg process."""
+    if target_seconds <= get_audio_duration(base_audio):
+        cmd: list[str] = [
+            "ffmpeg", "-y",
+            *looped_video_input(base_video),
+            "-i", base_audio,
+            *mux_args(0, 1, target_seconds),
+            output_path
+        ]
+        subprocess.run(cmd, check=True, capture_output=True)
+        return
+
+    # The unit is a few MB of PCM; no file as long as the output is written
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as f:
+        unit_path: str = f.name
+
+    try:
+        if loop_points is not None:
+            build_loop_unit(
+                base_audio, unit_path, loop_points["crossfade"],
+                loop_points["loop_start"], loop_points["loop_end"]
+            )
+        else:
+            build_loop_unit(base_audio, unit_path, min(3.0, get_audio_duration(base_audio) / 2))
+
+        cmd = [
+            "ffmpeg", "-y",
+            *looped_video_input(base_video),
+            "-stream_loop", "-1", "-i", unit_path,
+            *mux_args(0, 1, target_seconds),
+            output_path
+        ]
+        subprocess.run(cmd, check=True, capture_output=True)
+
+    finally:
+        os.remove(unit_path)
+
+
+def render_layered_final_video(
+    base_video: str,
+    stems: list[Stem],
+    output_path: str,
+    duration_hours: int,
+    seed: int | None = None,
+) -> str:
+    """Render the final MP4 from the base clip and layered stems in one pass.
+
+    Args:
+        base_video: Short clip to loop.
+        stems: Audio layers to mix under it.
+        output_path: Path for the final video.
+        duration_hours: Target duration in hours.
+        seed: Seed for the mixer's offsets, loop lengths and automation.
+
+    Returns:
+        Path to the final video.
+    """
+    target_seconds: int = duration_hours * 3600
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    mix_stems(
+        stems, output_path, target_seconds,
+        seed=seed,
+        codec_args=mux_args(1, 0, target_seconds),
+        input_args=looped_video_input(base_video),
+    )
+
+    report_bytes_written(base_video, output_path, target_seconds)
+    return output_path
@@ -0,0 +1,255 @@
+"""Seam scoring and best-trim search for looping base video clips.
+
+A generated clip looped from its last frame straight back to its first
+often jumps visibly. The clip is decoded once at thumbnail size, every
+pair of frames is compared by pixels and by colour histogram, and the
+trim window whose last-to-first jump looks most like an ordinary
+frame-to-frame step is chosen. Distances are measured in units of the
+clip's median consecutive-frame step, so a score near 1.0 is a seam
+that moves no more than the footage itself does.
+
+The chosen window can be cut out as is, crossfaded at its seam, or
+played forwards then backwards (ping-pong), all without another
+generation.
+"""
+
+import subprocess
+from fractions import Fraction
+from typing import TypedDict
+
+import numpy as np
+
+from utils.normalize import encoder_args
+from utils.probe import probe
+
+ANALYSIS_SIZE: tuple[int, int] = (64, 36)
+HISTOGRAM_BINS: int = 16  # Per RGB channel
+PIXEL_WEIGHT: float = 0.5
+HISTOGRAM_WEIGHT: float = 0.5
+MIN_LOOP_FRACTION: float = 0.6  # Keep at least this much of the clip
+LENGTH_WEIGHT: float = 0.5  # Seam score given up to keep the whole clip
+CROSSFADE_SECONDS: float = 0.5
+MIN_SEAM_GAIN: float = 1.0  # Frame steps the seam must improve by to justify a cut
+MIN_KEEP_FRACTION: float = 0.8  # Shortest trimmed window worth cutting to
+SEAM_MODES: tuple[str, ...] = ("trim", "crossfade", "pingpong")
+
+
+class SeamTrim(TypedDict):
+    """Best loop window of a clip, in frames."""
+    start_frame: int
+    end_frame: int  # Exclusive
+    frame_count: int  # Frames in the untrimmed clip
+    fps: float
+    score: float  # Seam jump in median frame steps; 1.0 is an ordinary step
+    raw_score: float  # Same for looping the untrimmed clip
+
+
+def decode_frames(path: str, size: tuple[int, int] = ANALYSIS_SIZE) -> np.ndarray:
+    """Decode every frame of a clip as RGB at thumbnail size.
+
+    Returns:
+        uint8 array of shape (frames, height, width, 3).
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the clip.
+    """
+    width, height = size
+    cmd: list[str] = [
+        "ffmpeg", "-v", "error",
+        "-i", path,
+        "-vf", f"scale={width}:{height}:flags=area",
+        "-f", "rawvideo",
+        "-pix_fmt", "rgb24",
+        "pipe:1"
+    ]
+    result: subprocess.CompletedProcess[bytes] = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {path}: {result.stderr.decode(errors='replace')}")
+
+    frame_bytes: int = width * height * 3
+    count: int = len(result.stdout) // frame_bytes
+    return np.frombuffer(result.stdout[:count * frame_bytes], dtype=np.uint8).reshape(count, height, width, 3)
+
+
+def _histograms(frames: np.ndarray) -> np.ndarray:
+    """Normalized per-channel colour histograms, one row per frame."""
+    count: int = len(frames)
+    bins: np.ndarray = frames.reshape(count, -1, 3).astype(np.int64) * HISTOGRAM_BINS // 256
+    # Offset each frame and channel into its own range so one bincount does all
+    index: np.ndarray = (np.arange(count)[:, None, None] * 3 + np.arange(3)) * HISTOGRAM_BINS + bins
+    counts: np.ndarray = np.bincount(index.ravel(), minlength=count * 3 * HISTOGRAM_BINS)
+    return counts.reshape(count, 3 * HISTOGRAM_BINS).astype(np.float32) / (frames.shape[1] * frames.shape[2])
+
+
+def seam_distances(frames: np.ndarray) -> np.ndarray:
+    """Distance between every pair of frames, in median frame steps.
+
+    Combines mean squared pixel difference and histogram total
+    variation, each divided by its median between consecutive frames.
+    """
+    count: int = len(frames)
+    pixels: np.ndarray = frames.reshape(count, -1).astype(np.float32) / 255.0
+    sq: np.ndarray = (pixels ** 2).sum(axis=1)
+    pixel: np.ndarray = np.maximum(sq[:, None] + sq[None, :] - 2.0 * pixels @ pixels.T, 0.0) / pixels.shape[1]
+
+    hists: np.ndarray = _histograms(frames)
+    histogram: np.ndarray = 0.5 * np.abs(hists[:, None, :] - hists[None, :, :]).sum(axis=2)
+
+    steps: np.ndarray = np.arange(count - 1)
+    pixel_step: float = max(float(np.median(pixel[steps, steps + 1])), 1e-9)
+    histogram_step: float = max(float(np.median(histogram[steps, steps + 1])), 1e-9)
+    return PIXEL_WEIGHT * pixel / pixel_step + HISTOGRAM_WEIGHT * histogram / histogram_step
+
+
+def find_best_trim(frames: np.ndarray, fps: float, min_loop_fraction: float = MIN_LOOP_FRACTION) -> SeamTrim:
+    """Find the loop window whose seam jump looks most like one frame step.
+
+    Looping ``frames[start:end]`` jumps from frame ``end - 1`` to frame
+    ``start``; the best jump is as large as an ordinary step between
+    consecutive frames, neither a visible leap nor a stall. Windows
+    shorter than ``min_loop_fraction`` of the clip are not considered,
+    and shorter windows pay a small penalty so the whole clip wins a tie.
+
+    Args:
+        frames: Decoded frames, shape (frames, height, width, 3).
+        fps: Frame rate of the clip.
+        min_loop_fraction: Shortest window as a fraction of the clip.
+
+    Returns:
+        The best window and its seam score next to the untrimmed one.
+
+    Raises:
+        ValueError: If the clip has fewer than three frames.
+    """
+    count: int = len(frames)
+    if count < 3:
+        raise ValueError(f"Clip of {count} frames is too short to score seams")
+
+    distance: np.ndarray = seam_distances(frames)
+    min_frames: int = max(2, int(np.ceil(min_loop_fraction * count)))
+
+    # Row: first frame, column: last frame; the window has last - first + 1 frames
+    length: np.ndarray = np.arange(count)[None, :] - np.arange(count)[:, None] + 1
+    # An ideal jump is one ordinary step: smaller stalls on a repeated frame
+    objective: np.ndarray = np.abs(distance - 1.0) + LENGTH_WEIGHT * (1.0 - length / count)
+    objective[length < min_frames] = np.inf
+
+    first, last = np.unravel_index(int(np.argmin(objective)), objective.shape)
+    return {
+        "start_frame": int(first),
+        "end_frame": int(last) + 1,
+        "frame_count": count,
+        "fps": fps,
+        "score": float(distance[first, last]),
+        "raw_score": float(distance[0, count - 1]),
+    }
+
+
+def analyze_seam(path: str) -> SeamTrim:
+    """Decode a clip at low resolution and find its best loop window.
+
+    Raises:
+        ValueError: If the clip has no frame rate or too few frames.
+    """
+    fps: float | None = probe(path).fps
+    if not fps:
+        raise ValueError(f"Cannot read frame rate of {path}")
+    trim: SeamTrim = find_best_trim(decode_frames(path), fps)
+    print(
+        f"[SEAM] Frames {trim['start_frame']}-{trim['end_frame'] - 1}: seam {trim['score']:.2f} "
+        f"steps (untrimmed {trim['raw_score']:.2f})"
+    )
+    return trim
+
+
+def worth_trimming(
+    trim: SeamTrim,
+    min_gain: float = MIN_SEAM_GAIN,
+    min_keep_fraction: float = MIN_KEEP_FRACTION,
+) -> bool:
+    """Whether a trim window improves the seam enough to give up frames.
+
+    The gain is how much closer the seam jump gets to one ordinary frame
+    step; small gains are not visible but the lost footage is.
+
+    Args:
+        trim: Window from ``find_best_trim``.
+        min_gain: Smallest improvement, in median frame steps.
+        min_keep_fraction: Smallest window, as a fraction of the clip.
+
+    Returns:
+        True if the window should be cut out instead of looping the whole clip.
+    """
+    gain: float = abs(trim["raw_score"] - 1.0) - abs(trim["score"] - 1.0)
+    kept: float = (trim["end_frame"] - trim["start_frame"]) / trim["frame_count"]
+    return gain >= min_gain and kept >= min_keep_fraction
+
+
+def whole_clip(trim: SeamTrim) -> SeamTrim:
+    """The untrimmed window of the clip ``trim`` was found in."""
+    return {**trim, "start_frame": 0, "end_frame": trim["frame_count"], "score": trim["raw_score"]}
+
+
+def _filter_graph(trim: SeamTrim, mode: str, crossfade_frames: int) -> str:
+    """Filter graph that cuts the window and shapes its seam."""
+    length: int = trim["end_frame"] - trim["start_frame"]
+    window: str = f"[0:v]trim=start_frame={trim['start_frame']}:end_frame={trim['end_frame']},setpts=PTS-STARTPTS"
+    if mode == "trim":
+        return f"{window}[out]"
+    if mode == "crossfade":
+        # Same shape as the audio loop unit: the tail fades into the head
+        fps: float = trim["fps"]
+        return (
+            f"{window},split=2[body][head];"
+            f"[body]trim=start_frame={crossfade_frames},setpts=PTS-STARTPTS[b];"
+            f"[head]trim=end_frame={crossfade_frames},setpts=PTS-STARTPTS[h];"
+            f"[b][h]xfade=transition=fade:duration={crossfade_frames / fps}"
+            f":offset={(length - 2 * crossfade_frames) / fps}[out]"
+        )
+    if mode == "pingpong":
+        # The reversed half drops both end frames so none is shown twice
+        return (
+            f"{window},split=2[forward][backward];"
+            f"[backward]reverse,trim=start_frame=1:end_frame={length - 1},setpts=PTS-STARTPTS[r];"
+            f"[forward][r]concat=n=2:v=1:a=0[out]"
+        )
+    raise ValueError(f"Unknown seam mode '{mode}' (expected one of {', '.join(SEAM_MODES)})")
+
+
+def build_video_loop_unit(
+    input_path: str,
+    output_path: str,
+    trim: SeamTrim,
+    mode: str = "trim",
+    crossfade_seconds: float = CROSSFADE_SECONDS,
+) -> str:
+    """Re-encode a clip's best window into a loop unit.
+
+    Args:
+        input_path: Clip to cut.
+        output_path: Path for the loop unit.
+        trim: Window from ``find_best_trim``.
+        mode: "trim" cuts the window, "crossfade" also fades its tail
+            into its head, "pingpong" plays it forwards then backwards.
+        crossfade_seconds: Crossfade length for "crossfade" mode, clamped
+            to half the window.
+
+    Returns:
+        Path to the loop unit.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    length: int = trim["end_frame"] - trim["start_frame"]
+    crossfade_frames: int = max(1, min(round(crossfade_seconds * trim["fps"]), length // 2))
+    fps: Fraction = Fraction(trim["fps"]).limit_denominator(1001)
+    cmd: list[str] = [
+        "ffmpeg", "-y",
+        "-i", input_path,
+        "-filter_complex", _filter_graph(trim, mode, crossfade_frames),
+        "-map", "[out]",
+        *encoder_args(fps),
+        output_path
+    ]
+    subprocess.run(cmd, check=True, capture_output=True)
+    return output_path
@@ -82,7 +82,8 @@ def upload_video(
     title: str,
     description: str,
     tags: list[str],
-    privacy_status: str = "public"
+    privacy_status: str = "public",
+    youtube: Resource | None = None
 ) -> str:
     """Upload a video to YouTube.
 
@@ -92,11 +93,14 @@ def upload_video(
         description: Video description.
         tags: List of video tags.
         privacy_status: Privacy status (public, private, unlisted).
+        youtube: Authenticated client to reuse across uploads. A new one is
+            created when omitted.
 
     Returns:
         The YouTube video ID.
     """
-    youtube: Resource = get_youtube_client()
+    if youtube is None:
+        youtube = get_youtube_client()
 
     request: HttpRequest = youtube.videos().insert(  # type: ignore[attr-defined]
         part="snippet,status",
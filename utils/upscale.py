@@ -1,7 +1,37 @@
+import hashlib
 import json
+import os
 import subprocess
 import tempfile
+import time
+from fractions import Fraction
+from functools import partial
 from pathlib import Path
+from typing import Callable, Iterator
+
+import numpy as np
+
+from upscale_backends.base import QUALITY_TIERS, UpscaleBackend
+from upscale_backends.dedup import DedupBackend
+from upscale_backends.ffmpeg import FfmpegBackend
+from upscale_backends.realesrgan import RealEsrganBackend, realesrgan_command
+from upscale_backends.sharpen import SharpenBackend
+from upscale_backends.static_mask import StaticRegionBackend
+from utils.encode import encode_segmented
+from utils.frames import WINDOW_FRAMES, FrameEncoder, iter_frame_batches
+from utils.hashing import file_digest
+from utils.normalize import PIXEL_FORMAT, encoder_args
+from utils.probe import probe
+
+UPSCALED_DIR: str = "assets/upscaled"
+CODEC_ARGS: list[str] = [
+    "-c:v", "libx264",
+    "-pix_fmt", "yuv420p",
+    "-crf", "18",  # High quality
+]
+
+# Upscales a batch of frames, shape (frames, height, width, 3), to a larger size
+BatchUpscaler = Callable[[np.ndarray], np.ndarray]
 
 
 def get_video_fps(video_path: Path) -> float:
@@ -13,57 +43,82 @@ def get_video_fps(video_path: Path) -> float:
     Returns:
         Frames per second as a float.
     """
-    cmd: list[str] = [
-        "ffprobe",
-        "-v", "quiet",
-        "-print_format", "json",
-        "-show_streams",
-        str(video_path)
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-    data = json.loads(result.stdout)
-
-    for stream in data.get("streams", []):
-        if stream.get("codec_type") == "video":
-            # Parse framerate like "30/1" or "24000/1001"
-            r_frame_rate: str = stream.get("r_frame_rate", "30/1")
-            num, denom = map(int, r_frame_rate.split("/"))
-            return num / denom
+    fps: float | None = probe(str(video_path)).fps
+    if fps is not None:
+        return fps
 
     return 30.0  # Default fallback
 
 
-def frames_to_video(frames_dir: Path, output_video: Path, fps: float) -> None:
+def frames_to_video(
+    frames_dir: Path,
+    output_video: Path,
+    fps: float,
+    codec_args: list[str] | None = None,
+    profile: str | None = None,
+    workers: int | None = None,
+) -> None:
     """Reassemble frames into a video file.
 
     Args:
         frames_dir: Directory containing the upscaled frames.
         output_video: Path for the output video.
         fps: Framerate for the output video.
+        codec_args: Encoder arguments replacing the default libx264 CRF 18.
+        profile: Encode in parallel GOP-aligned segments with this entry of
+            ``utils.encode.ENCODER_PROFILES`` instead of one encode.
+        workers: Parallel encoders for a profile (default: fill the cores).
+
+    Raises:
+        ValueError: If both codec_args and a profile are given.
     """
+    if profile is not None:
+        if codec_args is not None:
+            raise ValueError("Pass either codec_args or an encoder profile, not both")
+        encode_segmented(frames_dir, output_video, fps, profile=profile, workers=workers)
+        return
+
     cmd: list[str] = [
         "ffmpeg",
         "-y",  # Overwrite output
         "-framerate", str(fps),
         "-i", str(frames_dir / "frame_%06d.jpg"),
-        "-c:v", "libx264",
-        "-pix_fmt", "yuv420p",
-        "-crf", "18",  # High quality
+        *(codec_args if codec_args is not None else CODEC_ARGS),
         str(output_video)
     ]
     subprocess.run(cmd, check=True)
 
 
-def upscale_to_4k(input_video: Path, output_video: Path) -> None:
-    """Upscale a video to 4K using RealESRGAN.
+def upscale_to_4k(
+    input_video: Path,
+    output_video: Path,
+    codec_args: list[str] | None = None,
+    upscaler: UpscaleBackend | None = None,
+    profile: str | None = None,
+) -> None:
+    """Upscale a video with RealESRGAN or another upscale backend.
 
-    This extracts frames, upscales each frame with RealESRGAN,
-    and reassembles them into a video.
+    By default, and for a ``RealEsrganBackend``, frames are extracted to
+    JPGs, the whole directory is upscaled by one RealESRGAN call (the
+    same binary, model and scale the backend uses per batch) and the
+    frames are reassembled into a video. Any other backend works in
+    memory, so its frames are streamed through ``stream_upscale`` instead.
 
     Args:
         input_video: Path to the input video.
         output_video: Path for the upscaled output video.
+        codec_args: Encoder arguments for the reassembled video
+            (default: libx264 CRF 18).
+        upscaler: Backend to use (see ``select_upscaler``); default and
+            RealESRGAN take the frame-directory path described above.
+        profile: Reassemble the frames in parallel segments with this
+            ``utils.encode`` profile instead of one encode with codec_args.
     """
+    # RealESRGAN upscales a whole directory per call faster than batch by batch
+    if upscaler is not None and not isinstance(upscaler, RealEsrganBackend):
+        stream_upscale(input_video, output_video, upscale_batch=upscaler, codec_args=codec_args)
+        return
+
     with tempfile.TemporaryDirectory() as tmpdir:
         tmp_path = Path(tmpdir)
         frames_dir = tmp_path / "frames"
@@ -79,7 +134,183 @@ def upscale_to_4k(input_video: Path, output_video: Path) -> None:
         upscale_frames(frames_dir, upscaled_dir)
 
         # Reassemble into video
-        frames_to_video(upscaled_dir, output_video, fps)
+        if profile is not None:
+            frames_to_video(upscaled_dir, output_video, fps, profile=profile)
+        else:
+            frames_to_video(upscaled_dir, output_video, fps, codec_args=codec_args)
+
+
+def select_upscaler(tier: str = "best") -> UpscaleBackend:
+    """Pick the best backend available on this machine, up to a quality tier.
+
+    Args:
+        tier: Highest quality tier wanted ("fast", "balanced" or "best");
+            cheaper tiers are used when it cannot run here.
+
+    Returns:
+        The chosen backend.
+
+    Raises:
+        ValueError: If the tier is unknown.
+    """
+    if tier not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality tier '{tier}' (expected one of {', '.join(QUALITY_TIERS)})")
+    wanted: int = QUALITY_TIERS.index(tier)
+    # Built one at a time, so only the chosen backend is ever left open
+    candidates: list[Callable[[], UpscaleBackend]] = [
+        RealEsrganBackend, partial(FfmpegBackend, "zscale"), partial(FfmpegBackend, "lanczos"), SharpenBackend
+    ]
+    for candidate in candidates:
+        backend: UpscaleBackend = candidate()
+        if QUALITY_TIERS.index(backend.tier) <= wanted and backend.available():
+            print(f"[UPSCALE] Using {backend.name} ({backend.tier})")
+            return backend
+        backend.close()
+    raise RuntimeError("No upscale backend available")  # Unreachable: NumPy always is
+
+
+def stream_upscale(
+    input_video: Path,
+    output_video: Path,
+    upscale_batch: BatchUpscaler | None = None,
+    window: int = WINDOW_FRAMES,
+    codec_args: list[str] | None = None,
+) -> int:
+    """Upscale a video without writing its frames to disk.
+
+    Raw frames are piped from the decoder, upscaled a window at a time
+    and piped straight into the encoder, so peak memory is one window
+    of input and output frames and there is no JPEG round trip.
+
+    Args:
+        input_video: Path to the input video.
+        output_video: Path for the upscaled output video.
+        upscale_batch: Upscaler applied to each window of frames
+            (default: the best backend from ``select_upscaler``).
+        window: Frames decoded and upscaled per batch.
+        codec_args: Encoder arguments for the output (default: libx264 CRF 18).
+
+    Returns:
+        Number of frames upscaled.
+
+    Raises:
+        ValueError: If the input has no video stream.
+    """
+    resolution: tuple[int, int] | None = probe(str(input_video)).resolution
+    if resolution is None:
+        raise ValueError(f"No video stream in {input_video}")
+    fps: Fraction = Fraction(get_video_fps(input_video)).limit_denominator(1001)
+
+    if upscale_batch is None:
+        upscale_batch = select_upscaler()
+    batches: Iterator[np.ndarray] = iter_frame_batches(str(input_video), resolution, window)
+    first: np.ndarray | None = next(batches, None)
+    if first is None:
+        raise ValueError(f"No frames decoded from {input_video}")
+    upscaled: np.ndarray = upscale_batch(first)
+
+    # The output size is only known once the upscaler has run
+    output_resolution: tuple[int, int] = (upscaled.shape[2], upscaled.shape[1])
+    with FrameEncoder(
+        str(output_video), output_resolution, fps, codec_args if codec_args is not None else CODEC_ARGS
+    ) as encoder:
+        encoder.write(upscaled)
+        for frames in batches:
+            encoder.write(upscale_batch(frames))
+    return encoder.frames_written
+
+
+def upscale_codec_args(fps: Fraction) -> list[str]:
+    """Encoder arguments keeping the upscaled clip in the loop-friendly form."""
+    return ["-pix_fmt", PIXEL_FORMAT, *encoder_args(fps)]
+
+
+def upscaled_path(
+    input_path: str,
+    fps: Fraction,
+    backend: str,
+    streaming: bool = True,
+    cache_dir: str = UPSCALED_DIR,
+    profile: str | None = None,
+) -> str:
+    """Cache path for a clip: its content hash combined with the backend and settings."""
+    # The frame-directory path goes through lossy JPEGs, so its output differs
+    codec: list[str] = [f"profile={profile}"] if profile is not None else upscale_codec_args(fps)
+    settings: str = json.dumps([backend, "stream" if streaming else "jpg", *codec])
+    key: str = hashlib.sha256(f"{file_digest(input_path)}\n{settings}".encode()).hexdigest()
+    return os.path.join(cache_dir, f"{key[:24]}.mp4")
+
+
+def upscale_clip(
+    input_path: str,
+    tier: str = "best",
+    streaming: bool = True,
+    window: int = WINDOW_FRAMES,
+    dedup: bool = True,
+    static_mask: bool = True,
+    cache_dir: str = UPSCALED_DIR,
+    encoder_profile: str | None = None,
+) -> str:
+    """Upscale a short loop clip once per content.
+
+    Runs before looping, so the upscale costs the same for a 1 hour
+    and a 12 hour video. The result keeps the canonical encoding from
+    ``utils.normalize`` so the looper can still stream-copy it.
+
+    Args:
+        input_path: Normalized loop clip.
+        tier: Highest quality tier wanted; see ``select_upscaler``.
+        streaming: Pipe frames through the upscaler (``stream_upscale``)
+            instead of extracting them to JPG directories.
+        window: Frames held in memory at once when streaming.
+        dedup: Upscale one frame per run of near-identical frames
+            (``upscale_backends.dedup``); implies streaming.
+        static_mask: Upscale the static background once and only the
+            moving tiles of each frame (``upscale_backends.static_mask``);
+            implies streaming.
+        cache_dir: Directory of upscaled clips.
+        encoder_profile: ``utils.encode`` profile for a parallel segmented
+            encode; only the frame-directory path (RealESRGAN without
+            streaming) can use it, streaming always encodes in one pipe.
+
+    Returns:
+        Path to the upscaled clip.
+    """
+    fps: Fraction = Fraction(get_video_fps(Path(input_path))).limit_denominator(1001)
+    upscaler: UpscaleBackend = select_upscaler(tier)
+    if static_mask:
+        upscaler = StaticRegionBackend(upscaler)
+    # Outermost, so whole duplicate frames skip the tile work too
+    if dedup:
+        upscaler = DedupBackend(upscaler)
+    # Only plain RealESRGAN can work from frame directories; the others are in memory
+    streaming = streaming or not isinstance(upscaler, RealEsrganBackend)
+    profile: str | None = None if streaming else encoder_profile
+    output_path: str = upscaled_path(input_path, fps, upscaler.name, streaming, cache_dir, profile)
+    if os.path.exists(output_path):
+        print(f"[UPSCALE] Reusing {output_path}")
+        return output_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Written under a temporary name so an interrupted upscale is never reused
+    partial_path: str = f"{output_path}.partial.mp4"
+    started: float = time.perf_counter()
+    try:
+        if streaming:
+            stream_upscale(
+                Path(input_path), Path(partial_path),
+                upscale_batch=upscaler, window=window, codec_args=upscale_codec_args(fps)
+            )
+        else:
+            upscale_to_4k(Path(input_path), Path(partial_path), codec_args=upscale_codec_args(fps), profile=profile)
+        os.replace(partial_path, output_path)
+    finally:
+        upscaler.close()
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+
+    print(f"[UPSCALE] {input_path} -> {output_path} in {time.perf_counter() - started:.1f}s")
+    return output_path
 
 
 def frame_video(input_video: Path, frames_dir: Path | None = None) -> None:
@@ -100,20 +331,15 @@ def frame_video(input_video: Path, frames_dir: Path | None = None) -> None:
     subprocess.run(cmd, check=True)
 
 
-def upscale_frames(input_dir: Path, output_dir: Path) -> None:
+def upscale_frames(input_dir: Path, output_dir: Path, image_format: str = "jpg") -> None:
     """Upscale extracted frames using RealESRGAN.
 
     Args:
         input_dir: Directory containing input frames.
         output_dir: Directory for upscaled frames.
+        image_format: Output image format ("jpg", "png" or "webp").
     """
     output_dir.mkdir(exist_ok=True)
-    cmd: list[str] = [
-        "realesrgan-ncnn-vulkan",
-        "-i", str(input_dir),
-        "-o", str(output_dir),
-        "-n", "realesrgan-x4plus",
-        "-s", "2",
-        "-f", "jpg",  # Output JPG to match frames_to_video expectation
-    ]
+    # JPG by default to match frames_to_video expectation
+    cmd: list[str] = realesrgan_command(input_dir, output_dir, image_format)
     subprocess.run(cmd, check=True)
@@ -1,6 +1,9 @@
 # backends/base.py
+import asyncio
 from abc import ABC, abstractmethod
 
+from utils.predictions import CompletedPrediction, PredictionHandle
+
 class VideoBackend(ABC):
     @abstractmethod
     def generate(
@@ -20,4 +23,20 @@ class VideoBackend(ABC):
         Returns:
             URL or path to generated video
         """
-        pass
\ No newline at end of file
+        pass
+
+    def submit(self, image_path: str, video_prompt: str) -> PredictionHandle:
+        """
+        Start generation and return a handle without waiting for the result.
+
+        Backends that cannot submit asynchronously run generate() here and
+        return an already completed handle.
+        """
+        return CompletedPrediction(self.generate(image_path=image_path, video_prompt=video_prompt))
+
+    async def generate_async(self, image_path: str, video_prompt: str) -> str:
+        """
+        Awaitable generate(): submits, then polls without blocking the loop.
+        """
+        handle: PredictionHandle = await asyncio.to_thread(self.submit, image_path, video_prompt)
+        return await handle.wait_async()
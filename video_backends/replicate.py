@@ -1,31 +1,34 @@
-from typing import cast
-
-import replicate
-from replicate.helpers import FileOutput
-
 from agents.progress import report
+from utils.predictions import PredictionHandle, submit_replicate
 from video_backends.base import VideoBackend
 
+MODEL: str = "wavespeedai/wan-2.1-i2v-480p"
+
 
 class ReplicateVideoBackend(VideoBackend):
-    def generate(
-        self,
-        image_path: str,
-        video_prompt: str,
-    ) -> str:
+    def submit(self, image_path: str, video_prompt: str) -> PredictionHandle:
         report("video-backend", "Replicate: image → video generation started")
 
         with open(image_path, "rb") as image_file:
-            output = cast(FileOutput, replicate.run(
-                "wavespeedai/wan-2.1-i2v-480p",
+            handle = submit_replicate(
+                MODEL,
                 input={
                     "image": image_file,
                     "prompt": video_prompt,
                     "fps": 6
-                }
-            ))
+                },
+                key_input={"image": image_path, "prompt": video_prompt, "fps": 6}
+            )
+
+        report("video-backend", f"Replicate: prediction {handle.id} submitted")
+        return handle
 
-        video_url = output.url
+    def generate(
+        self,
+        image_path: str,
+        video_prompt: str,
+    ) -> str:
+        video_url: str = self.submit(image_path, video_prompt).wait()
         report("video-backend", f"Downloading video from {video_url}")
 
-        return video_url
\ No newline at end of file
+        return video_url